@@ -1,4 +1,4 @@
-from flask import Flask, Blueprint
+from flask import Flask, Blueprint, g, jsonify, request
 from flask_cors import CORS
 from flask_api import status
 from flask_restplus import Api
@@ -9,9 +9,20 @@ from app.api.node_route import node_ns
 from app.api.network_route import network_ns
 from app.api.data_stream_route import data_stream_ns
 from app.api.permission_route import permission_ns
+from app.api.metrics_route import metrics_ns
+from app.api.tx_route import tx_ns
 
+from app.models.admission.admission_controller import AdmissionController
 from app.models.exception.multichain_error import MultiChainError
 
+# API keys aren't authenticated, they only tell apart the clients sharing an address.
+# A client rotating keys gets fresh client budgets, only the chain budgets bound it
+API_KEY_HEADER_NAME = "X-API-Key"
+BLOCKCHAIN_NAME_FIELD_NAME = "blockchainName"
+# Long polls would hold a slot while waiting, and the API documentation doesn't call
+# the daemon
+ADMISSION_EXEMPT_PATHS = {"/api/tx/wait", "/api/swagger.json", "/api/"}
+
 app = Flask(__name__)
 CORS(app)
 
@@ -30,10 +41,66 @@ api.add_namespace(node_ns)
 api.add_namespace(network_ns)
 api.add_namespace(data_stream_ns)
 api.add_namespace(permission_ns)
+api.add_namespace(metrics_ns)
+api.add_namespace(tx_ns)
 
 app.register_blueprint(blueprint)
 
 
+@app.before_request
+def admit_request():
+    """
+    Rejects the request with 429 Too Many Requests if the client or the chain it
+    targets is out of budget for its class, or if too many requests are being
+    processed, rather than queuing it
+    """
+    if (
+        request.method == "OPTIONS"
+        or not request.path.startswith(blueprint.url_prefix + "/")
+        or request.path in ADMISSION_EXEMPT_PATHS
+    ):
+        return None
+
+    client_id = request.remote_addr
+    if request.headers.get(API_KEY_HEADER_NAME):
+        client_id = request.headers[API_KEY_HEADER_NAME] + "@" + client_id
+    blockchain_name = request.args.get(BLOCKCHAIN_NAME_FIELD_NAME)
+    if blockchain_name is None and request.is_json:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict) and isinstance(
+            payload.get(BLOCKCHAIN_NAME_FIELD_NAME), str
+        ):
+            blockchain_name = payload[BLOCKCHAIN_NAME_FIELD_NAME]
+
+    # The slot is taken first so that requests rejected for lack of a slot don't
+    # spend the budgets
+    #
+    wait_time = AdmissionController.SLOT_TIMEOUT
+    if AdmissionController.acquire_slot():
+        wait_time = AdmissionController.admit(
+            client_id,
+            blockchain_name.strip() if blockchain_name else None,
+            AdmissionController.get_request_class(
+                request.method, request.path, request.args.keys()
+            ),
+        )
+        if not wait_time:
+            g.has_admission_slot = True
+            return None
+        AdmissionController.release_slot()
+
+    response = jsonify({"error": {"message": "Too many requests, retry later"}})
+    response.status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    response.headers["Retry-After"] = AdmissionController.get_retry_after(wait_time)
+    return response
+
+
+@app.teardown_request
+def release_request(error):
+    if g.pop("has_admission_slot", False):
+        AdmissionController.release_slot()
+
+
 @api.errorhandler(Exception)
 def handle_root_exception(error):
     return {"error": {"message": str(error)}}, status.HTTP_400_BAD_REQUEST
@@ -1,6 +1,20 @@
-from flask import Flask, request, jsonify, Blueprint
+from flask import Flask, request, jsonify, Blueprint, Response
 from flask_api import status
+from app.models.data.aggregate_controller import AggregateController
 from app.models.data.data_controller import DataController
+from app.models.data.encrypted_data_controller import EncryptedDataController
+from app.models.data.idempotency_controller import (
+    HashingReader,
+    IdempotencyController,
+)
+from app.models.data.payload_codec import PayloadCodec
+from app.models.data.import_controller import ImportController
+from app.models.data.item_filter import ItemFilter
+from app.models.data.journal_controller import JournalController
+from app.models.data.key_index_controller import KeyIndexController
+from app.models.data.partition_controller import PartitionController
+from app.models.data.query_controller import QueryController
+from app.models.data.secondary_index_controller import SecondaryIndexController
 from app.models.exception.multichain_error import MultiChainError
 import json
 from flask_restplus import Namespace, Resource, reqparse, inputs, fields
@@ -16,7 +30,43 @@ LOCAL_ORDERING_FIELD_NAME = "localOrdering"
 PUBLISHER_FIELD_NAME = "publisher"
 PUBLISHERS_FIELD_NAME = "publishers"
 KEY_FIELD_NAME = "key"
+STREAMS_FIELD_NAME = "streams"
+LIMIT_FIELD_NAME = "limit"
+CURSOR_FIELD_NAME = "cursor"
+START_TIME_FIELD_NAME = "startTime"
+END_TIME_FIELD_NAME = "endTime"
 KEYS_FIELD_NAME = "keys"
+PRIVATE_KEY_FIELD_NAME = "privateKey"
+PUBLIC_KEYS_FIELD_NAME = "publicKeys"
+KEY_STREAM_NAME_FIELD_NAME = "keyStreamName"
+ROTATION_PERIOD_FIELD_NAME = "rotationPeriod"
+OFFCHAIN_FIELD_NAME = "offchain"
+FILE_FIELD_NAME = "file"
+OCTET_STREAM_CONTENT_TYPE = "application/octet-stream"
+MULTIPART_CONTENT_TYPE = "multipart/form-data"
+INLINE_DATA_FIELD_NAME = "inlineData"
+TXID_FIELD_NAME = "txid"
+VOUT_FIELD_NAME = "vout"
+SIZE_FIELD_NAME = "size"
+DEFAULT_INLINE_DATA_VALUE = False
+CODEC_FIELD_NAME = "codec"
+DEDUP_FIELD_NAME = "dedup"
+FORMAT_FIELD_NAME = "format"
+KEY_FIELDS_FIELD_NAME = "keyFields"
+DATA_FIELDS_FIELD_NAME = "dataFields"
+IMPORT_ID_FIELD_NAME = "importId"
+BATCH_SIZE_FIELD_NAME = "batchSize"
+SAMPLE_COUNT_FIELD_NAME = "sampleCount"
+DICTIONARY_SIZE_FIELD_NAME = "dictionarySize"
+PREFIX_FIELD_NAME = "prefix"
+START_KEY_FIELD_NAME = "startKey"
+END_KEY_FIELD_NAME = "endKey"
+INTERVAL_FIELD_NAME = "interval"
+FILTER_FIELD_NAME = "filter"
+FIELDS_FIELD_NAME = "fields"
+PATH_FIELD_NAME = "path"
+JOURNAL_FIELD_NAME = "journal"
+IDEMPOTENCY_KEY_HEADER_NAME = "Idempotency-Key"
 
 data_ns = Namespace("data", description="Data API")
 
@@ -52,10 +102,81 @@ base_parser.add_argument(
     location="args",
     default=DataController.DEFAULT_LOCAL_ORDERING_VALUE,
 )
+base_parser.add_argument(FIELDS_FIELD_NAME, action="append", location="args")
 
 
-publish_item_model = data_ns.model(
-    "Publish Item",
+items_parser = base_parser.copy()
+items_parser.add_argument(
+    INLINE_DATA_FIELD_NAME,
+    type=inputs.boolean,
+    location="args",
+    default=DEFAULT_INLINE_DATA_VALUE,
+)
+
+
+def get_verbose(args, verbose_only_fields=DataController.VERBOSE_ONLY_ITEM_FIELDS):
+    """
+    Returns the verbose arg, turned off when fields are projected and neither them
+    nor the filter use the fields the daemon only returns in verbose listings
+    """
+    paths = args.get(FIELDS_FIELD_NAME)
+    if not args[VERBOSE_FIELD_NAME] or not paths:
+        return args[VERBOSE_FIELD_NAME]
+
+    if args.get(FILTER_FIELD_NAME) is not None:
+        paths = paths + ItemFilter.get_paths(args[FILTER_FIELD_NAME])
+    return ItemFilter.uses_fields(paths, verbose_only_fields)
+
+
+def get_items_response(blockchain_name, json_data, args):
+    """
+    Inlines the data and projects the fields of the items of a listing, either a list
+    of items or an object with an items list, as requested by the args of
+    items_parser. Data that isn't returned isn't inlined
+    """
+    items = json_data["items"] if isinstance(json_data, dict) else json_data
+    paths = args.get(FIELDS_FIELD_NAME)
+    if args.get(INLINE_DATA_FIELD_NAME) and (
+        not paths or ItemFilter.uses_fields(paths, (DATA_FIELD_NAME,))
+    ):
+        items = DataController.inline_item_data(blockchain_name, items)
+    if paths:
+        items = ItemFilter.project(items, paths)
+
+    if isinstance(json_data, dict):
+        return dict(json_data, items=items)
+    return items
+
+
+def publish_idempotently(blockchain_name, get_request_value, publish):
+    """
+    Returns the response of publish, only called once per Idempotency-Key header
+    value if the request has one, see IdempotencyController.run. get_request_value
+    returns the value identifying the request, so a key can't be reused for a
+    different item, and is called once the item is published
+    """
+    idempotency_key = request.headers.get(IDEMPOTENCY_KEY_HEADER_NAME)
+    if idempotency_key is None:
+        return publish()
+
+    return IdempotencyController.run(
+        blockchain_name,
+        idempotency_key,
+        lambda: IdempotencyController.get_fingerprint(get_request_value()),
+        publish,
+    )
+
+
+idempotency_key_params = {
+    IDEMPOTENCY_KEY_HEADER_NAME: {
+        "in": "header",
+        "description": "a unique key for the request, retries with the same key return the original response without publishing the item again",
+    }
+}
+
+
+item_model = data_ns.model(
+    "Item",
     {
         BLOCKCHAIN_NAME_FIELD_NAME: fields.String(
             required=True, description="The blockchain name"
@@ -73,9 +194,38 @@ publish_item_model = data_ns.model(
 )
 
 
+publish_item_model = data_ns.clone(
+    "Publish Item",
+    item_model,
+    {
+        CODEC_FIELD_NAME: fields.String(
+            enum=sorted(PayloadCodec.CODECS),
+            description="compresses the data with the codec before publishing it, it is decompressed transparently when read",
+        ),
+        DEDUP_FIELD_NAME: fields.Boolean(
+            default=DataController.DEFAULT_DEDUP_VALUE,
+            description="stores the data once in the content-store stream and only publishes a reference to it, resolved transparently when read",
+        ),
+    },
+)
+
+
+journaled_publish_item_model = data_ns.clone(
+    "Journaled Publish Item",
+    publish_item_model,
+    {
+        JOURNAL_FIELD_NAME: fields.Boolean(
+            default=False,
+            description="appends the item to the local journal and returns right away, the journal being published in order as soon as the node is available, even after a restart",
+        ),
+    },
+)
+
+
 @data_ns.route("/publish_item")
+@data_ns.doc(params=idempotency_key_params)
 class PublishItem(Resource):
-    @data_ns.expect(publish_item_model, validate=True)
+    @data_ns.expect(journaled_publish_item_model, validate=True)
     @data_ns.doc(
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
@@ -90,6 +240,9 @@ class PublishItem(Resource):
         stream_name = data_ns.payload[STREAM_NAME_FIELD_NAME]
         keys = data_ns.payload[KEYS_FIELD_NAME]
         data = data_ns.payload[DATA_FIELD_NAME]
+        codec = data_ns.payload.get(CODEC_FIELD_NAME, DataController.DEFAULT_CODEC_VALUE)
+        dedup = data_ns.payload.get(DEDUP_FIELD_NAME, DataController.DEFAULT_DEDUP_VALUE)
+        journal = data_ns.payload.get(JOURNAL_FIELD_NAME, False)
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -106,73 +259,66 @@ class PublishItem(Resource):
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
 
-        DataController.publish_item(blockchain_name, stream_name, keys, data)
-        return {"status": "Data published!"}, status.HTTP_200_OK
+        def publish():
+            if journal:
+                sequence = JournalController.append(
+                    blockchain_name, stream_name, keys, data, codec, dedup
+                )
+                return {"status": "Data journaled!", "journalSequence": sequence}
 
+            transaction_id = DataController.publish_item(
+                blockchain_name, stream_name, keys, data, codec, dedup
+            ).decode("utf-8")
+            return {"status": "Data published!", "transactionID": transaction_id}
 
-items_key_parser = base_parser.copy()
-items_key_parser.add_argument(
-    KEY_FIELD_NAME, type=str, location="args", required=True
-)
+        json_data = publish_idempotently(
+            blockchain_name, lambda: data_ns.payload, publish
+        )
+        return json_data, status.HTTP_200_OK
 
 
-@data_ns.route("/get_items_by_key")
-@data_ns.doc(
-    params={
-        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
-        STREAM_NAME_FIELD_NAME: "stream name",
-        KEY_FIELD_NAME: "key for the data to be retrieved",
-        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
-        COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
-        START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
-        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
-    }
+train_codec_dictionary_model = data_ns.model(
+    "Train Codec Dictionary",
+    {
+        BLOCKCHAIN_NAME_FIELD_NAME: fields.String(
+            required=True, description="The blockchain name"
+        ),
+        STREAM_NAME_FIELD_NAME: fields.String(
+            required=True, description="The stream name"
+        ),
+        SAMPLE_COUNT_FIELD_NAME: fields.Integer(
+            default=DataController.DEFAULT_DICTIONARY_SAMPLE_COUNT,
+            description="the number of most recent items the dictionary is trained on",
+        ),
+        DICTIONARY_SIZE_FIELD_NAME: fields.Integer(
+            default=DataController.DEFAULT_DICTIONARY_SIZE,
+            description="the size of the dictionary in bytes",
+        ),
+    },
 )
-class ItemByKey(Resource):
-    @data_ns.expect(items_key_parser)
+
+
+@data_ns.route("/train_codec_dictionary")
+class TrainCodecDictionary(Resource):
+    @data_ns.expect(train_codec_dictionary_model, validate=True)
     @data_ns.doc(
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
             status.HTTP_200_OK: "SUCCESS",
         }
     )
-    def get(self):
+    def post(self):
         """
-        Retrieves items that belong to the specified key from stream, passed as a stream name to which the node must be subscribed.
+        Trains a zstd dictionary on the recent items of a stream, used by the zstd-dictionary codec.
         """
-        args = items_key_parser.parse_args(strict=True)
-
-        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
-        stream_name = args[STREAM_NAME_FIELD_NAME]
-        key = args[KEY_FIELD_NAME]
-        verbose = args[VERBOSE_FIELD_NAME]
-        count = args[COUNT_FIELD_NAME]
-        start = args[START_FIELD_NAME]
-        local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
-
-        if blockchain_name is None:
-            raise ValueError(
-                "The "
-                + BLOCKCHAIN_NAME_FIELD_NAME
-                + " parameter was not found in the request!"
-            )
-
-        if stream_name is None:
-            raise ValueError(
-                "The "
-                + STREAM_NAME_FIELD_NAME
-                + " parameter was not found in the request!"
-            )
-
-        if key is None:
-            raise ValueError(
-                "The " + KEY_FIELD_NAME + " parameter was not found in the request!"
-            )
-
-        verbose = DataController.DEFAULT_VERBOSE_VALUE
-        count = DataController.DEFAULT_ITEM_COUNT_VALUE
-        start = DataController.DEFAULT_ITEM_START_VALUE
-        local_ordering = DataController.DEFAULT_LOCAL_ORDERING_VALUE
+        blockchain_name = data_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = data_ns.payload[STREAM_NAME_FIELD_NAME]
+        sample_count = data_ns.payload.get(
+            SAMPLE_COUNT_FIELD_NAME, DataController.DEFAULT_DICTIONARY_SAMPLE_COUNT
+        )
+        dictionary_size = data_ns.payload.get(
+            DICTIONARY_SIZE_FIELD_NAME, DataController.DEFAULT_DICTIONARY_SIZE
+        )
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -180,54 +326,61 @@ class ItemByKey(Resource):
         if not stream_name or not stream_name.strip():
             raise ValueError("The stream name can't be empty!")
 
-        if not key or not key.strip():
-            raise ValueError("The data key can't be empty!")
-
-        blockchain_name = blockchain_name.strip()
-        stream_name = stream_name.strip()
-        key = key.strip()
-        json_data = DataController.get_items_by_key(
-            blockchain_name, stream_name, key, verbose, count, start, local_ordering
+        dictionary_id, transaction_id = DataController.train_codec_dictionary(
+            blockchain_name.strip(), stream_name.strip(), sample_count, dictionary_size
+        )
+        return (
+            {"dictionaryId": dictionary_id, "transactionID": transaction_id},
+            status.HTTP_200_OK,
         )
-        return json_data, status.HTTP_200_OK
 
 
-items_keys_parser = base_parser.copy()
-items_keys_parser.add_argument(
+publish_binary_item_parser = reqparse.RequestParser(bundle_errors=True)
+publish_binary_item_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+publish_binary_item_parser.add_argument(
+    STREAM_NAME_FIELD_NAME, type=str, location="args", required=True
+)
+publish_binary_item_parser.add_argument(
     KEYS_FIELD_NAME, action="append", location="args", required=True
 )
-items_keys_parser.remove_argument(START_FIELD_NAME)
-items_keys_parser.remove_argument(LOCAL_ORDERING_FIELD_NAME)
-items_keys_parser.remove_argument(COUNT_FIELD_NAME)
+publish_binary_item_parser.add_argument(
+    OFFCHAIN_FIELD_NAME,
+    type=inputs.boolean,
+    location="args",
+    default=DataController.DEFAULT_OFFCHAIN_VALUE,
+)
 
 
-@data_ns.route("/get_items_by_keys")
+@data_ns.route("/publish_binary_item")
 @data_ns.doc(
     params={
         BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
         STREAM_NAME_FIELD_NAME: "stream name",
-        KEYS_FIELD_NAME: "list of keys for the data to be retrieved",
-        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        KEYS_FIELD_NAME: "list of keys for the data",
+        OFFCHAIN_FIELD_NAME: "Set offchain to true to store the data off-chain, only its hash is published on-chain",
+        **idempotency_key_params,
     }
 )
-class ItemByKeys(Resource):
-    @data_ns.expect(items_keys_parser)
+class PublishBinaryItem(Resource):
+    @data_ns.expect(publish_binary_item_parser)
     @data_ns.doc(
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
             status.HTTP_200_OK: "SUCCESS",
         }
     )
-    def get(self):
+    def post(self):
         """
-        Retrieves items in stream which match all of the specified keys in query. 
+        Publishes raw bytes to a stream. Send the bytes as the application/octet-stream request body or as the file field of a multipart/form-data request.
         """
-        args = items_keys_parser.parse_args(strict=True)
+        args = publish_binary_item_parser.parse_args(strict=True)
 
         blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
         stream_name = args[STREAM_NAME_FIELD_NAME]
         keys = args[KEYS_FIELD_NAME]
-        verbose = args[VERBOSE_FIELD_NAME]
+        offchain = args[OFFCHAIN_FIELD_NAME]
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -238,50 +391,128 @@ class ItemByKeys(Resource):
         if not keys:
             raise ValueError("The list of keys can't be empty!")
 
-        blockchain_name = blockchain_name.strip()
-        stream_name = stream_name.strip()
-        json_data = DataController.get_items_by_keys(
-            blockchain_name, stream_name, keys, verbose
+        # The octet-stream body is read straight from the socket while it is sent to the
+        # daemon. Multipart uploads are spooled to a temporary file by werkzeug first.
+        #
+        if request.mimetype == OCTET_STREAM_CONTENT_TYPE:
+            source = request.stream
+            length = request.content_length
+            if length is None:
+                raise ValueError("The Content-Length header is required!")
+        elif request.mimetype == MULTIPART_CONTENT_TYPE:
+            if FILE_FIELD_NAME not in request.files:
+                raise ValueError(
+                    "The " + FILE_FIELD_NAME + " field was not found in the request!"
+                )
+            source = request.files[FILE_FIELD_NAME].stream
+            source.seek(0, 2)
+            length = source.tell()
+            source.seek(0)
+        else:
+            raise ValueError(
+                "The data must be sent as "
+                + OCTET_STREAM_CONTENT_TYPE
+                + " or "
+                + MULTIPART_CONTENT_TYPE
+                + "!"
+            )
+
+        if not length:
+            raise ValueError("The data can't be empty!")
+
+        # The bytes are hashed while they are streamed to the daemon, so binary
+        # requests are identified by their hash without holding their bytes
+        #
+        source = HashingReader(source, length)
+
+        def publish():
+            transaction_id = DataController.publish_binary_item(
+                blockchain_name.strip(),
+                stream_name.strip(),
+                keys,
+                source,
+                length,
+                offchain,
+            )
+            return {"status": "Data published!", "transactionID": transaction_id}
+
+        json_data = publish_idempotently(
+            blockchain_name,
+            lambda: dict(args, length=length, sha256=source.get_digest()),
+            publish,
         )
         return json_data, status.HTTP_200_OK
 
 
-items_publishers_parser = base_parser.copy()
-items_publishers_parser.add_argument(
-    PUBLISHERS_FIELD_NAME, action="append", location="args", required=True
+import_items_parser = reqparse.RequestParser(bundle_errors=True)
+import_items_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+import_items_parser.add_argument(
+    STREAM_NAME_FIELD_NAME, type=str, location="args", required=True
+)
+import_items_parser.add_argument(
+    FORMAT_FIELD_NAME,
+    type=str,
+    location="args",
+    required=True,
+    choices=sorted(ImportController.FORMATS),
+)
+import_items_parser.add_argument(
+    KEY_FIELDS_FIELD_NAME, action="append", location="args", required=True
+)
+import_items_parser.add_argument(
+    DATA_FIELDS_FIELD_NAME,
+    action="append",
+    location="args",
+    default=ImportController.DEFAULT_DATA_FIELDS_VALUE,
+)
+import_items_parser.add_argument(IMPORT_ID_FIELD_NAME, type=str, location="args")
+import_items_parser.add_argument(
+    BATCH_SIZE_FIELD_NAME,
+    type=int,
+    location="args",
+    default=ImportController.DEFAULT_BATCH_SIZE,
+)
+import_items_parser.add_argument(
+    CODEC_FIELD_NAME,
+    type=str,
+    location="args",
+    choices=sorted(PayloadCodec.CODECS),
+    default=DataController.DEFAULT_CODEC_VALUE,
 )
-items_publishers_parser.remove_argument(START_FIELD_NAME)
-items_publishers_parser.remove_argument(LOCAL_ORDERING_FIELD_NAME)
-items_publishers_parser.remove_argument(COUNT_FIELD_NAME)
 
 
-@data_ns.route("/get_items_by_publishers")
+@data_ns.route("/import_items")
 @data_ns.doc(
     params={
         BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
         STREAM_NAME_FIELD_NAME: "stream name",
-        PUBLISHERS_FIELD_NAME: "list of publishers wallet address for the data to be retrieved",
-        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        FORMAT_FIELD_NAME: "csv (with a header row) or ndjson (one JSON object per line)",
+        KEY_FIELDS_FIELD_NAME: "the columns whose values are the keys of each item",
+        DATA_FIELDS_FIELD_NAME: "the columns stored as the data of each item, all the other columns by default",
+        IMPORT_ID_FIELD_NAME: "checkpoints the import under this id, importing the same file with the same id again resumes after the last committed row",
+        BATCH_SIZE_FIELD_NAME: "the number of items published per transaction",
+        CODEC_FIELD_NAME: "compresses the data of each item with the codec",
     }
 )
-class ItemByPublisher(Resource):
-    @data_ns.expect(items_publishers_parser)
+class ImportItems(Resource):
+    @data_ns.expect(import_items_parser)
     @data_ns.doc(
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
             status.HTTP_200_OK: "SUCCESS",
         }
     )
-    def get(self):
+    def post(self):
         """
-        Retrieves items in stream which match all of the specified publishers in query. 
+        Publishes every row of a CSV or NDJSON file as an item of a stream. Send the file as the request body or as the file field of a multipart/form-data request. Returns the number of rows published, the throughput and the rows that were rejected.
         """
-        args = items_publishers_parser.parse_args(strict=True)
+        args = import_items_parser.parse_args(strict=True)
 
         blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
         stream_name = args[STREAM_NAME_FIELD_NAME]
-        publishers = args[PUBLISHERS_FIELD_NAME]
-        verbose = args[VERBOSE_FIELD_NAME]
+        import_id = args[IMPORT_ID_FIELD_NAME]
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -289,30 +520,50 @@ class ItemByPublisher(Resource):
         if not stream_name or not stream_name.strip():
             raise ValueError("The stream name can't be empty!")
 
-        if not publishers:
-            raise ValueError("The list of publishers can't be empty!")
-
-        blockchain_name = blockchain_name.strip()
-        stream_name = stream_name.strip()
-        json_data = DataController.get_items_by_publishers(
-            blockchain_name, stream_name, publishers, verbose
+        if not args[KEY_FIELDS_FIELD_NAME]:
+            raise ValueError("The list of key fields can't be empty!")
+
+        # The rows are read from the request a line at a time while they are published
+        #
+        if request.mimetype == MULTIPART_CONTENT_TYPE:
+            if FILE_FIELD_NAME not in request.files:
+                raise ValueError(
+                    "The " + FILE_FIELD_NAME + " field was not found in the request!"
+                )
+            source = request.files[FILE_FIELD_NAME].stream
+        else:
+            source = request.stream
+
+        checkpoint_path = ImportController.DEFAULT_CHECKPOINT_PATH_VALUE
+        if import_id is not None:
+            checkpoint_path = ImportController.get_checkpoint_path(import_id)
+
+        report = ImportController.import_items(
+            blockchain_name.strip(),
+            stream_name.strip(),
+            source,
+            args[FORMAT_FIELD_NAME],
+            args[KEY_FIELDS_FIELD_NAME],
+            args[DATA_FIELDS_FIELD_NAME],
+            checkpoint_path,
+            args[BATCH_SIZE_FIELD_NAME],
+            args[CODEC_FIELD_NAME],
         )
-        return json_data, status.HTTP_200_OK
+        if report["error"] is not None:
+            return report, status.HTTP_400_BAD_REQUEST
+        return report, status.HTTP_200_OK
 
 
-@data_ns.route("/get_stream_items")
-@data_ns.doc(
-    params={
-        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
-        STREAM_NAME_FIELD_NAME: "stream name",
-        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
-        COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
-        START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
-        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
-    }
+get_import_report_parser = reqparse.RequestParser(bundle_errors=True)
+get_import_report_parser.add_argument(
+    IMPORT_ID_FIELD_NAME, type=str, location="args", required=True
 )
-class StreamItem(Resource):
-    @data_ns.expect(base_parser)
+
+
+@data_ns.route("/get_import_report")
+@data_ns.doc(params={IMPORT_ID_FIELD_NAME: "the id the import was started with"})
+class ImportReport(Resource):
+    @data_ns.expect(get_import_report_parser)
     @data_ns.doc(
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
@@ -321,71 +572,68 @@ class StreamItem(Resource):
     )
     def get(self):
         """
-        Retrieves items in stream. 
+        Returns the progress of an import started with an import id, updated after every committed transaction.
         """
+        args = get_import_report_parser.parse_args(strict=True)
+        import_id = args[IMPORT_ID_FIELD_NAME]
 
-        args = base_parser.parse_args(strict=True)
-
-        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
-        stream_name = args[STREAM_NAME_FIELD_NAME]
-        verbose = args[VERBOSE_FIELD_NAME]
-        count = args[COUNT_FIELD_NAME]
-        start = args[START_FIELD_NAME]
-        local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
-
-        if not blockchain_name or not blockchain_name.strip():
-            raise ValueError("The blockchain name can't be empty!")
-
-        if not stream_name or not stream_name.strip():
-            raise ValueError("The stream name can't be empty!")
+        if not import_id or not import_id.strip():
+            raise ValueError("The import id can't be empty!")
 
-        blockchain_name = blockchain_name.strip()
-        stream_name = stream_name.strip()
-        json_data = DataController.get_stream_items(
-            blockchain_name, stream_name, verbose, count, start, local_ordering
+        return (
+            ImportController.get_report(ImportController.get_checkpoint_path(import_id)),
+            status.HTTP_200_OK,
         )
-        return json_data, status.HTTP_200_OK
 
 
-stream_publishers_parser = base_parser.copy()
-stream_publishers_parser.add_argument(
-    PUBLISHERS_FIELD_NAME, action="append", location="args"
+publish_encrypted_item_model = data_ns.clone(
+    "Publish Encrypted Item",
+    item_model,
+    {
+        PRIVATE_KEY_FIELD_NAME: fields.String(
+            required=True, description="the encoded private key of the publisher"
+        ),
+        PUBLIC_KEYS_FIELD_NAME: fields.List(
+            fields.String,
+            required=True,
+            description="the encoded public keys of the users that can read the data",
+        ),
+        KEY_STREAM_NAME_FIELD_NAME: fields.String(
+            required=True,
+            description="The stream the sealed group keys are published to",
+        ),
+        ROTATION_PERIOD_FIELD_NAME: fields.Integer(
+            default=EncryptedDataController.DEFAULT_ROTATION_PERIOD,
+            description="the number of seconds a group key is used before a new one is generated",
+        ),
+    },
 )
 
 
-@data_ns.route("/get_stream_publishers")
-@data_ns.doc(
-    params={
-        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
-        STREAM_NAME_FIELD_NAME: "stream name",
-        PUBLISHERS_FIELD_NAME: "list of publishers wallet address. This will only return information related to the publishers in the list",
-        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
-        COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
-        START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
-        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
-    }
-)
-class StreamPublisher(Resource):
-    @data_ns.expect(stream_publishers_parser)
+@data_ns.route("/publish_encrypted_item")
+@data_ns.doc(params=idempotency_key_params)
+class PublishEncryptedItem(Resource):
+    @data_ns.expect(publish_encrypted_item_model, validate=True)
     @data_ns.doc(
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
             status.HTTP_200_OK: "SUCCESS",
         }
     )
-    def get(self):
+    def post(self):
         """
-        Provides information about publishers who have written to a stream
+        Encrypts an item with the group key of its recipients and publishes it to a stream.
         """
-        args = stream_publishers_parser.parse_args(strict=True)
-
-        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
-        stream_name = args[STREAM_NAME_FIELD_NAME]
-        publishers = args[PUBLISHERS_FIELD_NAME]
-        verbose = args[VERBOSE_FIELD_NAME]
-        count = args[COUNT_FIELD_NAME]
-        start = args[START_FIELD_NAME]
-        local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+        blockchain_name = data_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = data_ns.payload[STREAM_NAME_FIELD_NAME]
+        keys = data_ns.payload[KEYS_FIELD_NAME]
+        data = data_ns.payload[DATA_FIELD_NAME]
+        private_key = data_ns.payload[PRIVATE_KEY_FIELD_NAME]
+        public_keys = data_ns.payload[PUBLIC_KEYS_FIELD_NAME]
+        key_stream_name = data_ns.payload[KEY_STREAM_NAME_FIELD_NAME]
+        rotation_period = data_ns.payload.get(
+            ROTATION_PERIOD_FIELD_NAME, EncryptedDataController.DEFAULT_ROTATION_PERIOD
+        )
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -393,38 +641,133 @@ class StreamPublisher(Resource):
         if not stream_name or not stream_name.strip():
             raise ValueError("The stream name can't be empty!")
 
-        blockchain_name = blockchain_name.strip()
-        stream_name = stream_name.strip()
-        json_data = DataController.get_stream_publishers(
-            blockchain_name,
-            stream_name,
-            publishers,
-            verbose,
-            count,
-            start,
-            local_ordering,
-        )
-        return json_data, status.HTTP_200_OK
+        if not key_stream_name or not key_stream_name.strip():
+            raise ValueError("The key stream name can't be empty!")
 
+        if not keys:
+            raise ValueError("The list of keys can't be empty!")
 
-stream_keys_parser = base_parser.copy()
-stream_keys_parser.add_argument(KEYS_FIELD_NAME, action="append", location="args")
+        if not data:
+            raise ValueError("The data can't be empty!")
 
+        def publish():
+            transaction_id = EncryptedDataController.publish_encrypted_item(
+                blockchain_name.strip(),
+                stream_name.strip(),
+                keys,
+                data,
+                private_key,
+                public_keys,
+                key_stream_name.strip(),
+                rotation_period,
+            ).decode("utf-8")
+            return {"status": "Data published!", "transactionID": transaction_id}
+
+        json_data = publish_idempotently(
+            blockchain_name, lambda: data_ns.payload, publish
+        )
+        return json_data, status.HTTP_200_OK
 
-@data_ns.route("/get_stream_keys")
-@data_ns.doc(
-    params={
-        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+
+decrypted_items_model = data_ns.model(
+    "Get Decrypted Items",
+    {
+        BLOCKCHAIN_NAME_FIELD_NAME: fields.String(
+            required=True, description="The blockchain name"
+        ),
+        STREAM_NAME_FIELD_NAME: fields.String(
+            required=True, description="The stream name"
+        ),
+        KEY_STREAM_NAME_FIELD_NAME: fields.String(
+            required=True,
+            description="The stream the sealed group keys were published to",
+        ),
+        PRIVATE_KEY_FIELD_NAME: fields.String(
+            required=True, description="the encoded private key of the reader"
+        ),
+        COUNT_FIELD_NAME: fields.Integer(
+            default=EncryptedDataController.DEFAULT_ITEM_COUNT_VALUE,
+            description="retrieve part of the list only ex. only 5 items",
+        ),
+        START_FIELD_NAME: fields.Integer(
+            default=EncryptedDataController.DEFAULT_ITEM_START_VALUE,
+            description="deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
+        ),
+    },
+)
+
+
+@data_ns.route("/get_decrypted_items")
+class DecryptedItems(Resource):
+    @data_ns.expect(decrypted_items_model, validate=True)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Retrieves a page of encrypted items from a stream and decrypts them with the reader's key.
+        """
+        blockchain_name = data_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = data_ns.payload[STREAM_NAME_FIELD_NAME]
+        key_stream_name = data_ns.payload[KEY_STREAM_NAME_FIELD_NAME]
+        private_key = data_ns.payload[PRIVATE_KEY_FIELD_NAME]
+        count = data_ns.payload.get(
+            COUNT_FIELD_NAME, EncryptedDataController.DEFAULT_ITEM_COUNT_VALUE
+        )
+        start = data_ns.payload.get(
+            START_FIELD_NAME, EncryptedDataController.DEFAULT_ITEM_START_VALUE
+        )
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not key_stream_name or not key_stream_name.strip():
+            raise ValueError("The key stream name can't be empty!")
+
+        json_data = EncryptedDataController.get_decrypted_items(
+            blockchain_name.strip(),
+            stream_name.strip(),
+            key_stream_name.strip(),
+            private_key,
+            count,
+            start,
+        )
+        return json_data, status.HTTP_200_OK
+
+
+filtered_items_parser = items_parser.copy()
+filtered_items_parser.add_argument(FILTER_FIELD_NAME, type=str, location="args")
+
+
+items_key_parser = filtered_items_parser.copy()
+items_key_parser.add_argument(
+    KEY_FIELD_NAME, type=str, location="args", required=True
+)
+
+
+@data_ns.route("/get_items_by_key")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
         STREAM_NAME_FIELD_NAME: "stream name",
-        KEYS_FIELD_NAME: "list of keys that belong to the stream. This will only return information related to the keys in the list",
+        KEY_FIELD_NAME: "key for the data to be retrieved",
         VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
         COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
         START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
         LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        INLINE_DATA_FIELD_NAME: "Set inlineData to true to replace the data of items larger than maxshowndata by the data itself, for data up to 64 KB",
+        FILTER_FIELD_NAME: "a JSON object mapping dotted item paths (ex. data.json.status) to a value or to operators eq, gt, gte, lt, lte and in. Only matching items are returned, scanning from start, and nextStart is returned to resume the scan",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
     }
 )
-class StreamKey(Resource):
-    @data_ns.expect(stream_keys_parser)
+class ItemByKey(Resource):
+    @data_ns.expect(items_key_parser)
     @data_ns.doc(
         responses={
             status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
@@ -433,33 +776,1305 @@ class StreamKey(Resource):
     )
     def get(self):
         """
-        Provides information about keys in a stream
+        Retrieves items that belong to the specified key from stream, passed as a stream name to which the node must be subscribed.
         """
-        args = stream_keys_parser.parse_args(strict=True)
+        args = items_key_parser.parse_args(strict=True)
 
         blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
         stream_name = args[STREAM_NAME_FIELD_NAME]
-        stream_keys = args[KEYS_FIELD_NAME]
-        verbose = args[VERBOSE_FIELD_NAME]
+        key = args[KEY_FIELD_NAME]
+        verbose = get_verbose(args)
         count = args[COUNT_FIELD_NAME]
         start = args[START_FIELD_NAME]
         local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
 
+        if blockchain_name is None:
+            raise ValueError(
+                "The "
+                + BLOCKCHAIN_NAME_FIELD_NAME
+                + " parameter was not found in the request!"
+            )
+
+        if stream_name is None:
+            raise ValueError(
+                "The "
+                + STREAM_NAME_FIELD_NAME
+                + " parameter was not found in the request!"
+            )
+
+        if key is None:
+            raise ValueError(
+                "The " + KEY_FIELD_NAME + " parameter was not found in the request!"
+            )
+
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
 
         if not stream_name or not stream_name.strip():
             raise ValueError("The stream name can't be empty!")
 
+        if not key or not key.strip():
+            raise ValueError("The data key can't be empty!")
+
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
-        json_data = DataController.get_stream_keys(
-            blockchain_name,
-            stream_name,
-            stream_keys,
-            verbose,
-            count,
-            start,
-            local_ordering,
+        key = key.strip()
+        if args[FILTER_FIELD_NAME] is not None:
+            json_data = QueryController.get_filtered_items(
+                blockchain_name,
+                stream_name,
+                args[FILTER_FIELD_NAME],
+                key=key,
+                verbose=verbose,
+                count=count,
+                start=start,
+                local_ordering=local_ordering,
+            )
+        else:
+            json_data = DataController.get_items_by_key(
+                blockchain_name, stream_name, key, verbose, count, start, local_ordering
+            )
+        json_data = get_items_response(blockchain_name, json_data, args)
+        return json_data, status.HTTP_200_OK
+
+
+items_keys_parser = items_parser.copy()
+items_keys_parser.add_argument(
+    KEYS_FIELD_NAME, action="append", location="args", required=True
+)
+items_keys_parser.remove_argument(START_FIELD_NAME)
+items_keys_parser.remove_argument(LOCAL_ORDERING_FIELD_NAME)
+items_keys_parser.remove_argument(COUNT_FIELD_NAME)
+
+
+@data_ns.route("/get_items_by_keys")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        KEYS_FIELD_NAME: "list of keys for the data to be retrieved",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        INLINE_DATA_FIELD_NAME: "Set inlineData to true to replace the data of items larger than maxshowndata by the data itself, for data up to 64 KB",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
+    }
+)
+class ItemByKeys(Resource):
+    @data_ns.expect(items_keys_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves items in stream which match all of the specified keys in query. 
+        """
+        args = items_keys_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        keys = args[KEYS_FIELD_NAME]
+        verbose = get_verbose(args)
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not keys:
+            raise ValueError("The list of keys can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        json_data = DataController.get_items_by_keys(
+            blockchain_name, stream_name, keys, verbose
         )
+        json_data = get_items_response(blockchain_name, json_data, args)
+        return json_data, status.HTTP_200_OK
+
+
+items_publishers_parser = filtered_items_parser.copy()
+items_publishers_parser.add_argument(
+    PUBLISHERS_FIELD_NAME, action="append", location="args", required=True
+)
+
+
+@data_ns.route("/get_items_by_publishers")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        PUBLISHERS_FIELD_NAME: "list of publishers wallet address for the data to be retrieved",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        COUNT_FIELD_NAME: "the maximum number of matching items retrieved, only used with a filter",
+        START_FIELD_NAME: "the position the scan starts from, with negative values counting from the most recent items, only used with a filter",
+        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to scan items in the order they were first seen by this node, only used with a filter",
+        INLINE_DATA_FIELD_NAME: "Set inlineData to true to replace the data of items larger than maxshowndata by the data itself, for data up to 64 KB",
+        FILTER_FIELD_NAME: "a JSON object mapping dotted item paths (ex. data.json.status) to a value or to operators eq, gt, gte, lt, lte and in. Only matching items are returned, scanning from start, and nextStart is returned to resume the scan",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
+    }
+)
+class ItemByPublisher(Resource):
+    @data_ns.expect(items_publishers_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves items in stream which match all of the specified publishers in query. 
+        """
+        args = items_publishers_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        publishers = args[PUBLISHERS_FIELD_NAME]
+        verbose = get_verbose(args)
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not publishers:
+            raise ValueError("The list of publishers can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        if args[FILTER_FIELD_NAME] is not None:
+            json_data = QueryController.get_filtered_items(
+                blockchain_name,
+                stream_name,
+                args[FILTER_FIELD_NAME],
+                publishers=[
+                    publisher.strip() for publisher in publishers if publisher.strip()
+                ],
+                verbose=verbose,
+                count=args[COUNT_FIELD_NAME],
+                start=args[START_FIELD_NAME],
+                local_ordering=args[LOCAL_ORDERING_FIELD_NAME],
+            )
+        else:
+            json_data = DataController.get_items_by_publishers(
+                blockchain_name, stream_name, publishers, verbose
+            )
+        json_data = get_items_response(blockchain_name, json_data, args)
+        return json_data, status.HTTP_200_OK
+
+
+@data_ns.route("/get_stream_items")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
+        START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
+        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        INLINE_DATA_FIELD_NAME: "Set inlineData to true to replace the data of items larger than maxshowndata by the data itself, for data up to 64 KB",
+        FILTER_FIELD_NAME: "a JSON object mapping dotted item paths (ex. data.json.status) to a value or to operators eq, gt, gte, lt, lte and in. Only matching items are returned, scanning from start, and nextStart is returned to resume the scan",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
+    }
+)
+class StreamItem(Resource):
+    @data_ns.expect(filtered_items_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves items in stream. 
+        """
+
+        args = filtered_items_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        verbose = get_verbose(args)
+        count = args[COUNT_FIELD_NAME]
+        start = args[START_FIELD_NAME]
+        local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        if args[FILTER_FIELD_NAME] is not None:
+            json_data = QueryController.get_filtered_items(
+                blockchain_name,
+                stream_name,
+                args[FILTER_FIELD_NAME],
+                verbose=verbose,
+                count=count,
+                start=start,
+                local_ordering=local_ordering,
+            )
+        else:
+            json_data = DataController.get_stream_items(
+                blockchain_name, stream_name, verbose, count, start, local_ordering
+            )
+        json_data = get_items_response(blockchain_name, json_data, args)
         return json_data, status.HTTP_200_OK
+
+
+@data_ns.route("/publish_partitioned_item")
+@data_ns.doc(params=idempotency_key_params)
+class PublishPartitionedItem(Resource):
+    @data_ns.expect(publish_item_model, validate=True)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Publishes an item to the partition of its first key of a partitioned stream.
+        """
+        blockchain_name = data_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = data_ns.payload[STREAM_NAME_FIELD_NAME]
+        keys = data_ns.payload[KEYS_FIELD_NAME]
+        data = data_ns.payload[DATA_FIELD_NAME]
+        codec = data_ns.payload.get(CODEC_FIELD_NAME, DataController.DEFAULT_CODEC_VALUE)
+        dedup = data_ns.payload.get(DEDUP_FIELD_NAME, DataController.DEFAULT_DEDUP_VALUE)
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not keys:
+            raise ValueError("The list of keys can't be empty!")
+
+        if not data:
+            raise ValueError("The data can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+
+        def publish():
+            partition, transaction_id = PartitionController.publish_item(
+                blockchain_name, stream_name, keys, data, codec, dedup
+            )
+            return {
+                "status": "Data published!",
+                "partition": partition,
+                "transactionID": transaction_id.decode("utf-8"),
+            }
+
+        json_data = publish_idempotently(
+            blockchain_name, lambda: data_ns.payload, publish
+        )
+        return json_data, status.HTTP_200_OK
+
+
+partitioned_items_key_parser = items_parser.copy()
+partitioned_items_key_parser.add_argument(
+    KEY_FIELD_NAME, type=str, location="args", required=True
+)
+
+
+@data_ns.route("/get_partitioned_items_by_key")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "partitioned stream name",
+        KEY_FIELD_NAME: "key for the data to be retrieved, only items published with it as their first key are returned",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
+        START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
+        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        INLINE_DATA_FIELD_NAME: "Set inlineData to true to replace the data of items larger than maxshowndata by the data itself, for data up to 64 KB",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
+    }
+)
+class PartitionedItemByKey(Resource):
+    @data_ns.expect(partitioned_items_key_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the items of a key from a partitioned stream, only querying the partition of the key.
+        """
+        args = partitioned_items_key_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        key = args[KEY_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not key or not key.strip():
+            raise ValueError("The data key can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        json_data = PartitionController.get_items_by_key(
+            blockchain_name,
+            stream_name.strip(),
+            key.strip(),
+            get_verbose(args),
+            args[COUNT_FIELD_NAME],
+            args[START_FIELD_NAME],
+            args[LOCAL_ORDERING_FIELD_NAME],
+        )
+        json_data = get_items_response(blockchain_name, json_data, args)
+        return json_data, status.HTTP_200_OK
+
+
+# Items merged from several streams are ordered by their position in the chain,
+# local ordering doesn't apply to them
+#
+partitioned_items_parser = items_parser.copy()
+partitioned_items_parser.remove_argument(LOCAL_ORDERING_FIELD_NAME)
+
+partitioned_stream_items_parser = partitioned_items_parser.copy()
+partitioned_stream_items_parser.add_argument(
+    LIMIT_FIELD_NAME,
+    type=int,
+    location="args",
+    default=PartitionController.DEFAULT_LIMIT_VALUE,
+)
+partitioned_stream_items_parser.add_argument(
+    CURSOR_FIELD_NAME,
+    type=str,
+    location="args",
+    default=PartitionController.DEFAULT_CURSOR_VALUE,
+)
+partitioned_stream_items_parser.remove_argument(START_FIELD_NAME)
+partitioned_stream_items_parser.remove_argument(COUNT_FIELD_NAME)
+
+
+@data_ns.route("/get_partitioned_stream_items")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "partitioned stream name",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        LIMIT_FIELD_NAME: "the maximum number of items retrieved",
+        CURSOR_FIELD_NAME: "the cursor returned with the previous page of items",
+        INLINE_DATA_FIELD_NAME: "Set inlineData to true to replace the data of items larger than maxshowndata by the data itself, for data up to 64 KB",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
+    }
+)
+class PartitionedStreamItem(Resource):
+    @data_ns.expect(partitioned_stream_items_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the items of a partitioned stream, oldest first, its partitions being queried concurrently and merged in chain order. Pass the returned cursor to get the next page, it is null once all items were retrieved.
+        """
+        args = partitioned_stream_items_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        json_data = PartitionController.get_stream_items(
+            blockchain_name,
+            stream_name.strip(),
+            get_verbose(args),
+            args[LIMIT_FIELD_NAME],
+            args[CURSOR_FIELD_NAME],
+        )
+        json_data = get_items_response(blockchain_name, json_data, args)
+        return json_data, status.HTTP_200_OK
+
+
+items_across_streams_parser = partitioned_items_parser.copy()
+items_across_streams_parser.remove_argument(STREAM_NAME_FIELD_NAME)
+items_across_streams_parser.add_argument(
+    STREAMS_FIELD_NAME, action="append", location="args", required=True
+)
+items_across_streams_parser.add_argument(KEY_FIELD_NAME, type=str, location="args")
+items_across_streams_parser.add_argument(
+    PUBLISHER_FIELD_NAME, type=str, location="args"
+)
+items_across_streams_parser.add_argument(
+    LIMIT_FIELD_NAME,
+    type=int,
+    location="args",
+    default=QueryController.DEFAULT_LIMIT_VALUE,
+)
+
+
+@data_ns.route("/get_items_across_streams")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAMS_FIELD_NAME: "names of the streams to query",
+        KEY_FIELD_NAME: "key for the data to be retrieved",
+        PUBLISHER_FIELD_NAME: "publisher address for the data to be retrieved, used instead of the key",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        COUNT_FIELD_NAME: "the number of items retrieved from each stream",
+        START_FIELD_NAME: "deals with the ordering of the data retrieved from each stream, with negative start values (like the default) indicating the most recent items",
+        LIMIT_FIELD_NAME: "the number of most recent items kept once the items of all streams are merged",
+        INLINE_DATA_FIELD_NAME: "Set inlineData to true to replace the data of items larger than maxshowndata by the data itself, for data up to 64 KB",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
+    }
+)
+class ItemsAcrossStreams(Resource):
+    @data_ns.expect(items_across_streams_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the items of a key or publisher from several streams, queried concurrently and merged in chain order. Streams that can't be queried are reported in errors.
+        """
+        args = items_across_streams_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        streams = args[STREAMS_FIELD_NAME]
+        key = args[KEY_FIELD_NAME]
+        publisher = args[PUBLISHER_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not streams:
+            raise ValueError("The list of streams can't be empty!")
+
+        if (key is None) == (publisher is None):
+            raise ValueError(
+                "Either the "
+                + KEY_FIELD_NAME
+                + " or the "
+                + PUBLISHER_FIELD_NAME
+                + " parameter must be provided!"
+            )
+
+        blockchain_name = blockchain_name.strip()
+        json_data = QueryController.get_items_across_streams(
+            blockchain_name,
+            streams,
+            key,
+            publisher,
+            get_verbose(args),
+            args[COUNT_FIELD_NAME],
+            args[START_FIELD_NAME],
+            args[LIMIT_FIELD_NAME],
+        )
+        json_data = get_items_response(blockchain_name, json_data, args)
+        return json_data, status.HTTP_200_OK
+
+
+items_any_key_parser = items_parser.copy()
+items_any_key_parser.add_argument(
+    KEYS_FIELD_NAME, action="append", location="args", required=True
+)
+items_any_key_parser.add_argument(
+    LIMIT_FIELD_NAME,
+    type=int,
+    location="args",
+    default=QueryController.DEFAULT_UNION_LIMIT_VALUE,
+)
+items_any_key_parser.add_argument(
+    CURSOR_FIELD_NAME,
+    type=str,
+    location="args",
+    default=QueryController.DEFAULT_CURSOR_VALUE,
+)
+items_any_key_parser.remove_argument(START_FIELD_NAME)
+items_any_key_parser.remove_argument(LOCAL_ORDERING_FIELD_NAME)
+items_any_key_parser.remove_argument(COUNT_FIELD_NAME)
+
+
+@data_ns.route("/get_items_by_any_key")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        KEYS_FIELD_NAME: "list of keys, items having any of them are retrieved",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        LIMIT_FIELD_NAME: "the maximum number of items retrieved",
+        CURSOR_FIELD_NAME: "the cursor returned with the previous page of items",
+        INLINE_DATA_FIELD_NAME: "Set inlineData to true to replace the data of items larger than maxshowndata by the data itself, for data up to 64 KB",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
+    }
+)
+class ItemsByAnyKey(Resource):
+    @data_ns.expect(items_any_key_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves items in stream which match any of the specified keys, oldest first, without duplicates. Pass the returned cursor to get the next page, it is null once all items were retrieved.
+        """
+        args = items_any_key_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        keys = args[KEYS_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        if not keys:
+            raise ValueError("The list of keys can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        json_data = QueryController.get_items_by_any_key(
+            blockchain_name,
+            stream_name.strip(),
+            keys,
+            get_verbose(args),
+            args[LIMIT_FIELD_NAME],
+            args[CURSOR_FIELD_NAME],
+        )
+        json_data = get_items_response(blockchain_name, json_data, args)
+        return json_data, status.HTTP_200_OK
+
+
+items_time_range_parser = reqparse.RequestParser(bundle_errors=True)
+items_time_range_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+items_time_range_parser.add_argument(
+    STREAM_NAME_FIELD_NAME, type=str, location="args", required=True
+)
+items_time_range_parser.add_argument(
+    START_TIME_FIELD_NAME,
+    type=int,
+    location="args",
+    default=QueryController.DEFAULT_START_TIME_VALUE,
+)
+items_time_range_parser.add_argument(
+    END_TIME_FIELD_NAME,
+    type=int,
+    location="args",
+    default=QueryController.DEFAULT_END_TIME_VALUE,
+)
+items_time_range_parser.add_argument(
+    VERBOSE_FIELD_NAME,
+    type=inputs.boolean,
+    location="args",
+    default=DataController.DEFAULT_VERBOSE_VALUE,
+)
+items_time_range_parser.add_argument(
+    LIMIT_FIELD_NAME,
+    type=int,
+    location="args",
+    default=QueryController.DEFAULT_TIME_RANGE_LIMIT_VALUE,
+)
+items_time_range_parser.add_argument(
+    FIELDS_FIELD_NAME, action="append", location="args"
+)
+
+
+@data_ns.route("/get_items_by_time_range")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        START_TIME_FIELD_NAME: "the oldest blocktime of the items retrieved, in seconds since the epoch",
+        END_TIME_FIELD_NAME: "the most recent blocktime of the items retrieved, in seconds since the epoch, the most recent items are retrieved by default",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        LIMIT_FIELD_NAME: "the maximum number of items retrieved, starting from the oldest, 1000 by default and at most 10000",
+        FIELDS_FIELD_NAME: "list of dotted item paths (ex. data.json.status) to return instead of the whole items, non-verbose items are retrieved when they have all these paths",
+    }
+)
+class ItemsByTimeRange(Resource):
+    @data_ns.expect(items_time_range_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the items of stream published between two blocktimes, oldest first. To retrieve more items than the limit, query again from the blocktime of the last item returned, the items of its block being returned again.
+        """
+        args = items_time_range_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        items = QueryController.get_items_by_time_range(
+            blockchain_name.strip(),
+            stream_name.strip(),
+            args[START_TIME_FIELD_NAME],
+            args[END_TIME_FIELD_NAME],
+            get_verbose(args),
+            args[LIMIT_FIELD_NAME],
+        )
+        if args[FIELDS_FIELD_NAME]:
+            items = ItemFilter.project(items, args[FIELDS_FIELD_NAME])
+        return items, status.HTTP_200_OK
+
+
+stream_publishers_parser = base_parser.copy()
+stream_publishers_parser.add_argument(
+    PUBLISHERS_FIELD_NAME, action="append", location="args"
+)
+
+
+@data_ns.route("/get_stream_publishers")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        PUBLISHERS_FIELD_NAME: "list of publishers wallet address. This will only return information related to the publishers in the list",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
+        START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
+        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        FIELDS_FIELD_NAME: "list of dotted paths (ex. items) to return instead of the whole entries, non-verbose entries are retrieved when they have all these paths",
+    }
+)
+class StreamPublisher(Resource):
+    @data_ns.expect(stream_publishers_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Provides information about publishers who have written to a stream
+        """
+        args = stream_publishers_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        publishers = args[PUBLISHERS_FIELD_NAME]
+        verbose = get_verbose(args, DataController.VERBOSE_ONLY_ENTRY_FIELDS)
+        count = args[COUNT_FIELD_NAME]
+        start = args[START_FIELD_NAME]
+        local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        json_data = DataController.get_stream_publishers(
+            blockchain_name,
+            stream_name,
+            publishers,
+            verbose,
+            count,
+            start,
+            local_ordering,
+        )
+        if args[FIELDS_FIELD_NAME]:
+            json_data = ItemFilter.project(json_data, args[FIELDS_FIELD_NAME])
+        return json_data, status.HTTP_200_OK
+
+
+stream_keys_parser = base_parser.copy()
+stream_keys_parser.add_argument(KEYS_FIELD_NAME, action="append", location="args")
+
+
+@data_ns.route("/get_stream_keys")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        KEYS_FIELD_NAME: "list of keys that belong to the stream. This will only return information related to the keys in the list",
+        VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
+        COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
+        START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
+        LOCAL_ORDERING_FIELD_NAME: "Set local-ordering to true to order items by when first seen by this node, rather than their order in the chain",
+        FIELDS_FIELD_NAME: "list of dotted paths (ex. items) to return instead of the whole entries, non-verbose entries are retrieved when they have all these paths",
+    }
+)
+class StreamKey(Resource):
+    @data_ns.expect(stream_keys_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Provides information about keys in a stream
+        """
+        args = stream_keys_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+        stream_keys = args[KEYS_FIELD_NAME]
+        verbose = get_verbose(args, DataController.VERBOSE_ONLY_ENTRY_FIELDS)
+        count = args[COUNT_FIELD_NAME]
+        start = args[START_FIELD_NAME]
+        local_ordering = args[LOCAL_ORDERING_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        blockchain_name = blockchain_name.strip()
+        stream_name = stream_name.strip()
+        json_data = DataController.get_stream_keys(
+            blockchain_name,
+            stream_name,
+            stream_keys,
+            verbose,
+            count,
+            start,
+            local_ordering,
+        )
+        if args[FIELDS_FIELD_NAME]:
+            json_data = ItemFilter.project(json_data, args[FIELDS_FIELD_NAME])
+        return json_data, status.HTTP_200_OK
+
+
+scan_stream_keys_parser = reqparse.RequestParser(bundle_errors=True)
+scan_stream_keys_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+scan_stream_keys_parser.add_argument(
+    STREAM_NAME_FIELD_NAME, type=str, location="args", required=True
+)
+scan_stream_keys_parser.add_argument(
+    PREFIX_FIELD_NAME,
+    type=str,
+    location="args",
+    default=KeyIndexController.DEFAULT_PREFIX_VALUE,
+)
+scan_stream_keys_parser.add_argument(
+    START_KEY_FIELD_NAME,
+    type=str,
+    location="args",
+    default=KeyIndexController.DEFAULT_START_KEY_VALUE,
+)
+scan_stream_keys_parser.add_argument(
+    END_KEY_FIELD_NAME,
+    type=str,
+    location="args",
+    default=KeyIndexController.DEFAULT_END_KEY_VALUE,
+)
+scan_stream_keys_parser.add_argument(
+    LIMIT_FIELD_NAME,
+    type=int,
+    location="args",
+    default=KeyIndexController.DEFAULT_SCAN_LIMIT_VALUE,
+)
+scan_stream_keys_parser.add_argument(
+    CURSOR_FIELD_NAME,
+    type=str,
+    location="args",
+    default=KeyIndexController.DEFAULT_CURSOR_VALUE,
+)
+scan_stream_keys_parser.add_argument(
+    VERBOSE_FIELD_NAME,
+    type=inputs.boolean,
+    location="args",
+    default=KeyIndexController.DEFAULT_VERBOSE_VALUE,
+)
+
+
+@data_ns.route("/scan_stream_keys")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        PREFIX_FIELD_NAME: "only retrieve the keys starting with the prefix",
+        START_KEY_FIELD_NAME: "the lowest key retrieved, in lexical order",
+        END_KEY_FIELD_NAME: "the key the scan stops before, in lexical order",
+        LIMIT_FIELD_NAME: "the maximum number of keys retrieved",
+        CURSOR_FIELD_NAME: "the cursor returned with the previous page of keys",
+        VERBOSE_FIELD_NAME: "Set verbose to true to retrieve information about each key instead of its name",
+    }
+)
+class ScanStreamKeys(Resource):
+    @data_ns.expect(scan_stream_keys_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the keys of a stream, to which the node must be subscribed, matching a prefix and/or a lexical range, in lexical order. Pass the returned cursor to get the next page, it is null once all keys were retrieved.
+        """
+        args = scan_stream_keys_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = KeyIndexController.scan_keys(
+            blockchain_name.strip(),
+            stream_name.strip(),
+            args[PREFIX_FIELD_NAME],
+            args[START_KEY_FIELD_NAME],
+            args[END_KEY_FIELD_NAME],
+            args[LIMIT_FIELD_NAME],
+            args[CURSOR_FIELD_NAME],
+            args[VERBOSE_FIELD_NAME],
+        )
+        return json_data, status.HTTP_200_OK
+
+
+stream_name_parser = reqparse.RequestParser(bundle_errors=True)
+stream_name_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+stream_name_parser.add_argument(
+    STREAM_NAME_FIELD_NAME, type=str, location="args", required=True
+)
+
+
+item_counts_parser = stream_name_parser.copy()
+item_counts_parser.add_argument(KEYS_FIELD_NAME, action="append", location="args")
+item_counts_parser.add_argument(
+    PUBLISHERS_FIELD_NAME, action="append", location="args"
+)
+
+
+@data_ns.route("/get_item_counts")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        KEYS_FIELD_NAME: "list of keys to count the items of",
+        PUBLISHERS_FIELD_NAME: "list of publishers wallet address to count the items of",
+    }
+)
+class ItemCounts(Resource):
+    @data_ns.expect(item_counts_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Counts the confirmed items, distinct keys and distinct publishers of a stream, to which the node must be subscribed, and the items of the specified keys and publishers.
+        """
+        args = item_counts_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = AggregateController.get_item_counts(
+            blockchain_name.strip(),
+            stream_name.strip(),
+            args[KEYS_FIELD_NAME],
+            args[PUBLISHERS_FIELD_NAME],
+        )
+        return json_data, status.HTTP_200_OK
+
+
+item_histogram_parser = stream_name_parser.copy()
+item_histogram_parser.add_argument(
+    INTERVAL_FIELD_NAME,
+    type=int,
+    location="args",
+    default=AggregateController.DEFAULT_INTERVAL_VALUE,
+)
+item_histogram_parser.add_argument(
+    START_TIME_FIELD_NAME,
+    type=int,
+    location="args",
+    default=AggregateController.DEFAULT_START_TIME_VALUE,
+)
+item_histogram_parser.add_argument(
+    END_TIME_FIELD_NAME,
+    type=int,
+    location="args",
+    default=AggregateController.DEFAULT_END_TIME_VALUE,
+)
+item_histogram_parser.add_argument(PUBLISHER_FIELD_NAME, type=str, location="args")
+
+
+@data_ns.route("/get_item_histogram")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        INTERVAL_FIELD_NAME: "the length of the intervals items are counted over, in seconds, a multiple of an hour",
+        START_TIME_FIELD_NAME: "the oldest blocktime counted, in seconds since the epoch",
+        END_TIME_FIELD_NAME: "the most recent blocktime counted, in seconds since the epoch, up to the most recent items by default",
+        PUBLISHER_FIELD_NAME: "only count the items of this publisher wallet address",
+    }
+)
+class ItemHistogram(Resource):
+    @data_ns.expect(item_histogram_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Counts the confirmed items of a stream, to which the node must be subscribed, per interval of blocktime, oldest first. Intervals without items are omitted.
+        """
+        args = item_histogram_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = AggregateController.get_item_histogram(
+            blockchain_name.strip(),
+            stream_name.strip(),
+            args[INTERVAL_FIELD_NAME],
+            args[START_TIME_FIELD_NAME],
+            args[END_TIME_FIELD_NAME],
+            args[PUBLISHER_FIELD_NAME],
+        )
+        return json_data, status.HTTP_200_OK
+
+
+top_items_parser = stream_name_parser.copy()
+top_items_parser.add_argument(
+    LIMIT_FIELD_NAME,
+    type=int,
+    location="args",
+    default=AggregateController.DEFAULT_TOP_LIMIT_VALUE,
+)
+
+
+@data_ns.route("/get_top_keys")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        LIMIT_FIELD_NAME: "the number of keys retrieved",
+    }
+)
+class TopKeys(Resource):
+    @data_ns.expect(top_items_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the keys of a stream, to which the node must be subscribed, that have the most confirmed items.
+        """
+        args = top_items_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = AggregateController.get_top_keys(
+            blockchain_name.strip(), stream_name.strip(), args[LIMIT_FIELD_NAME]
+        )
+        return json_data, status.HTTP_200_OK
+
+
+@data_ns.route("/get_top_publishers")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+        LIMIT_FIELD_NAME: "the number of publishers retrieved",
+    }
+)
+class TopPublishers(Resource):
+    @data_ns.expect(top_items_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the publishers of a stream, to which the node must be subscribed, that published the most confirmed items.
+        """
+        args = top_items_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = AggregateController.get_top_publishers(
+            blockchain_name.strip(), stream_name.strip(), args[LIMIT_FIELD_NAME]
+        )
+        return json_data, status.HTTP_200_OK
+
+
+index_model = data_ns.model(
+    "Index",
+    {
+        BLOCKCHAIN_NAME_FIELD_NAME: fields.String(
+            required=True, description="The blockchain name"
+        ),
+        STREAM_NAME_FIELD_NAME: fields.String(
+            required=True, description="The stream name"
+        ),
+        PATH_FIELD_NAME: fields.String(
+            required=True,
+            description="the dotted item path indexed, ex. data.json.customerId",
+        ),
+    },
+)
+
+
+@data_ns.route("/create_index")
+class CreateIndex(Resource):
+    @data_ns.expect(index_model, validate=True)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Declares a secondary index on a path of the items of a stream, to which the node must be subscribed. get_stream_items filters looking up values of the path then only retrieve the matching items.
+        """
+        blockchain_name = data_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = data_ns.payload[STREAM_NAME_FIELD_NAME]
+        path = data_ns.payload[PATH_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = SecondaryIndexController.create_index(
+            blockchain_name.strip(), stream_name.strip(), path
+        )
+        return json_data, status.HTTP_200_OK
+
+
+@data_ns.route("/drop_index")
+class DropIndex(Resource):
+    @data_ns.expect(index_model, validate=True)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Removes the secondary index on a path of the items of a stream.
+        """
+        blockchain_name = data_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = data_ns.payload[STREAM_NAME_FIELD_NAME]
+        path = data_ns.payload[PATH_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = SecondaryIndexController.drop_index(
+            blockchain_name.strip(), stream_name.strip(), path
+        )
+        return json_data, status.HTTP_200_OK
+
+
+@data_ns.route("/get_indexes")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        STREAM_NAME_FIELD_NAME: "stream name",
+    }
+)
+class Indexes(Resource):
+    @data_ns.expect(stream_name_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the secondary indexes of a stream, with the number of items indexed and of distinct values of each path.
+        """
+        args = stream_name_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = args[STREAM_NAME_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = SecondaryIndexController.get_indexes(
+            blockchain_name.strip(), stream_name.strip()
+        )
+        return json_data, status.HTTP_200_OK
+
+
+item_data_parser = reqparse.RequestParser(bundle_errors=True)
+item_data_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+item_data_parser.add_argument(TXID_FIELD_NAME, location="args", type=str, required=True)
+item_data_parser.add_argument(VOUT_FIELD_NAME, location="args", type=int, required=True)
+item_data_parser.add_argument(SIZE_FIELD_NAME, location="args", type=int)
+
+
+@data_ns.route("/item_data")
+@data_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        TXID_FIELD_NAME: "the txid field of the item's data object",
+        VOUT_FIELD_NAME: "the vout field of the item's data object",
+        SIZE_FIELD_NAME: "the size field of the item's data object. Required to stream raw data and to use HTTP Range requests",
+    }
+)
+class ItemData(Resource):
+    @data_ns.expect(item_data_parser)
+    @data_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+            status.HTTP_206_PARTIAL_CONTENT: "PARTIAL CONTENT",
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE: "RANGE NOT SATISFIABLE",
+        }
+    )
+    def get(self):
+        """
+        Retrieves the data of an item that was too large to be returned with the item. Raw data is streamed in chunks and supports HTTP Range requests.
+        """
+        args = item_data_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        txid = args[TXID_FIELD_NAME]
+        vout = args[VOUT_FIELD_NAME]
+        size = args[SIZE_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not txid or not txid.strip():
+            raise ValueError("The txid can't be empty!")
+
+        if vout < 0:
+            raise ValueError("The vout can't be negative!")
+
+        blockchain_name = blockchain_name.strip()
+        txid = txid.strip()
+
+        # Without the size, the data is retrieved in a single call, which
+        # is what JSON and text data require anyway
+        #
+        if size is None:
+            data = DataController.get_item_data(blockchain_name, txid, vout)
+            return {"data": data}, status.HTTP_200_OK
+
+        if size < 0:
+            raise ValueError("The size can't be negative!")
+
+        start = 0
+        length = size
+        response_status = status.HTTP_200_OK
+        headers = {"Accept-Ranges": "bytes"}
+
+        if request.range is not None:
+            byte_range = request.range.range_for_length(size)
+            if byte_range is None:
+                headers["Content-Range"] = "bytes */" + str(size)
+                return Response(
+                    status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers=headers,
+                )
+            start, stop = byte_range
+            length = stop - start
+            response_status = status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = (
+                "bytes " + str(start) + "-" + str(stop - 1) + "/" + str(size)
+            )
+
+        headers["Content-Length"] = str(length)
+        chunks = DataController.get_item_data_chunks(
+            blockchain_name, txid, vout, start, length
+        )
+        return Response(
+            chunks,
+            status=response_status,
+            headers=headers,
+            mimetype=OCTET_STREAM_CONTENT_TYPE,
+        )
@@ -1,6 +1,9 @@
 from flask import Flask, request, jsonify, Blueprint
 from flask_api import status
 from app.models.data.data_stream_controller import DataStreamController
+from app.models.data.item_filter import ItemFilter
+from app.models.data.partition_controller import PartitionController
+from app.models.data.payload_codec import PayloadCodec
 from app.models.exception.multichain_error import MultiChainError
 import json
 from flask_restplus import Namespace, Resource, reqparse, inputs, fields
@@ -13,6 +16,10 @@ STREAM_NAME_FIELD_NAME = "streamName"
 IS_OPEN_FIELD_NAME = "isOpen"
 STREAMS_FIELD_NAME = "streams"
 RESCAN_FIELD_NAME = "rescan"
+ENCODING_FIELD_NAME = "encoding"
+PACKED_ARRAYS_FIELD_NAME = "packedArrays"
+FIELDS_FIELD_NAME = "fields"
+PARTITION_COUNT_FIELD_NAME = "partitionCount"
 
 data_stream_ns = Namespace("data_streams", description="Data Streams API")
 
@@ -29,6 +36,14 @@ create_stream_model = data_stream_ns.model(
             required=True,
             description="If open is true then anyone with global send permissions can publish to the stream, otherwise publishers must be explicitly granted per-stream write permissions",
         ),
+        ENCODING_FIELD_NAME: fields.String(
+            enum=sorted(PayloadCodec.ENCODINGS),
+            default=DataStreamController.DEFAULT_ENCODING_VALUE,
+            description="the format the items of the stream are stored in, msgpack and cbor being more compact than json",
+        ),
+        PACKED_ARRAYS_FIELD_NAME: fields.Raw(
+            description='maps the paths of numeric arrays to the type code they are packed as with msgpack or cbor ex. {"readings.temperature": "f"}',
+        ),
     },
 )
 
@@ -49,6 +64,12 @@ class CreateStream(Resource):
         blockchain_name = data_stream_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
         stream_name = data_stream_ns.payload[STREAM_NAME_FIELD_NAME]
         is_open = data_stream_ns.payload[IS_OPEN_FIELD_NAME]
+        encoding = data_stream_ns.payload.get(
+            ENCODING_FIELD_NAME, DataStreamController.DEFAULT_ENCODING_VALUE
+        )
+        packed_arrays = data_stream_ns.payload.get(
+            PACKED_ARRAYS_FIELD_NAME, DataStreamController.DEFAULT_PACKED_ARRAYS_VALUE
+        )
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
@@ -58,8 +79,68 @@ class CreateStream(Resource):
 
         blockchain_name = blockchain_name.strip()
         stream_name = stream_name.strip()
-        DataStreamController.create_stream(blockchain_name, stream_name, is_open)
-        return {"status": stream_name + " created!"}, status.HTTP_200_OK
+        transaction_id = DataStreamController.create_stream(
+            blockchain_name, stream_name, is_open, encoding, packed_arrays
+        ).decode("utf-8")
+        return (
+            {"status": stream_name + " created!", "transactionID": transaction_id},
+            status.HTTP_200_OK,
+        )
+
+
+create_partitioned_stream_model = data_stream_ns.clone(
+    "Create Partitioned Stream",
+    create_stream_model,
+    {
+        PARTITION_COUNT_FIELD_NAME: fields.Integer(
+            default=PartitionController.DEFAULT_PARTITION_COUNT,
+            description="the number of streams the items are spread over, by the hash of their first key",
+        ),
+    },
+)
+
+
+@data_stream_ns.route("/create_partitioned_stream")
+class CreatePartitionedStream(Resource):
+    @data_stream_ns.expect(create_partitioned_stream_model, validate=True)
+    @data_stream_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def post(self):
+        """
+        Creates a logical stream spread over several partition streams, named after it with the -p0, -p1... suffixes. Publish to it and read it with the partitioned data routes.
+        """
+        blockchain_name = data_stream_ns.payload[BLOCKCHAIN_NAME_FIELD_NAME]
+        stream_name = data_stream_ns.payload[STREAM_NAME_FIELD_NAME]
+        is_open = data_stream_ns.payload[IS_OPEN_FIELD_NAME]
+        partition_count = data_stream_ns.payload.get(
+            PARTITION_COUNT_FIELD_NAME, PartitionController.DEFAULT_PARTITION_COUNT
+        )
+        encoding = data_stream_ns.payload.get(
+            ENCODING_FIELD_NAME, DataStreamController.DEFAULT_ENCODING_VALUE
+        )
+        packed_arrays = data_stream_ns.payload.get(
+            PACKED_ARRAYS_FIELD_NAME, DataStreamController.DEFAULT_PACKED_ARRAYS_VALUE
+        )
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not stream_name or not stream_name.strip():
+            raise ValueError("The stream name can't be empty!")
+
+        json_data = PartitionController.create_partitioned_stream(
+            blockchain_name.strip(),
+            stream_name.strip(),
+            is_open,
+            partition_count,
+            encoding,
+            packed_arrays,
+        )
+        return json_data, status.HTTP_200_OK
 
 
 get_stream_parser = reqparse.RequestParser(bundle_errors=True)
@@ -91,6 +172,7 @@ get_stream_parser.add_argument(
     type=int,
     default=DataStreamController.DEFAULT_STREAM_START_VALUE,
 )
+get_stream_parser.add_argument(FIELDS_FIELD_NAME, location="args", action="append")
 
 
 @data_stream_ns.route("/get_streams")
@@ -101,6 +183,7 @@ get_stream_parser.add_argument(
         VERBOSE_FIELD_NAME: "Set verbose to true for additional information about each item’s transaction",
         COUNT_FIELD_NAME: "retrieve part of the list only ex. only 5 items",
         START_FIELD_NAME: "deals with the ordering of the data retrieved, with negative start values (like the default) indicating the most recent items",
+        FIELDS_FIELD_NAME: "list of dotted paths (ex. name) to return instead of the whole streams, non-verbose streams are retrieved when they have all these paths",
     }
 )
 class GetStream(Resource):
@@ -123,14 +206,22 @@ class GetStream(Resource):
         verbose = args[VERBOSE_FIELD_NAME]
         count = args[COUNT_FIELD_NAME]
         start = args[START_FIELD_NAME]
+        paths = args[FIELDS_FIELD_NAME]
 
         if not blockchain_name or not blockchain_name.strip():
             raise ValueError("The blockchain name can't be empty!")
 
+        if verbose and paths:
+            verbose = ItemFilter.uses_fields(
+                paths, DataStreamController.VERBOSE_ONLY_FIELDS
+            )
+
         blockchain_name = blockchain_name.strip()
         json_data = DataStreamController.get_streams(
             blockchain_name, streams, verbose, count, start
         )
+        if paths:
+            json_data = ItemFilter.project(json_data, paths)
         return json_data, status.HTTP_200_OK
 
 
@@ -0,0 +1,48 @@
+from flask_api import status
+from app.models.admission.admission_controller import AdmissionController
+from app.models.cache.request_coalescer import RequestCoalescer
+from app.models.cache.stream_query_cache import StreamQueryCache
+from app.models.data.journal_controller import JournalController
+from flask_restplus import Namespace, Resource
+
+metrics_ns = Namespace("metrics", description="Metrics API")
+
+
+@metrics_ns.route("/get_coalescing_stats")
+class CoalescingStats(Resource):
+    @metrics_ns.doc(responses={status.HTTP_200_OK: "SUCCESS"})
+    def get(self):
+        """
+        Returns how many read calls were collapsed into an identical in-flight call
+        """
+        return RequestCoalescer.get_stats(), status.HTTP_200_OK
+
+
+@metrics_ns.route("/get_cache_stats")
+class CacheStats(Resource):
+    @metrics_ns.doc(responses={status.HTTP_200_OK: "SUCCESS"})
+    def get(self):
+        """
+        Returns the hit, miss and memory usage counters of the stream query cache
+        """
+        return StreamQueryCache.get_stats(), status.HTTP_200_OK
+
+
+@metrics_ns.route("/get_journal_stats")
+class JournalStats(Resource):
+    @metrics_ns.doc(responses={status.HTTP_200_OK: "SUCCESS"})
+    def get(self):
+        """
+        Returns, per blockchain, the number and age of the journaled items waiting to be published, and the number published and rejected
+        """
+        return JournalController.get_stats(), status.HTTP_200_OK
+
+
+@metrics_ns.route("/get_admission_stats")
+class AdmissionStats(Resource):
+    @metrics_ns.doc(responses={status.HTTP_200_OK: "SUCCESS"})
+    def get(self):
+        """
+        Returns how many requests were admitted, rejected by the rate limits or for lack of capacity, and how many are being processed
+        """
+        return AdmissionController.get_stats(), status.HTTP_200_OK
@@ -0,0 +1,69 @@
+from flask_api import status
+from app.models.transaction.transaction_controller import TransactionController
+from flask_restplus import Namespace, Resource, reqparse
+
+BLOCKCHAIN_NAME_FIELD_NAME = "blockchainName"
+TXID_FIELD_NAME = "txid"
+CONFIRMATIONS_FIELD_NAME = "confirmations"
+TIMEOUT_FIELD_NAME = "timeout"
+
+tx_ns = Namespace("tx", description="Transactions API")
+
+wait_parser = reqparse.RequestParser(bundle_errors=True)
+wait_parser.add_argument(
+    BLOCKCHAIN_NAME_FIELD_NAME, location="args", type=str, required=True
+)
+wait_parser.add_argument(TXID_FIELD_NAME, location="args", type=str, required=True)
+wait_parser.add_argument(
+    CONFIRMATIONS_FIELD_NAME,
+    location="args",
+    type=int,
+    default=TransactionController.DEFAULT_CONFIRMATIONS_VALUE,
+)
+wait_parser.add_argument(
+    TIMEOUT_FIELD_NAME,
+    location="args",
+    type=float,
+    default=TransactionController.DEFAULT_TIMEOUT_VALUE,
+)
+
+
+@tx_ns.route("/wait")
+@tx_ns.doc(
+    params={
+        BLOCKCHAIN_NAME_FIELD_NAME: "blockchain name",
+        TXID_FIELD_NAME: "the txid returned when the transaction was submitted",
+        CONFIRMATIONS_FIELD_NAME: "the number of confirmations to wait for, 1 by default",
+        TIMEOUT_FIELD_NAME: "the maximum number of seconds to wait, 30 by default and at most 60",
+    }
+)
+class WaitForTransaction(Resource):
+    @tx_ns.expect(wait_parser)
+    @tx_ns.doc(
+        responses={
+            status.HTTP_400_BAD_REQUEST: "BAD REQUEST",
+            status.HTTP_200_OK: "SUCCESS",
+        }
+    )
+    def get(self):
+        """
+        Waits until a transaction reaches the number of confirmations or the timeout elapses, then returns its confirmations. The confirmed field tells whether the number of confirmations was reached. Transactions submitted through the API are followed by a single block watcher per chain, so clients don't need to poll.
+        """
+        args = wait_parser.parse_args(strict=True)
+
+        blockchain_name = args[BLOCKCHAIN_NAME_FIELD_NAME]
+        txid = args[TXID_FIELD_NAME]
+
+        if not blockchain_name or not blockchain_name.strip():
+            raise ValueError("The blockchain name can't be empty!")
+
+        if not txid or not txid.strip():
+            raise ValueError("The txid can't be empty!")
+
+        json_data = TransactionController.wait_for_confirmations(
+            blockchain_name.strip(),
+            txid.strip(),
+            args[CONFIRMATIONS_FIELD_NAME],
+            args[TIMEOUT_FIELD_NAME],
+        )
+        return json_data, status.HTTP_200_OK
@@ -0,0 +1,181 @@
+import math
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+
+    def refill(self, now: float):
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    def is_full(self):
+        return self._tokens >= self._burst
+
+    def get_wait_time(self):
+        """
+        Returns the number of seconds until a token is available, 0 if one is
+        """
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self._rate
+
+    def take(self):
+        self._tokens -= 1
+
+
+class AdmissionController:
+    WRITE_CLASS = "write"
+    HEAVY_READ_CLASS = "heavyRead"
+    READ_CLASS = "read"
+    CLIENT_SCOPE = "client"
+    CHAIN_SCOPE = "chain"
+    # (tokens per second, burst) of every budget
+    BUDGETS = {
+        (CLIENT_SCOPE, WRITE_CLASS): (20.0, 40),
+        (CHAIN_SCOPE, WRITE_CLASS): (100.0, 200),
+        (CLIENT_SCOPE, HEAVY_READ_CLASS): (5.0, 10),
+        (CHAIN_SCOPE, HEAVY_READ_CLASS): (20.0, 40),
+    }
+    HEAVY_READ_PATHS = {
+        "/api/data/get_items_by_keys",
+        "/api/data/get_items_by_publishers",
+        "/api/data/get_items_across_streams",
+        "/api/data/get_items_by_any_key",
+        "/api/data/get_items_by_time_range",
+        "/api/data/get_partitioned_stream_items",
+        "/api/data/get_decrypted_items",
+        "/api/data/scan_stream_keys",
+        "/api/data/get_item_counts",
+        "/api/data/get_item_histogram",
+        "/api/data/get_top_keys",
+        "/api/data/get_top_publishers",
+    }
+    HEAVY_READ_ARGS = {"filter"}
+    MAX_CONCURRENT_REQUESTS = 32
+    SLOT_TIMEOUT = 1.0
+    MAX_BUCKET_COUNT = 10000
+
+    _lock = threading.Lock()
+    _buckets = {}
+    _slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+    _stats = {"admitted": 0, "rateLimited": 0, "overloaded": 0, "inFlight": 0}
+
+    @staticmethod
+    def get_request_class(method: str, path: str, arg_names):
+        """
+        Returns the budget class of a request: requests changing the chain are
+        writes, and reads scanning many items are heavy reads
+        """
+        if method not in ("GET", "HEAD", "OPTIONS"):
+            return AdmissionController.WRITE_CLASS
+
+        if path in AdmissionController.HEAVY_READ_PATHS or (
+            AdmissionController.HEAVY_READ_ARGS & set(arg_names)
+        ):
+            return AdmissionController.HEAVY_READ_CLASS
+        return AdmissionController.READ_CLASS
+
+    @staticmethod
+    def admit(client_id: str, blockchain_name: str, request_class: str):
+        """
+        Takes a token from the budgets of the client and of the chain for the class
+        of the request, if both have one. Reads that aren't heavy have no budget.
+        Returns 0 if the request is admitted, otherwise the number of seconds after
+        which it can be retried, nothing being taken from either budget.
+        """
+        scopes = [(AdmissionController.CLIENT_SCOPE, client_id)]
+        if blockchain_name:
+            scopes.append((AdmissionController.CHAIN_SCOPE, blockchain_name))
+
+        now = time.monotonic()
+        with AdmissionController._lock:
+            buckets = []
+            for scope, scope_id in scopes:
+                budget = AdmissionController.BUDGETS.get((scope, request_class))
+                if budget is None:
+                    continue
+
+                key = (scope, request_class, scope_id)
+                bucket = AdmissionController._buckets.get(key)
+                if bucket is None:
+                    AdmissionController.__purge_full_buckets(now)
+                    bucket = TokenBucket(*budget)
+                    AdmissionController._buckets[key] = bucket
+                bucket.refill(now)
+                buckets.append(bucket)
+
+            wait_time = max([bucket.get_wait_time() for bucket in buckets] + [0])
+            if wait_time:
+                AdmissionController._stats["rateLimited"] += 1
+                return wait_time
+
+            for bucket in buckets:
+                bucket.take()
+            AdmissionController._stats["admitted"] += 1
+            return 0
+
+    @staticmethod
+    def acquire_slot():
+        """
+        Takes one of the MAX_CONCURRENT_REQUESTS slots of requests being processed,
+        waiting at most SLOT_TIMEOUT seconds for one. Returns whether a slot was
+        taken, requests being rejected rather than queued when the server is
+        overloaded. The slot is taken before the budgets are checked with admit
+        """
+        if not AdmissionController._slots.acquire(
+            timeout=AdmissionController.SLOT_TIMEOUT
+        ):
+            with AdmissionController._lock:
+                AdmissionController._stats["overloaded"] += 1
+            return False
+
+        with AdmissionController._lock:
+            AdmissionController._stats["inFlight"] += 1
+        return True
+
+    @staticmethod
+    def release_slot():
+        """
+        Releases a slot taken with acquire_slot
+        """
+        with AdmissionController._lock:
+            AdmissionController._stats["inFlight"] -= 1
+        AdmissionController._slots.release()
+
+    @staticmethod
+    def get_retry_after(wait_time: float):
+        """
+        Returns the value of the Retry-After header for a wait time, in whole seconds
+        """
+        return str(max(1, math.ceil(wait_time)))
+
+    @staticmethod
+    def get_stats():
+        """
+        Returns the number of requests admitted, rejected by a budget and rejected
+        for lack of a slot, and the number of requests being processed
+        """
+        with AdmissionController._lock:
+            return dict(AdmissionController._stats)
+
+    @staticmethod
+    def __purge_full_buckets(now: float):
+        """
+        Forgets the buckets that refilled, which are equivalent to new ones, once
+        there are MAX_BUCKET_COUNT of them. Must be called with the lock held
+        """
+        if len(AdmissionController._buckets) < AdmissionController.MAX_BUCKET_COUNT:
+            return
+
+        for key, bucket in list(AdmissionController._buckets.items()):
+            bucket.refill(now)
+            if bucket.is_full():
+                del AdmissionController._buckets[key]
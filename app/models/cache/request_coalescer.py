@@ -0,0 +1,102 @@
+import functools
+import json
+import threading
+
+
+class InFlightCall:
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._error = None
+
+    def set_result(self, result):
+        self._result = result
+        self._event.set()
+
+    def set_error(self, error):
+        self._error = error
+        self._event.set()
+
+    def get_result(self):
+        self._event.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class RequestCoalescer:
+    _lock = threading.Lock()
+    _in_flight_calls = {}
+    _total_calls = 0
+    _executed_calls = 0
+    _coalesced_calls = 0
+
+    @staticmethod
+    def coalesce(function):
+        """
+        Decorates a read-only controller method so that concurrent calls with identical
+        arguments share a single call to the daemon. The first caller executes the method,
+        every caller that arrives while it is still running waits for, and receives, the same
+        result (or exception). Results are shared between callers and must not be mutated.
+        """
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            call_key = RequestCoalescer.__get_call_key(function, args, kwargs)
+
+            with RequestCoalescer._lock:
+                RequestCoalescer._total_calls += 1
+                in_flight_call = RequestCoalescer._in_flight_calls.get(call_key)
+                is_leader = in_flight_call is None
+                if is_leader:
+                    in_flight_call = InFlightCall()
+                    RequestCoalescer._in_flight_calls[call_key] = in_flight_call
+                    RequestCoalescer._executed_calls += 1
+                else:
+                    RequestCoalescer._coalesced_calls += 1
+
+            if not is_leader:
+                return in_flight_call.get_result()
+
+            try:
+                result = function(*args, **kwargs)
+            except Exception as err:
+                RequestCoalescer.__finish_call(call_key)
+                in_flight_call.set_error(err)
+                raise err
+
+            RequestCoalescer.__finish_call(call_key)
+            in_flight_call.set_result(result)
+            return result
+
+        return wrapper
+
+    @staticmethod
+    def get_stats():
+        """
+        Returns the number of calls received, the number of calls that reached the daemon
+        and the number of calls that were collapsed into an identical in-flight call
+        """
+        with RequestCoalescer._lock:
+            return {
+                "totalCalls": RequestCoalescer._total_calls,
+                "executedCalls": RequestCoalescer._executed_calls,
+                "coalescedCalls": RequestCoalescer._coalesced_calls,
+                "inFlightCalls": len(RequestCoalescer._in_flight_calls),
+            }
+
+    @staticmethod
+    def __finish_call(call_key):
+        """
+        Removes the call from the in-flight calls so that later calls reach the daemon again
+        """
+        with RequestCoalescer._lock:
+            RequestCoalescer._in_flight_calls.pop(call_key, None)
+
+    @staticmethod
+    def __get_call_key(function, args, kwargs):
+        """
+        Returns a hashable key that identifies the method and its normalized arguments
+        """
+        normalized_arguments = json.dumps([args, kwargs], sort_keys=True, default=str)
+        return function.__module__ + "." + function.__qualname__ + normalized_arguments
@@ -0,0 +1,258 @@
+from collections import OrderedDict
+import json
+import threading
+import time
+
+from app.models.monitor.block_controller import BlockController
+from app.models.exception.multichain_error import MultiChainError
+
+
+class CacheEntry:
+    def __init__(self, result, response_size, tip, expires_at):
+        self._result = result
+        self._response_size = response_size
+        self._tip = tip
+        self._expires_at = expires_at
+
+    def get_result(self):
+        return self._result
+
+    def get_response_size(self):
+        return self._response_size
+
+    def get_tip(self):
+        return self._tip
+
+    def get_expires_at(self):
+        return self._expires_at
+
+
+class StreamQueryCache:
+    # The budget counts the bytes of the daemon's JSON responses, the decoded results
+    # held in memory are larger by a roughly constant factor
+    #
+    MAX_RESPONSE_BYTES = 64 * 1024 * 1024
+    MEMPOOL_ENTRY_TTL = 2.0
+    TIP_REFRESH_INTERVAL = 1.0
+
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+    _cached_response_bytes = 0
+    _chain_generations = {}
+    _stream_generations = {}
+    _chain_tips = {}
+    _hits = 0
+    _misses = 0
+    _evictions = 0
+
+    @staticmethod
+    def get(blockchain_name: str, method: str, stream: str, query_args: list):
+        """
+        Returns the cached result of a stream query, or None if there is no valid entry.
+        Entries holding confirmed data only are valid until the chain tip changes, entries
+        that include unconfirmed (mempool) data expire after MEMPOOL_ENTRY_TTL seconds.
+        The returned result is shared and must not be mutated.
+        """
+        tip = StreamQueryCache.__get_chain_tip(blockchain_name)
+        cache_key = StreamQueryCache.__get_cache_key(
+            blockchain_name, method, stream, query_args
+        )
+
+        with StreamQueryCache._lock:
+            entry = StreamQueryCache._entries.get(cache_key)
+            if entry is None:
+                StreamQueryCache._misses += 1
+                return None
+
+            is_expired = entry.get_expires_at() is not None and (
+                entry.get_expires_at() < time.monotonic()
+            )
+            if tip is None or entry.get_tip() != tip or is_expired:
+                StreamQueryCache.__remove_entry(cache_key)
+                StreamQueryCache._misses += 1
+                return None
+
+            StreamQueryCache._entries.move_to_end(cache_key)
+            StreamQueryCache._hits += 1
+            return entry.get_result()
+
+    @staticmethod
+    def get_generation(blockchain_name: str, stream: str):
+        """
+        Returns a snapshot of the chain's and the stream's invalidation counters and of the
+        chain tip. It must be taken before querying the daemon and passed to put, so that
+        results of queries that raced with a publish, a permission change or a new block are
+        never cached as current
+        """
+        with StreamQueryCache._lock:
+            return (
+                StreamQueryCache._chain_generations.get(blockchain_name, 0),
+                StreamQueryCache._stream_generations.get((blockchain_name, stream), 0),
+                StreamQueryCache.__get_known_tip(blockchain_name),
+            )
+
+    @staticmethod
+    def put(
+        blockchain_name: str,
+        method: str,
+        stream: str,
+        query_args: list,
+        result,
+        response_size: int,
+        generation: tuple,
+    ):
+        """
+        Caches the result of a stream query. response_size is the number of bytes of the
+        daemon's response and is used to keep the cached responses under
+        MAX_RESPONSE_BYTES, evicting the least recently used entries first
+        """
+        chain_generation, stream_generation, tip = generation
+        if tip is None or response_size > StreamQueryCache.MAX_RESPONSE_BYTES:
+            return
+
+        expires_at = None
+        if StreamQueryCache.__touches_mempool(result):
+            expires_at = time.monotonic() + StreamQueryCache.MEMPOOL_ENTRY_TTL
+
+        cache_key = StreamQueryCache.__get_cache_key(
+            blockchain_name, method, stream, query_args
+        )
+
+        with StreamQueryCache._lock:
+            current_generation = (
+                StreamQueryCache._chain_generations.get(blockchain_name, 0),
+                StreamQueryCache._stream_generations.get((blockchain_name, stream), 0),
+            )
+            if current_generation != (chain_generation, stream_generation):
+                return
+
+            StreamQueryCache.__remove_entry(cache_key)
+            StreamQueryCache._entries[cache_key] = CacheEntry(
+                result, response_size, tip, expires_at
+            )
+            StreamQueryCache._cached_response_bytes += response_size
+
+            while (
+                StreamQueryCache._cached_response_bytes
+                > StreamQueryCache.MAX_RESPONSE_BYTES
+            ):
+                oldest_key = next(iter(StreamQueryCache._entries))
+                StreamQueryCache.__remove_entry(oldest_key)
+                StreamQueryCache._evictions += 1
+
+    @staticmethod
+    def invalidate_stream(blockchain_name: str, stream: str):
+        """
+        Removes every cached query of the stream, e.g. after an item was published to it
+        """
+        with StreamQueryCache._lock:
+            stream_key = (blockchain_name, stream)
+            StreamQueryCache._stream_generations[stream_key] = (
+                StreamQueryCache._stream_generations.get(stream_key, 0) + 1
+            )
+            for cache_key in list(StreamQueryCache._entries):
+                if cache_key[0] == blockchain_name and cache_key[2] == stream:
+                    StreamQueryCache.__remove_entry(cache_key)
+
+    @staticmethod
+    def invalidate_chain(blockchain_name: str):
+        """
+        Removes every cached query of the blockchain, e.g. after a global permission change.
+        The chain's invalidation counter is bumped so that queries in flight on any stream,
+        cached or not, aren't stored
+        """
+        with StreamQueryCache._lock:
+            StreamQueryCache._chain_generations[blockchain_name] = (
+                StreamQueryCache._chain_generations.get(blockchain_name, 0) + 1
+            )
+            for cache_key in list(StreamQueryCache._entries):
+                if cache_key[0] == blockchain_name:
+                    StreamQueryCache.__remove_entry(cache_key)
+            StreamQueryCache._chain_tips.pop(blockchain_name, None)
+
+    @staticmethod
+    def get_stats():
+        """
+        Returns the hit, miss and eviction counters as well as the size of the daemon
+        responses held by the cache
+        """
+        with StreamQueryCache._lock:
+            return {
+                "entries": len(StreamQueryCache._entries),
+                "cachedResponseBytes": StreamQueryCache._cached_response_bytes,
+                "maxResponseBytes": StreamQueryCache.MAX_RESPONSE_BYTES,
+                "hits": StreamQueryCache._hits,
+                "misses": StreamQueryCache._misses,
+                "evictions": StreamQueryCache._evictions,
+            }
+
+    @staticmethod
+    def __get_chain_tip(blockchain_name: str):
+        """
+        Returns the best block hash of the chain. The daemon is asked at most once every
+        TIP_REFRESH_INTERVAL seconds, None is returned if the tip can't be determined
+        """
+        with StreamQueryCache._lock:
+            chain_tip = StreamQueryCache._chain_tips.get(blockchain_name)
+            if chain_tip is not None and (
+                time.monotonic() - chain_tip[1] < StreamQueryCache.TIP_REFRESH_INTERVAL
+            ):
+                return chain_tip[0]
+
+        try:
+            tip = BlockController.get_best_block_hash(blockchain_name)
+        except (MultiChainError, ValueError, OSError):
+            return None
+
+        with StreamQueryCache._lock:
+            StreamQueryCache._chain_tips[blockchain_name] = (tip, time.monotonic())
+        return tip
+
+    @staticmethod
+    def __get_known_tip(blockchain_name: str):
+        """
+        Returns the last chain tip retrieved, without asking the daemon. The lock must
+        be held by the caller
+        """
+        chain_tip = StreamQueryCache._chain_tips.get(blockchain_name)
+        return chain_tip[0] if chain_tip is not None else None
+
+    @staticmethod
+    def __remove_entry(cache_key):
+        """
+        Removes an entry and releases its memory. The lock must be held by the caller
+        """
+        entry = StreamQueryCache._entries.pop(cache_key, None)
+        if entry is not None:
+            StreamQueryCache._cached_response_bytes -= entry.get_response_size()
+
+    @staticmethod
+    def __get_cache_key(blockchain_name: str, method: str, stream: str, query_args):
+        """
+        Returns the key of a query made of the chain, the stream, the method and the
+        normalized query arguments
+        """
+        return (
+            blockchain_name,
+            method,
+            stream,
+            json.dumps(query_args, sort_keys=True, default=str),
+        )
+
+    @staticmethod
+    def __touches_mempool(result):
+        """
+        Returns true if the result contains items or counters that are not confirmed yet
+        """
+        entries = result if isinstance(result, list) else [result]
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            if entry.get("confirmations") == 0:
+                return True
+            if "txid" in entry and entry.get("blocktime") is None:
+                return True
+            if "items" in entry and "confirmed" in entry:
+                if entry["items"] != entry["confirmed"]:
+                    return True
+        return False
@@ -0,0 +1,373 @@
+from collections import Counter
+import threading
+import time
+
+from app.models.rpc.rpc_controller import RpcController
+from app.models.storage.storage_controller import StorageController
+
+
+class StreamAggregate:
+    def __init__(self, stored_aggregate: dict):
+        self._lock = threading.Lock()
+        self._refreshed_at = None
+        self.reset(stored_aggregate)
+        self._saved_item_count = self._item_count
+        self._saved_at = time.monotonic()
+
+    def reset(self, stored_aggregate: dict):
+        self._item_count = stored_aggregate.get("itemCount", 0)
+        self._last_txid = stored_aggregate.get("lastTxid")
+        self._key_counts = Counter(stored_aggregate.get("keyCounts", {}))
+        self._publisher_counts = Counter(stored_aggregate.get("publisherCounts", {}))
+        self._buckets = StreamAggregate.__load_buckets(
+            stored_aggregate.get("buckets", {})
+        )
+        self._publisher_buckets = {
+            publisher: StreamAggregate.__load_buckets(buckets)
+            for publisher, buckets in stored_aggregate.get(
+                "publisherBuckets", {}
+            ).items()
+        }
+
+    def get_lock(self):
+        return self._lock
+
+    def get_item_count(self):
+        return self._item_count
+
+    def get_last_txid(self):
+        return self._last_txid
+
+    def get_key_counts(self):
+        return self._key_counts
+
+    def get_publisher_counts(self):
+        return self._publisher_counts
+
+    def get_buckets(self, publisher: str = None):
+        if publisher is None:
+            return self._buckets
+        return self._publisher_buckets.get(publisher, Counter())
+
+    def get_refreshed_at(self):
+        return self._refreshed_at
+
+    def set_refreshed_at(self, refreshed_at):
+        self._refreshed_at = refreshed_at
+
+    def get_saved_item_count(self):
+        return self._saved_item_count
+
+    def get_saved_at(self):
+        return self._saved_at
+
+    def set_saved(self, saved_at):
+        self._saved_item_count = self._item_count
+        self._saved_at = saved_at
+
+    def add_item(self, item: dict, bucket: int):
+        self._item_count += 1
+        self._last_txid = item.get("txid")
+        self._buckets[bucket] += 1
+        for key in item.get("keys", []):
+            self._key_counts[key] += 1
+        for publisher in item.get("publishers", []):
+            self._publisher_counts[publisher] += 1
+            self._publisher_buckets.setdefault(publisher, Counter())[bucket] += 1
+
+    @staticmethod
+    def __load_buckets(stored_buckets: dict):
+        # JSON object keys are strings, bucket start times are ints
+        return Counter({int(bucket): count for bucket, count in stored_buckets.items()})
+
+    def to_json(self):
+        return {
+            "itemCount": self._item_count,
+            "lastTxid": self._last_txid,
+            "keyCounts": self._key_counts,
+            "publisherCounts": self._publisher_counts,
+            "buckets": self._buckets,
+            "publisherBuckets": self._publisher_buckets,
+        }
+
+
+class AggregateController:
+    AGGREGATE_DIRECTORY = "aggregates"
+    AGGREGATE_EXTENSION = ".json"
+    REFRESH_INTERVAL = 1.0
+    SAVE_INTERVAL = 60.0
+    SAVE_ITEM_COUNT = 100000
+    PAGE_SIZE = 1000
+    BUCKET_SECONDS = 3600
+    MAX_BUCKET_COUNT = 10000
+    DEFAULT_INTERVAL_VALUE = BUCKET_SECONDS
+    DEFAULT_START_TIME_VALUE = 0
+    DEFAULT_END_TIME_VALUE = None
+    DEFAULT_TOP_LIMIT_VALUE = 10
+    MAX_TOP_LIMIT = 1000
+    GET_STREAMS_ARG = "liststreams"
+    GET_STREAM_ITEMS_ARG = "liststreamitems"
+
+    _lock = threading.Lock()
+    _aggregates = {}
+
+    @staticmethod
+    def get_item_counts(
+        blockchain_name: str, stream: str, keys: list = None, publishers: list = None
+    ):
+        """
+        Returns the number of confirmed items of stream, of distinct keys and of
+        distinct publishers, along with the number of items of every key in keys and
+        of every publisher in publishers
+        """
+        try:
+            aggregate = AggregateController.__get_aggregate(blockchain_name, stream)
+            with aggregate.get_lock():
+                return {
+                    "items": aggregate.get_item_count(),
+                    "keyCount": len(aggregate.get_key_counts()),
+                    "publisherCount": len(aggregate.get_publisher_counts()),
+                    "keys": {
+                        key: aggregate.get_key_counts()[key] for key in keys or []
+                    },
+                    "publishers": {
+                        publisher: aggregate.get_publisher_counts()[publisher]
+                        for publisher in publishers or []
+                    },
+                }
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_item_histogram(
+        blockchain_name: str,
+        stream: str,
+        interval: int = DEFAULT_INTERVAL_VALUE,
+        start_time: int = DEFAULT_START_TIME_VALUE,
+        end_time: int = DEFAULT_END_TIME_VALUE,
+        publisher: str = None,
+    ):
+        """
+        Returns the number of confirmed items of stream, or of one of its publishers,
+        per interval of blocktime, oldest first. Only the intervals that have items
+        and overlap start_time to end_time (inclusive) are returned. interval must be
+        a multiple of BUCKET_SECONDS, the granularity the counts are kept at.
+        """
+        try:
+            if interval <= 0 or interval % AggregateController.BUCKET_SECONDS:
+                raise ValueError(
+                    "The interval must be a multiple of "
+                    + str(AggregateController.BUCKET_SECONDS)
+                    + " seconds"
+                )
+
+            if end_time is not None and start_time > end_time:
+                raise ValueError("The start time can't be after the end time")
+
+            aggregate = AggregateController.__get_aggregate(blockchain_name, stream)
+            histogram = Counter()
+            with aggregate.get_lock():
+                for bucket, count in aggregate.get_buckets(publisher).items():
+                    if bucket + AggregateController.BUCKET_SECONDS <= start_time or (
+                        end_time is not None and bucket > end_time
+                    ):
+                        continue
+                    histogram[bucket - bucket % interval] += count
+
+            if len(histogram) > AggregateController.MAX_BUCKET_COUNT:
+                raise ValueError(
+                    "The histogram has more than "
+                    + str(AggregateController.MAX_BUCKET_COUNT)
+                    + " intervals, use a longer interval or a shorter time range"
+                )
+
+            return [
+                {"time": bucket, "items": histogram[bucket]}
+                for bucket in sorted(histogram)
+            ]
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_top_keys(
+        blockchain_name: str, stream: str, limit: int = DEFAULT_TOP_LIMIT_VALUE
+    ):
+        """
+        Returns the limit keys of stream that have the most confirmed items, with
+        their number of items
+        """
+        try:
+            AggregateController.__check_top_limit(limit)
+            aggregate = AggregateController.__get_aggregate(blockchain_name, stream)
+            with aggregate.get_lock():
+                top_keys = aggregate.get_key_counts().most_common(limit)
+            return [{"key": key, "items": count} for key, count in top_keys]
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_top_publishers(
+        blockchain_name: str, stream: str, limit: int = DEFAULT_TOP_LIMIT_VALUE
+    ):
+        """
+        Returns the limit publishers of stream that published the most confirmed
+        items, with their number of items
+        """
+        try:
+            AggregateController.__check_top_limit(limit)
+            aggregate = AggregateController.__get_aggregate(blockchain_name, stream)
+            with aggregate.get_lock():
+                top_publishers = aggregate.get_publisher_counts().most_common(limit)
+            return [
+                {"publisher": publisher, "items": count}
+                for publisher, count in top_publishers
+            ]
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def __check_top_limit(limit: int):
+        """
+        Checks the number of entries requested from a top list
+        """
+        if limit <= 0 or limit > AggregateController.MAX_TOP_LIMIT:
+            raise ValueError(
+                "The limit must be between 1 and "
+                + str(AggregateController.MAX_TOP_LIMIT)
+            )
+
+    @staticmethod
+    def __get_aggregate(blockchain_name: str, stream: str):
+        """
+        Returns the aggregate of the stream, refreshed if it wasn't refreshed during
+        the last REFRESH_INTERVAL seconds
+        """
+        blockchain_name = blockchain_name.strip()
+        stream = stream.strip()
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        if not stream:
+            raise ValueError("Stream name can't be empty")
+
+        with AggregateController._lock:
+            aggregate = AggregateController._aggregates.get((blockchain_name, stream))
+            if aggregate is None:
+                aggregate = StreamAggregate(
+                    StorageController.read_json(
+                        AggregateController.__get_aggregate_path(
+                            blockchain_name, stream
+                        ),
+                        {},
+                    )
+                )
+                AggregateController._aggregates[(blockchain_name, stream)] = aggregate
+
+        with aggregate.get_lock():
+            refreshed_at = aggregate.get_refreshed_at()
+            if (
+                refreshed_at is None
+                or time.monotonic() - refreshed_at
+                >= AggregateController.REFRESH_INTERVAL
+            ):
+                AggregateController.__refresh_aggregate(
+                    blockchain_name, stream, aggregate
+                )
+                aggregate.set_refreshed_at(time.monotonic())
+        return aggregate
+
+    @staticmethod
+    def __refresh_aggregate(
+        blockchain_name: str, stream: str, aggregate: StreamAggregate
+    ):
+        """
+        Adds the items confirmed since the aggregate was last refreshed. Items are
+        listed in chain order with the unconfirmed ones last, so only the confirmed
+        items past the number already counted are retrieved. The aggregate is rebuilt
+        if the last item counted isn't at the same position anymore, after a chain
+        reorganization or a resubscription for instance. The aggregate is saved
+        once refreshed, see __save_aggregate.
+        """
+        streams = RpcController.call(
+            blockchain_name, AggregateController.GET_STREAMS_ARG, [stream]
+        )
+        item_count = streams[0]["items"] if streams else 0
+
+        start = aggregate.get_item_count()
+        if start:
+            last_items = RpcController.call(
+                blockchain_name,
+                AggregateController.GET_STREAM_ITEMS_ARG,
+                [stream, False, 1, start - 1],
+            )
+            last_txid = last_items[0].get("txid") if last_items else None
+            if last_txid != aggregate.get_last_txid():
+                aggregate.reset({})
+                start = 0
+
+        while start < item_count:
+            items = RpcController.call(
+                blockchain_name,
+                AggregateController.GET_STREAM_ITEMS_ARG,
+                [stream, False, AggregateController.PAGE_SIZE, start],
+            )
+            confirmed_items = []
+            for item in items:
+                if item.get("blocktime") is None:
+                    break
+                confirmed_items.append(item)
+
+            for item in confirmed_items:
+                blocktime = item["blocktime"]
+                aggregate.add_item(
+                    item, blocktime - blocktime % AggregateController.BUCKET_SECONDS
+                )
+
+            if len(confirmed_items) < AggregateController.PAGE_SIZE:
+                break
+            start += len(confirmed_items)
+
+        AggregateController.__save_aggregate(blockchain_name, stream, aggregate)
+
+    @staticmethod
+    def __save_aggregate(blockchain_name: str, stream: str, aggregate: StreamAggregate):
+        """
+        Writes the aggregate to its file if SAVE_ITEM_COUNT items were added since it
+        was last saved, or if any item was and it was saved more than SAVE_INTERVAL
+        seconds ago. Rewriting the whole aggregate on every refresh would cost I/O
+        growing with the stream at every block. The items added since the aggregate
+        was saved are counted again after a restart.
+        """
+        added_count = aggregate.get_item_count() - aggregate.get_saved_item_count()
+        if added_count == 0 or (
+            0 < added_count < AggregateController.SAVE_ITEM_COUNT
+            and time.monotonic() - aggregate.get_saved_at()
+            < AggregateController.SAVE_INTERVAL
+        ):
+            return
+
+        StorageController.write_json(
+            AggregateController.__get_aggregate_path(blockchain_name, stream),
+            aggregate.to_json(),
+        )
+        aggregate.set_saved(time.monotonic())
+
+    @staticmethod
+    def __get_aggregate_path(blockchain_name: str, stream: str):
+        """
+        Returns the path of the file the aggregate of the stream is stored in
+        """
+        return StorageController.get_path(
+            AggregateController.AGGREGATE_DIRECTORY,
+            blockchain_name,
+            stream + AggregateController.AGGREGATE_EXTENSION,
+        )
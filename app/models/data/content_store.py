@@ -0,0 +1,195 @@
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+
+from app.models.exception.multichain_error import MultiChainError
+from app.models.rpc.rpc_controller import RpcController
+
+
+class ContentStore:
+    CONTENT_STREAM_NAME = "content-store"
+    HASH_KEY_PREFIX = "sha256:"
+    DIGEST_SIZE = hashlib.sha256().digest_size
+    MAX_KNOWN_DIGESTS = 65536
+    MAX_CACHED_CONTENT_BYTES = 64 * 1024 * 1024
+    STORE_LOCK_COUNT = 64
+    PUBLISH_ITEM_ARG = "publish"
+    GET_STREAM_KEY_ITEMS_ARG = "liststreamkeyitems"
+    GET_TX_OUT_DATA_ARG = "gettxoutdata"
+
+    _lock = threading.Lock()
+    _store_locks = [threading.Lock() for _ in range(STORE_LOCK_COUNT)]
+    _known_digests = OrderedDict()
+    _contents = OrderedDict()
+    _contents_size = 0
+
+    @staticmethod
+    def store(blockchain_name: str, data):
+        """
+        Stores the data of an item ({"json": value} or a hex string) in the content
+        stream under the hash of its content, unless it is already there, and returns
+        that hash. The content stream is checked for the hash before publishing, with
+        concurrent stores of the same content serialized, so retries of an item, such
+        as journal replays, don't publish its content again. Two servers storing the
+        same content at the same time may both publish it, which is harmless since
+        reads only use the first copy.
+        The content is published before the item referencing it, so it is left
+        unreferenced if publishing the item fails. It is then reused by the next item
+        with the same content.
+        """
+        digest = ContentStore.get_digest(data)
+        with ContentStore.__get_store_lock(digest):
+            with ContentStore._lock:
+                if (blockchain_name, digest) in ContentStore._known_digests:
+                    ContentStore._known_digests.move_to_end((blockchain_name, digest))
+                    return digest
+
+            key = ContentStore.HASH_KEY_PREFIX + digest
+            items = RpcController.call(
+                blockchain_name,
+                ContentStore.GET_STREAM_KEY_ITEMS_ARG,
+                [ContentStore.CONTENT_STREAM_NAME, key, False, 1, 0],
+            )
+            if not items:
+                RpcController.call(
+                    blockchain_name,
+                    ContentStore.PUBLISH_ITEM_ARG,
+                    [ContentStore.CONTENT_STREAM_NAME, key, data],
+                )
+
+            ContentStore.__add_known_digest(blockchain_name, digest)
+        return digest
+
+    @staticmethod
+    def resolve(blockchain_name: str, digest: str):
+        """
+        Returns the data stored under the hash in the content stream
+        """
+        contents = ContentStore.resolve_many(blockchain_name, [digest])
+        if digest not in contents:
+            raise ValueError("The content " + digest + " was not found")
+        return contents[digest]
+
+    @staticmethod
+    def resolve_many(blockchain_name: str, digests: list):
+        """
+        Returns a dict with the data stored under each of the hashes found in the
+        content stream. The contents that aren't cached are retrieved with a single
+        batch call, and checked against their hash before being cached.
+        """
+        contents = {}
+        with ContentStore._lock:
+            for digest in digests:
+                content = ContentStore._contents.get((blockchain_name, digest))
+                if content is not None:
+                    ContentStore._contents.move_to_end((blockchain_name, digest))
+                    contents[digest] = content[0]
+
+        missing_digests = list(
+            dict.fromkeys(digest for digest in digests if digest not in contents)
+        )
+        if not missing_digests:
+            return contents
+
+        results = RpcController.call_batch(
+            blockchain_name,
+            [
+                (
+                    ContentStore.GET_STREAM_KEY_ITEMS_ARG,
+                    [
+                        ContentStore.CONTENT_STREAM_NAME,
+                        ContentStore.HASH_KEY_PREFIX + digest,
+                        False,
+                        1,
+                        0,
+                    ],
+                )
+                for digest in missing_digests
+            ],
+        )
+        found_data = {
+            digest: result[0].get("data")
+            for digest, result in zip(missing_digests, results)
+            if not isinstance(result, MultiChainError) and result
+        }
+
+        # Contents larger than maxshowndata only hold the txid and vout of their data
+        #
+        stubs = [
+            (digest, data)
+            for digest, data in found_data.items()
+            if isinstance(data, dict) and "txid" in data
+        ]
+        stub_results = RpcController.call_batch(
+            blockchain_name,
+            [
+                (ContentStore.GET_TX_OUT_DATA_ARG, [data["txid"], data["vout"]])
+                for _, data in stubs
+            ],
+        )
+        for (digest, _), result in zip(stubs, stub_results):
+            if isinstance(result, MultiChainError):
+                del found_data[digest]
+            else:
+                found_data[digest] = result
+
+        for digest, data in found_data.items():
+            if ContentStore.get_digest(data) != digest:
+                continue
+            ContentStore.__add_content(blockchain_name, digest, data)
+            contents[digest] = data
+        return contents
+
+    @staticmethod
+    def get_digest(data):
+        """
+        Returns the SHA-256 hash of the content of an item's data. JSON values are
+        hashed in their canonical form, hex strings as the bytes they encode
+        """
+        if isinstance(data, str):
+            content = bytes.fromhex(data)
+        else:
+            content = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def __get_store_lock(digest: str):
+        """
+        Returns the lock serializing the stores of the content of hash digest
+        """
+        return ContentStore._store_locks[
+            int(digest, 16) % ContentStore.STORE_LOCK_COUNT
+        ]
+
+    @staticmethod
+    def __add_known_digest(blockchain_name: str, digest: str):
+        """
+        Records that the content is stored, evicting the least recently used hashes
+        """
+        with ContentStore._lock:
+            ContentStore._known_digests[(blockchain_name, digest)] = True
+            ContentStore._known_digests.move_to_end((blockchain_name, digest))
+            while len(ContentStore._known_digests) > ContentStore.MAX_KNOWN_DIGESTS:
+                ContentStore._known_digests.popitem(last=False)
+
+    @staticmethod
+    def __add_content(blockchain_name: str, digest: str, data):
+        """
+        Caches resolved content, evicting the least recently used contents once the
+        cache holds more than MAX_CACHED_CONTENT_BYTES
+        """
+        size = len(data) if isinstance(data, str) else len(json.dumps(data))
+        if size > ContentStore.MAX_CACHED_CONTENT_BYTES:
+            return
+
+        with ContentStore._lock:
+            previous_content = ContentStore._contents.pop((blockchain_name, digest), None)
+            if previous_content is not None:
+                ContentStore._contents_size -= previous_content[1]
+
+            ContentStore._contents[(blockchain_name, digest)] = (data, size)
+            ContentStore._contents_size += size
+            while ContentStore._contents_size > ContentStore.MAX_CACHED_CONTENT_BYTES:
+                _, (_, evicted_size) = ContentStore._contents.popitem(last=False)
+                ContentStore._contents_size -= evicted_size
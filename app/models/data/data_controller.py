@@ -1,6 +1,12 @@
 from subprocess import run, CalledProcessError
 import json
 from app.models.exception.multichain_error import MultiChainError
+from app.models.cache.request_coalescer import RequestCoalescer
+from app.models.cache.stream_query_cache import StreamQueryCache
+from app.models.rpc.rpc_controller import RpcController
+from app.models.data.payload_codec import PayloadCodec
+from app.models.data.content_store import ContentStore
+from app.models.transaction.transaction_controller import TransactionController
 
 
 class DataController:
@@ -19,6 +25,25 @@ class DataController:
     DEFAULT_LOCAL_ORDERING_VALUE = False
     DEFAULT_PUBLISHERS_LIST_CONTENT = None
     DEFAULT_KEYS_LIST_CONTENT = None
+    DEFAULT_OFFCHAIN_VALUE = False
+    OFFCHAIN_OPTION = "offchain"
+    GET_TX_OUT_DATA_ARG = "gettxoutdata"
+    RAW_DATA_FORMAT = "raw"
+    ITEM_DATA_CHUNK_SIZE = 1024 * 1024
+    MAX_INLINE_DATA_SIZE = 64 * 1024
+    DEFAULT_CODEC_VALUE = None
+    DEFAULT_DEDUP_VALUE = False
+    DEFAULT_DICTIONARY_SAMPLE_COUNT = 1000
+    DEFAULT_DICTIONARY_SIZE = 16 * 1024
+    VERBOSE_ONLY_ITEM_FIELDS = (
+        "blockhash",
+        "blockindex",
+        "vout",
+        "valid",
+        "time",
+        "timereceived",
+    )
+    VERBOSE_ONLY_ENTRY_FIELDS = ("first", "last")
 
     @staticmethod
     def __is_json(data):
@@ -33,48 +58,158 @@ class DataController:
         return True
 
     @staticmethod
-    def publish_item(blockchain_name: str, stream: str, keys: list, data: str):
+    def __run_cached_query(blockchain_name: str, stream: str, args: list):
         """
-        Publishes an item in stream, passed as a stream name, an array of keys 
-        and data in JSON format.
+        Runs a read-only stream query through the stream query cache. The daemon
+        is only called if there is no valid cached result for the same arguments
         """
-        try:
-            blockchain_name = blockchain_name.strip()
-            original_number_of_keys = len(keys)
-            stream = stream.strip()
-            keys = [key.strip() for key in keys if key.strip()]
-            new_number_of_keys = len(keys)
+        method = args[2]
+        query_args = args[3:]
+        items = StreamQueryCache.get(blockchain_name, method, stream, query_args)
+        if items is not None:
+            return items
+
+        generation = StreamQueryCache.get_generation(blockchain_name, stream)
+        output = run(args, check=True, capture_output=True)
+        items = PayloadCodec.decode_items(blockchain_name, json.loads(output.stdout))
+        StreamQueryCache.put(
+            blockchain_name,
+            method,
+            stream,
+            query_args,
+            items,
+            len(output.stdout),
+            generation,
+        )
+        return items
 
-            # If any of the provided keys is invalid then an exception is thrown. This is done to prevent MultiChain from
-            # overwritting records that belong to existing key(s) that match the valid keys.
-            # Example: stream contains KEY1. Provided keys: ['KEY1', '        ']. The second key is invalid, so after cleaning
-            # Provided keys: ['KEY1']. This key already exists so the data will be overwritten.
-            #
-            if new_number_of_keys != original_number_of_keys:
-                raise ValueError(
-                    "Only "
-                    + str(new_number_of_keys)
-                    + "/"
-                    + str(original_number_of_keys)
-                    + " keys are valid. Please check the keys provided"
-                )
+    @staticmethod
+    def __validate_item_arguments(blockchain_name: str, stream: str, keys: list):
+        """
+        Returns the cleaned blockchain name, stream name and keys of an item to be
+        published, or raises a ValueError if any of them is invalid
+        """
+        blockchain_name = blockchain_name.strip()
+        original_number_of_keys = len(keys)
+        stream = stream.strip()
+        keys = [key.strip() for key in keys if key.strip()]
+        new_number_of_keys = len(keys)
+
+        # If any of the provided keys is invalid then an exception is thrown. This is done to prevent MultiChain from
+        # overwritting records that belong to existing key(s) that match the valid keys.
+        # Example: stream contains KEY1. Provided keys: ['KEY1', '        ']. The second key is invalid, so after cleaning
+        # Provided keys: ['KEY1']. This key already exists so the data will be overwritten.
+        #
+        if new_number_of_keys != original_number_of_keys:
+            raise ValueError(
+                "Only "
+                + str(new_number_of_keys)
+                + "/"
+                + str(original_number_of_keys)
+                + " keys are valid. Please check the keys provided"
+            )
+
+        if not stream:
+            raise ValueError("Stream name can't be empty")
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        if not keys:
+            raise ValueError("key(s) can't be empty")
+
+        return blockchain_name, stream, keys
 
-            if not stream:
-                raise ValueError("Stream name can't be empty")
+    @staticmethod
+    def validate_item(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        data: str,
+        codec: str = DEFAULT_CODEC_VALUE,
+    ):
+        """
+        Validates an item to be published without calling the daemon. Returns its
+        cleaned blockchain name, stream name and keys, along with its data as
+        {"json": value}
+        """
+        blockchain_name, stream, keys = DataController.__validate_item_arguments(
+            blockchain_name, stream, keys
+        )
+        PayloadCodec.check_codec(codec)
 
-            if not blockchain_name:
-                raise ValueError("Blockchain name can't be empty")
+        # This is used to ensure that the json_data provided is a valid JSON object
+        #
+        if not DataController.__is_json(data):
+            data = '"' + data + '"'
 
-            if not keys:
-                raise ValueError("key(s) can't be empty")
+        try:
+            json_data = json.loads('{"json":' + data + "}")
+        except ValueError:
+            raise ValueError(
+                "The data must be valid JSON, or text without quotes nor backslashes"
+            )
 
-            # This is used to ensure that the json_data provided is a valid JSON object
-            #
-            if not DataController.__is_json(data):
-                data = '"' + data + '"'
+        return blockchain_name, stream, keys, json_data
 
-            json_data = json.loads('{"json":' + data + "}")
-            formatted_data = json.dumps(json_data)
+    @staticmethod
+    def prepare_item(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        data: str,
+        codec: str = DEFAULT_CODEC_VALUE,
+        dedup: bool = DEFAULT_DEDUP_VALUE,
+    ):
+        """
+        Validates an item to be published and returns its cleaned blockchain name,
+        stream name and keys, along with its data as published: either {"json": value}
+        or the hex string produced by the stream's encoding, the codec or dedup.
+        """
+        blockchain_name, stream, keys, json_data = DataController.validate_item(
+            blockchain_name, stream, keys, data, codec
+        )
+        item_data = json_data
+
+        encoded_data = PayloadCodec.encode(
+            blockchain_name, stream, json_data["json"], codec
+        )
+        if encoded_data is not None:
+            item_data = encoded_data
+
+        if dedup:
+            digest = ContentStore.store(blockchain_name, item_data)
+            StreamQueryCache.invalidate_stream(
+                blockchain_name, ContentStore.CONTENT_STREAM_NAME
+            )
+            item_data = PayloadCodec.encode_reference(digest)
+
+        return blockchain_name, stream, keys, item_data
+
+    @staticmethod
+    def publish_item(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        data: str,
+        codec: str = DEFAULT_CODEC_VALUE,
+        dedup: bool = DEFAULT_DEDUP_VALUE,
+    ):
+        """
+        Publishes an item in stream, passed as a stream name, an array of keys 
+        and data in JSON format. The data is serialized with the stream's encoding
+        (JSON, MessagePack or CBOR). Set codec to zlib, zstd or zstd-dictionary to
+        publish the data compressed, it is decoded transparently when read.
+        Set dedup to true to store the data once in the content-store stream, which
+        must exist and be subscribed to, and only publish a reference to it.
+        """
+        try:
+            blockchain_name, stream, keys, item_data = DataController.prepare_item(
+                blockchain_name, stream, keys, data, codec, dedup
+            )
+            formatted_data = (
+                item_data if isinstance(item_data, str) else json.dumps(item_data)
+            )
 
             args = [
                 DataController.MULTICHAIN_ARG,
@@ -85,6 +220,8 @@ class DataController:
                 formatted_data,
             ]
             output = run(args, check=True, capture_output=True)
+            StreamQueryCache.invalidate_stream(blockchain_name, stream)
+            TransactionController.track(blockchain_name, output.stdout)
 
             return output.stdout.strip()
         except CalledProcessError as err:
@@ -95,6 +232,277 @@ class DataController:
             raise err
 
     @staticmethod
+    def publish_binary_item(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        source,
+        length: int,
+        offchain: bool = DEFAULT_OFFCHAIN_VALUE,
+    ):
+        """
+        Publishes length bytes read from the source file object as a raw (binary) item
+        in stream, under the provided keys. The bytes are streamed hex encoded to the
+        daemon's JSON-RPC API instead of being passed to multichain-cli, so the payload
+        size isn't bounded by the maximum command line length. Set offchain to true to
+        store the payload off-chain, only its hash being published on-chain.
+        Returns the txid of the item.
+        """
+        try:
+            blockchain_name, stream, keys = DataController.__validate_item_arguments(
+                blockchain_name, stream, keys
+            )
+
+            if length is None or length <= 0:
+                raise ValueError("The data can't be empty")
+
+            params_after = [DataController.OFFCHAIN_OPTION] if offchain else []
+            transaction_id = RpcController.call_with_streamed_hex_param(
+                blockchain_name,
+                DataController.PUBLISH_ITEM_ARG,
+                [stream, keys],
+                source,
+                length,
+                params_after,
+            )
+            StreamQueryCache.invalidate_stream(blockchain_name, stream)
+            TransactionController.track(blockchain_name, transaction_id)
+
+            return transaction_id
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def train_codec_dictionary(
+        blockchain_name: str,
+        stream: str,
+        sample_count: int = DEFAULT_DICTIONARY_SAMPLE_COUNT,
+        dictionary_size: int = DEFAULT_DICTIONARY_SIZE,
+    ):
+        """
+        Trains a zstd dictionary on the most recent JSON items of stream and publishes it
+        to the codec-dictionaries stream, which must exist and be subscribed to. Items
+        published with the zstd-dictionary codec are then compressed with it.
+        Returns the id of the dictionary and the txid of the item holding it.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if sample_count <= 0 or dictionary_size <= 0:
+                raise ValueError("The sample count and dictionary size must be positive")
+
+            items = DataController.get_stream_items(
+                blockchain_name, stream, False, sample_count, -sample_count, False
+            )
+            samples = [
+                item["data"]["json"]
+                for item in items
+                if isinstance(item.get("data"), dict) and "json" in item["data"]
+            ]
+            if not samples:
+                raise ValueError("The stream has no JSON items to train a dictionary on")
+
+            dictionary_id, dictionary_data = PayloadCodec.train_dictionary(
+                samples, dictionary_size
+            )
+            transaction_id = RpcController.call(
+                blockchain_name,
+                DataController.PUBLISH_ITEM_ARG,
+                [
+                    PayloadCodec.DICTIONARY_STREAM_NAME,
+                    [
+                        PayloadCodec.DICTIONARY_KEY_PREFIX + str(dictionary_id),
+                        PayloadCodec.STREAM_KEY_PREFIX + stream,
+                    ],
+                    dictionary_data.hex(),
+                ],
+            )
+            PayloadCodec.set_stream_dictionary(
+                blockchain_name, stream, dictionary_id, dictionary_data
+            )
+            StreamQueryCache.invalidate_stream(
+                blockchain_name, PayloadCodec.DICTIONARY_STREAM_NAME
+            )
+
+            return dictionary_id, transaction_id
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_item_data_chunks(
+        blockchain_name: str,
+        txid: str,
+        vout: int,
+        start: int,
+        length: int,
+        chunk_size: int = ITEM_DATA_CHUNK_SIZE,
+    ):
+        """
+        Returns a generator of the bytes start to start + length of the raw data of an
+        item, given the txid and vout of the stub object returned for items larger than
+        maxshowndata. The data is retrieved with gettxoutdata one chunk at a time so it
+        can be streamed without holding the whole payload in memory. The first chunk,
+        and the last byte of the range if it is past the first chunk, are retrieved
+        before returning, so daemon errors, data that isn't raw and ranges past the end
+        of the data are raised before the response is started.
+        """
+        blockchain_name = blockchain_name.strip()
+        txid = txid.strip()
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        if not txid:
+            raise ValueError("Transaction id can't be empty")
+
+        if start < 0 or length < 0:
+            raise ValueError("The range of the data can't be negative")
+
+        if not length:
+            return iter(())
+
+        end = start + length
+        first_count = min(chunk_size, length)
+        first_chunk = DataController.__get_item_data_chunk(
+            blockchain_name, txid, vout, start, first_count
+        )
+        if len(first_chunk) < first_count or (
+            length > first_count
+            and not DataController.__get_item_data_chunk(
+                blockchain_name, txid, vout, end - 1, 1
+            )
+        ):
+            raise ValueError("The range is past the end of the data of the item")
+
+        return DataController.__generate_item_data_chunks(
+            blockchain_name, txid, vout, first_chunk, start, end, chunk_size
+        )
+
+    @staticmethod
+    def __generate_item_data_chunks(
+        blockchain_name: str,
+        txid: str,
+        vout: int,
+        first_chunk: bytes,
+        start: int,
+        end: int,
+        chunk_size: int,
+    ):
+        """
+        Generates the first chunk retrieved by get_item_data_chunks, then the chunks
+        of the rest of the range
+        """
+        yield first_chunk
+        start += len(first_chunk)
+        while start < end:
+            chunk = DataController.__get_item_data_chunk(
+                blockchain_name, txid, vout, start, min(chunk_size, end - start)
+            )
+            if not chunk:
+                break
+            start += len(chunk)
+            yield chunk
+
+    @staticmethod
+    def __get_item_data_chunk(
+        blockchain_name: str, txid: str, vout: int, start: int, count: int
+    ):
+        """
+        Returns count bytes of the raw data of an item from start, fewer if the data
+        ends before
+        """
+        hex_data = RpcController.call(
+            blockchain_name,
+            DataController.GET_TX_OUT_DATA_ARG,
+            [txid, vout, count, start],
+        )
+        if not isinstance(hex_data, str):
+            raise ValueError("Only raw data can be retrieved in chunks")
+        return bytes.fromhex(hex_data)
+
+    @staticmethod
+    def get_item_data(blockchain_name: str, txid: str, vout: int):
+        """
+        Returns the whole data of an item, given the txid and vout of its stub object,
+        decoded like the data of the items returned with it. Raw data that isn't
+        encoded is returned hex encoded, JSON and text data as an object
+        """
+        blockchain_name = blockchain_name.strip()
+        txid = txid.strip()
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        if not txid:
+            raise ValueError("Transaction id can't be empty")
+
+        data = RpcController.call(
+            blockchain_name, DataController.GET_TX_OUT_DATA_ARG, [txid, vout]
+        )
+        return PayloadCodec.decode_data(blockchain_name, data)
+
+    @staticmethod
+    def inline_item_data(
+        blockchain_name: str, items: list, max_size: int = MAX_INLINE_DATA_SIZE
+    ):
+        """
+        Returns the items with the data of every stub object no larger than max_size
+        bytes replaced by the data itself. All the stubs are resolved with a single
+        batched gettxoutdata request. The items passed in are not modified
+        """
+        stub_indexes = [
+            index
+            for index, item in enumerate(items)
+            if DataController.__is_data_stub(item.get("data"))
+            and item["data"]["size"] <= max_size
+        ]
+        if not stub_indexes:
+            return items
+
+        calls = [
+            (
+                DataController.GET_TX_OUT_DATA_ARG,
+                [items[index]["data"]["txid"], items[index]["data"]["vout"]],
+            )
+            for index in stub_indexes
+        ]
+        results = RpcController.call_batch(blockchain_name, calls)
+
+        inlined_items = list(items)
+        for index, result in zip(stub_indexes, results):
+            if isinstance(result, Exception):
+                continue
+            inlined_items[index] = dict(
+                items[index], data=PayloadCodec.decode_data(blockchain_name, result)
+            )
+        return inlined_items
+
+    @staticmethod
+    def __is_data_stub(data):
+        """
+        Returns true if the data is the object returned in place of data larger than
+        the maxshowndata runtime parameter
+        """
+        return (
+            isinstance(data, dict)
+            and "txid" in data
+            and "vout" in data
+            and "size" in data
+        )
+
+    @staticmethod
+    @RequestCoalescer.coalesce
     def get_items_by_key(
         blockchain_name: str,
         stream: str,
@@ -136,14 +544,62 @@ class DataController:
                 json.dumps(start),
                 json.dumps(local_ordering),
             ]
-            items = run(args, check=True, capture_output=True)
-            return json.loads(items.stdout)
+            return DataController.__run_cached_query(blockchain_name, stream, args)
+        except CalledProcessError as err:
+            raise MultiChainError(err.stderr)
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    @RequestCoalescer.coalesce
+    def get_items_by_publisher(
+        blockchain_name: str,
+        stream: str,
+        publisher: str,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+        count: int = DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Retrieves items in stream published by the specified publisher address, 
+        passed as a stream name to which the node must be subscribed. Use count and 
+        start to retrieve part of the list only, with negative start values (like 
+        the default) indicating the most recent items.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+            publisher = publisher.strip()
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if not publisher:
+                raise ValueError("Publisher can't be empty")
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            args = [
+                DataController.MULTICHAIN_ARG,
+                blockchain_name,
+                DataController.GET_STREAM_PUBLISHER_ITEMS_ARG,
+                stream,
+                publisher,
+                json.dumps(verbose),
+                json.dumps(count),
+                json.dumps(start),
+                json.dumps(local_ordering),
+            ]
+            return DataController.__run_cached_query(blockchain_name, stream, args)
         except CalledProcessError as err:
             raise MultiChainError(err.stderr)
         except Exception as err:
             raise err
 
     @staticmethod
+    @RequestCoalescer.coalesce
     def get_items_by_keys(
         blockchain_name: str,
         stream: str,
@@ -199,7 +655,7 @@ class DataController:
             ]
             items = run(args, check=True, capture_output=True)
 
-            return json.loads(items.stdout)
+            return PayloadCodec.decode_items(blockchain_name, json.loads(items.stdout))
         except CalledProcessError as err:
             raise MultiChainError(err.stderr)
         except ValueError as err:
@@ -208,6 +664,7 @@ class DataController:
             raise err
 
     @staticmethod
+    @RequestCoalescer.coalesce
     def get_items_by_publishers(
         blockchain_name: str,
         stream: str,
@@ -255,7 +712,7 @@ class DataController:
             ]
             items = run(args, check=True, capture_output=True)
 
-            return json.loads(items.stdout)
+            return PayloadCodec.decode_items(blockchain_name, json.loads(items.stdout))
         except CalledProcessError as err:
             raise MultiChainError(err.stderr)
         except ValueError as err:
@@ -264,6 +721,7 @@ class DataController:
             raise err
 
     @staticmethod
+    @RequestCoalescer.coalesce
     def get_stream_items(
         blockchain_name: str,
         stream: str,
@@ -302,9 +760,7 @@ class DataController:
                 json.dumps(start),
                 json.dumps(local_ordering),
             ]
-            items = run(args, check=True, capture_output=True)
-
-            return json.loads(items.stdout)
+            return DataController.__run_cached_query(blockchain_name, stream, args)
         except CalledProcessError as err:
             raise MultiChainError(err.stderr)
         except ValueError as err:
@@ -313,6 +769,7 @@ class DataController:
             raise err
 
     @staticmethod
+    @RequestCoalescer.coalesce
     def get_stream_publishers(
         blockchain_name: str,
         stream: str,
@@ -371,6 +828,7 @@ class DataController:
             raise err
 
     @staticmethod
+    @RequestCoalescer.coalesce
     def get_stream_keys(
         blockchain_name: str,
         stream: str,
@@ -415,9 +873,7 @@ class DataController:
                 json.dumps(start),
                 json.dumps(local_ordering),
             ]
-            stream_keys = run(args, check=True, capture_output=True)
-
-            return json.loads(stream_keys.stdout)
+            return DataController.__run_cached_query(blockchain_name, stream, args)
         except CalledProcessError as err:
             raise MultiChainError(err.stderr)
         except ValueError as err:
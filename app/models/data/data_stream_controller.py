@@ -1,5 +1,9 @@
 from subprocess import run, CalledProcessError
 from app.models.exception.multichain_error import MultiChainError
+from app.models.cache.request_coalescer import RequestCoalescer
+from app.models.cache.stream_query_cache import StreamQueryCache
+from app.models.data.payload_codec import PayloadCodec
+from app.models.transaction.transaction_controller import TransactionController
 import json
 
 
@@ -16,14 +20,26 @@ class DataStreamController:
     DEFAULT_STREAM_START_VALUE = -MAX_DATA_COUNT
     DEFAULT_STREAMS_LIST_CONTENT = None
     DEFAULT_RESCAN_VALUE = False
+    DEFAULT_ENCODING_VALUE = PayloadCodec.JSON_ENCODING
+    DEFAULT_PACKED_ARRAYS_VALUE = None
+    VERBOSE_ONLY_FIELDS = ("creators",)
 
     @staticmethod
-    def create_stream(blockchain_name: str, stream_name: str, is_open: bool):
+    def create_stream(
+        blockchain_name: str,
+        stream_name: str,
+        is_open: bool,
+        encoding: str = DEFAULT_ENCODING_VALUE,
+        packed_arrays: dict = DEFAULT_PACKED_ARRAYS_VALUE,
+    ):
         """
         Creates a new stream on the blockchain called name. 
         Pass the value "stream" in the type parameter. If open is true 
         then anyone with global send permissions can publish to the stream, 
         otherwise publishers must be explicitly granted per-stream write permissions. 
+        Set encoding to msgpack or cbor to store the stream's items in that format,
+        packed_arrays mapping field paths to the array type codes their numbers are
+        packed as. These are recorded in the stream's custom fields.
         Returns the txid of the transaction creating the stream.
         """
         try:
@@ -43,7 +59,15 @@ class DataStreamController:
                 stream_name,
                 json.dumps(is_open),
             ]
+            if encoding != PayloadCodec.JSON_ENCODING or packed_arrays:
+                args.append(
+                    json.dumps(PayloadCodec.get_stream_details(encoding, packed_arrays))
+                )
             output = run(args, check=True, capture_output=True)
+            PayloadCodec.set_stream_encoding(
+                blockchain_name, stream_name, encoding, packed_arrays
+            )
+            TransactionController.track(blockchain_name, output.stdout)
 
             return output.stdout.strip()
         except CalledProcessError as err:
@@ -54,6 +78,7 @@ class DataStreamController:
             raise err
 
     @staticmethod
+    @RequestCoalescer.coalesce
     def get_streams(
         blockchain_name: str,
         streams: list = DEFAULT_STREAMS_LIST_CONTENT,
@@ -126,6 +151,8 @@ class DataStreamController:
                 json.dumps(rescan),
             ]
             output = run(args, check=True, capture_output=True)
+            for stream in streams:
+                StreamQueryCache.invalidate_stream(blockchain_name, stream)
 
             # returns True if output is empty (meaning it was a success)
             #
@@ -159,6 +186,8 @@ class DataStreamController:
                 json.dumps(streams),
             ]
             output = run(args, check=True, capture_output=True)
+            for stream in streams:
+                StreamQueryCache.invalidate_stream(blockchain_name, stream)
 
             # returns True if output is empty (meaning it was a success)
             #
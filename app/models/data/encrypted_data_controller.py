@@ -0,0 +1,222 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+
+import nacl.encoding
+
+from app.models.data.data_controller import DataController
+from app.models.encryption.encryption_controller import EncrytpionController
+
+DATA_ENCODING = nacl.encoding.Base64Encoder
+
+
+class EncryptedDataController:
+    KEY_ID_FIELD_NAME = "keyId"
+    CIPHER_TEXT_FIELD_NAME = "cipherText"
+    SEALED_KEYS_FIELD_NAME = "sealedKeys"
+    DEFAULT_ROTATION_PERIOD = EncrytpionController.DEFAULT_GROUP_KEY_ROTATION_PERIOD
+    DEFAULT_ITEM_COUNT_VALUE = DataController.DEFAULT_ITEM_COUNT_VALUE
+    DEFAULT_ITEM_START_VALUE = DataController.DEFAULT_ITEM_START_VALUE
+    MAX_DECRYPTION_WORKERS = 4
+
+    _published_group_keys_lock = threading.Lock()
+    _published_group_keys = set()
+    _decryption_executor = ThreadPoolExecutor(max_workers=MAX_DECRYPTION_WORKERS)
+
+    @staticmethod
+    def publish_encrypted_item(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        data: str,
+        private_key: str,
+        public_keys: list,
+        key_stream: str,
+        rotation_period: int = DEFAULT_ROTATION_PERIOD,
+    ):
+        """
+        Encrypts the data with the group key shared by the publisher and the recipients
+        and publishes it in stream. The group key is sealed for every recipient and
+        published to key_stream once per recipient set and rotation period, under its
+        key id. The published item only holds the key id and the cipher text.
+        Returns the txid of the item.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            key_stream = key_stream.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not key_stream:
+                raise ValueError("Key stream name can't be empty")
+
+            if not private_key or not private_key.strip():
+                raise ValueError("Private key can't be empty")
+
+            controller = EncrytpionController.get_instance(private_key.strip())
+            group_key = controller.get_group_key(public_keys, rotation_period)
+            EncryptedDataController.__publish_group_key(
+                blockchain_name, key_stream, group_key
+            )
+
+            cipher_text = controller.encrypt_data_with_group_key(data, group_key)
+            item = {
+                EncryptedDataController.KEY_ID_FIELD_NAME: group_key.get_key_id(),
+                EncryptedDataController.CIPHER_TEXT_FIELD_NAME: DATA_ENCODING.encode(
+                    cipher_text
+                ).decode(),
+            }
+
+            return DataController.publish_item(
+                blockchain_name, stream, keys, json.dumps(item)
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_decrypted_items(
+        blockchain_name: str,
+        stream: str,
+        key_stream: str,
+        private_key: str,
+        count: int = DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DEFAULT_ITEM_START_VALUE,
+    ):
+        """
+        Retrieves a page of items from stream and decrypts them with the private key
+        provided. See decrypt_items for the format of the result.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            key_stream = key_stream.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not key_stream:
+                raise ValueError("Key stream name can't be empty")
+
+            items = DataController.get_stream_items(
+                blockchain_name, stream, False, count, start, False
+            )
+            return EncryptedDataController.decrypt_items(
+                blockchain_name, key_stream, private_key, items
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def decrypt_items(
+        blockchain_name: str, key_stream: str, private_key: str, items: list
+    ):
+        """
+        Decrypts items published with publish_encrypted_item. Each group key is fetched
+        from key_stream and unsealed once, then the items are decrypted in parallel on a
+        thread pool (libsodium releases the GIL). The plain texts are returned in the
+        order of the items; an item that can't be decrypted gets an error message
+        instead of aborting the whole batch.
+        """
+        if not private_key or not private_key.strip():
+            raise ValueError("Private key can't be empty")
+
+        controller = EncrytpionController.get_instance(private_key.strip())
+
+        symmetric_keys = {}
+        for item in items:
+            key_id = EncryptedDataController.__get_key_id(item)
+            if key_id is None or key_id in symmetric_keys:
+                continue
+            try:
+                symmetric_keys[key_id] = EncryptedDataController.__get_symmetric_key(
+                    blockchain_name, key_stream, controller, key_id
+                )
+            except Exception as err:
+                symmetric_keys[key_id] = err
+
+        def decrypt_item(item):
+            result = {"txid": item.get("txid"), "keys": item.get("keys")}
+            try:
+                key_id = EncryptedDataController.__get_key_id(item)
+                if key_id is None:
+                    raise ValueError("The item is not an encrypted item")
+
+                symmetric_key = symmetric_keys[key_id]
+                if isinstance(symmetric_key, Exception):
+                    raise symmetric_key
+
+                cipher_text = DATA_ENCODING.decode(
+                    item["data"]["json"][EncryptedDataController.CIPHER_TEXT_FIELD_NAME]
+                )
+                result["data"] = controller.decrypt_data_with_symmetric_key(
+                    cipher_text, symmetric_key
+                ).decode("utf-8")
+            except Exception as err:
+                result["error"] = str(err) or type(err).__name__
+            return result
+
+        return list(EncryptedDataController._decryption_executor.map(decrypt_item, items))
+
+    @staticmethod
+    def __get_key_id(item):
+        """
+        Returns the group key id referenced by an encrypted item, or None if the
+        item wasn't published with publish_encrypted_item
+        """
+        data = item.get("data")
+        if not isinstance(data, dict) or not isinstance(data.get("json"), dict):
+            return None
+        encrypted_item = data["json"]
+        if EncryptedDataController.CIPHER_TEXT_FIELD_NAME not in encrypted_item:
+            return None
+        return encrypted_item.get(EncryptedDataController.KEY_ID_FIELD_NAME)
+
+    @staticmethod
+    def __get_symmetric_key(blockchain_name: str, key_stream: str, controller, key_id):
+        """
+        Retrieves the group key from the key stream and unseals the symmetric key that
+        was sealed for the current user
+        """
+        group_key_items = DataController.get_items_by_key(
+            blockchain_name, key_stream, key_id, False, 1, 0, False
+        )
+        if not group_key_items:
+            raise ValueError("The group key " + key_id + " was not found")
+
+        sealed_keys = group_key_items[0]["data"]["json"][
+            EncryptedDataController.SEALED_KEYS_FIELD_NAME
+        ]
+        enc_symmetric_key = sealed_keys.get(controller.get_user_public_key().decode())
+        if enc_symmetric_key is None:
+            raise ValueError("The group key " + key_id + " wasn't shared with this user")
+
+        return controller.unseal_group_key(
+            key_id, DATA_ENCODING.decode(enc_symmetric_key)
+        )
+
+    @staticmethod
+    def __publish_group_key(blockchain_name: str, key_stream: str, group_key):
+        """
+        Publishes the sealed symmetric keys of the group key to the key stream, unless
+        this server already published them
+        """
+        published_key = (blockchain_name, key_stream, group_key.get_key_id())
+        with EncryptedDataController._published_group_keys_lock:
+            if published_key in EncryptedDataController._published_group_keys:
+                return
+
+            sealed_keys = {
+                public_key: DATA_ENCODING.encode(enc_symmetric_key).decode()
+                for public_key, enc_symmetric_key in group_key.get_public_key_symmetric_key_map().items()
+            }
+            DataController.publish_item(
+                blockchain_name,
+                key_stream,
+                [group_key.get_key_id()],
+                json.dumps({EncryptedDataController.SEALED_KEYS_FIELD_NAME: sealed_keys}),
+            )
+            EncryptedDataController._published_group_keys.add(published_key)
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app.models.storage.storage_controller import StorageController
+
+
+class HashingReader:
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, source, length: int):
+        self._source = source
+        self._remaining = length
+        self._hash = hashlib.sha256()
+
+    def read(self, size: int = -1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        chunk = self._source.read(size)
+        self._remaining -= len(chunk)
+        self._hash.update(chunk)
+        return chunk
+
+    def get_digest(self):
+        """
+        Returns the SHA-256 of the bytes of the source, reading the ones that weren't
+        read yet
+        """
+        while self._remaining > 0 and self.read(HashingReader.CHUNK_SIZE):
+            pass
+        return self._hash.hexdigest()
+
+
+class IdempotencyController:
+    KEY_DIRECTORY = "idempotency-keys"
+    KEY_EXTENSION = ".json"
+    KEY_TTL = 24 * 3600
+    MAX_KEY_LENGTH = 255
+    LOCK_COUNT = 64
+    PURGE_INTERVAL = 3600.0
+
+    _locks = [threading.Lock() for _ in range(LOCK_COUNT)]
+    _in_flight = {}
+    _purge_lock = threading.Lock()
+    _purged_at = {}
+
+    @staticmethod
+    def get_fingerprint(request_value):
+        """
+        Returns the fingerprint of a request, the SHA-256 of its canonical JSON, used
+        to tell a retry from another request reusing the same key
+        """
+        return hashlib.sha256(
+            json.dumps(request_value, sort_keys=True).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def run(blockchain_name: str, idempotency_key: str, get_fingerprint, publish):
+        """
+        Returns the response of publish, a function publishing an item and returning
+        the JSON response of the request, only calling it once per idempotency key.
+        The response is stored under the key for KEY_TTL seconds, so retries of the
+        request return it without publishing the item again nor calling the daemon.
+        get_fingerprint returns the fingerprint of the request, see get_fingerprint,
+        and is called once the item is published. Concurrent requests with the same
+        key wait for the first one to complete, without holding the lock of the key
+        while it publishes. Failed requests are not stored and can be retried with the
+        same key.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            idempotency_key = idempotency_key.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not idempotency_key:
+                raise ValueError("The idempotency key can't be empty")
+
+            if len(idempotency_key) > IdempotencyController.MAX_KEY_LENGTH:
+                raise ValueError(
+                    "The idempotency key can't be longer than "
+                    + str(IdempotencyController.MAX_KEY_LENGTH)
+                    + " characters"
+                )
+
+            key_hash = hashlib.sha256(idempotency_key.encode()).hexdigest()
+            key_path = StorageController.get_path(
+                IdempotencyController.KEY_DIRECTORY,
+                blockchain_name,
+                key_hash + IdempotencyController.KEY_EXTENSION,
+            )
+            in_flight_key = (blockchain_name, key_hash)
+            while True:
+                with IdempotencyController.__get_lock(key_hash):
+                    stored_request = StorageController.read_json(key_path)
+                    if (
+                        stored_request is not None
+                        and stored_request["expiresAt"] > time.time()
+                    ):
+                        break
+
+                    stored_request = None
+                    publishing = IdempotencyController._in_flight.get(in_flight_key)
+                    if publishing is None:
+                        publishing = threading.Event()
+                        IdempotencyController._in_flight[in_flight_key] = publishing
+                        break
+
+                # Another request with the key is publishing, its response is read
+                # once it completes, or this request publishes if it failed
+                #
+                publishing.wait()
+
+            if stored_request is not None:
+                if stored_request["fingerprint"] != get_fingerprint():
+                    raise ValueError(
+                        "The idempotency key "
+                        + idempotency_key
+                        + " was already used for a different request"
+                    )
+                return stored_request["response"]
+
+            try:
+                response = publish()
+                stored_request = {
+                    "fingerprint": get_fingerprint(),
+                    "response": response,
+                    "expiresAt": time.time() + IdempotencyController.KEY_TTL,
+                }
+                with IdempotencyController.__get_lock(key_hash):
+                    StorageController.write_json(key_path, stored_request)
+            finally:
+                with IdempotencyController.__get_lock(key_hash):
+                    del IdempotencyController._in_flight[in_flight_key]
+                publishing.set()
+
+            IdempotencyController.__purge_expired_keys(blockchain_name)
+            return response
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def __get_lock(key_hash: str):
+        """
+        Returns the lock serializing the requests using the key of hash key_hash
+        """
+        return IdempotencyController._locks[
+            int(key_hash, 16) % IdempotencyController.LOCK_COUNT
+        ]
+
+    @staticmethod
+    def __purge_expired_keys(blockchain_name: str):
+        """
+        Deletes the expired keys of the chain, at most every PURGE_INTERVAL seconds
+        """
+        with IdempotencyController._purge_lock:
+            purged_at = IdempotencyController._purged_at.get(blockchain_name)
+            if (
+                purged_at is not None
+                and time.monotonic() - purged_at < IdempotencyController.PURGE_INTERVAL
+            ):
+                return
+            IdempotencyController._purged_at[blockchain_name] = time.monotonic()
+
+        key_directory = StorageController.get_path(
+            IdempotencyController.KEY_DIRECTORY, blockchain_name
+        )
+        now = time.time()
+        for file_name in os.listdir(key_directory):
+            if not file_name.endswith(IdempotencyController.KEY_EXTENSION):
+                continue
+
+            key_hash = file_name[: -len(IdempotencyController.KEY_EXTENSION)]
+            with IdempotencyController.__get_lock(key_hash):
+                key_path = os.path.join(key_directory, file_name)
+                try:
+                    stored_request = StorageController.read_json(key_path)
+                    if stored_request is None or stored_request["expiresAt"] <= now:
+                        os.remove(key_path)
+                except (OSError, ValueError, KeyError):
+                    continue
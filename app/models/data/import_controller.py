@@ -0,0 +1,376 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import json
+import os
+import time
+
+from app.models.cache.stream_query_cache import StreamQueryCache
+from app.models.data.data_controller import DataController
+from app.models.data.payload_codec import PayloadCodec
+from app.models.exception.multichain_error import MultiChainError
+from app.models.rpc.rpc_controller import RpcController
+from app.models.storage.storage_controller import StorageController
+
+
+class ImportController:
+    CSV_FORMAT = "csv"
+    NDJSON_FORMAT = "ndjson"
+    FORMATS = {CSV_FORMAT, NDJSON_FORMAT}
+    PUBLISH_MULTI_ARG = "publishmulti"
+    DEFAULT_BATCH_SIZE = 100
+    MAX_BATCH_SIZE = 1000
+    MAX_BATCH_BYTES = 512 * 1024
+    PIPELINE_DEPTH = 4
+    MAX_REPORTED_REJECTED_ROWS = 100
+    DEFAULT_DATA_FIELDS_VALUE = None
+    DEFAULT_CHECKPOINT_PATH_VALUE = None
+    CHECKPOINT_DIRECTORY = "imports"
+    CHECKPOINT_EXTENSION = ".json"
+
+    @staticmethod
+    def import_items(
+        blockchain_name: str,
+        stream: str,
+        source,
+        file_format: str,
+        key_fields: list,
+        data_fields: list = DEFAULT_DATA_FIELDS_VALUE,
+        checkpoint_path: str = DEFAULT_CHECKPOINT_PATH_VALUE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        codec: str = DataController.DEFAULT_CODEC_VALUE,
+        progress=None,
+    ):
+        """
+        Publishes every row of a CSV or NDJSON file, read line by line from the source
+        binary file object, as an item of stream. The values of the key_fields columns
+        are the keys of the item, and the data_fields columns (all other columns by
+        default) its JSON data. Rows are validated like publish_item and published in
+        publishmulti transactions, PIPELINE_DEPTH of them in flight at once.
+
+        The report is saved to checkpoint_path after every transaction and passed to
+        progress. Importing the same file with the same checkpoint skips the rows that
+        were already committed. Returns the report.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if file_format not in ImportController.FORMATS:
+                raise ValueError(
+                    "The format provided: " + str(file_format) + " does not exist."
+                )
+
+            if not key_fields:
+                raise ValueError("The list of key fields can't be empty")
+
+            if batch_size <= 0 or batch_size > ImportController.MAX_BATCH_SIZE:
+                raise ValueError(
+                    "The batch size must be between 1 and "
+                    + str(ImportController.MAX_BATCH_SIZE)
+                )
+
+            # Resolves the stream's encoding before reading any row, so a daemon that
+            # can't be reached fails the import instead of rejecting every row
+            #
+            PayloadCodec.get_stream_encoding(blockchain_name, stream)
+
+            report = ImportController.__load_checkpoint(checkpoint_path)
+            committed_row = report["committedRow"]
+            committed_ranges = report["committedRanges"]
+            started_at = time.monotonic() - report["elapsedSeconds"]
+
+            def is_committed(row_number):
+                return row_number <= committed_row or any(
+                    first_row <= row_number <= last_row
+                    for first_row, last_row in committed_ranges
+                )
+
+            def commit(first_row, last_row, row_count, rejected_rows):
+                report["rowsRead"] += row_count
+                report["rowsRejected"] += len(rejected_rows)
+                for row_number, error in rejected_rows:
+                    if len(report["rejected"]) < ImportController.MAX_REPORTED_REJECTED_ROWS:
+                        report["rejected"].append({"row": row_number, "error": str(error)})
+
+                if report["error"] is None:
+                    report["committedRow"] = last_row
+                else:
+                    report["committedRanges"].append([first_row, last_row])
+
+            # Rows and rejections are only counted once their transaction is committed,
+            # so resuming a failed import doesn't count them twice
+            #
+            def collect(pending_batch):
+                first_row, last_row, row_count, rejected_rows, items, future = pending_batch
+                try:
+                    future.result()
+                except MultiChainError as err:
+                    if report["error"] is None:
+                        report["error"] = {
+                            "code": err.get_error_code(),
+                            "message": err.get_error_message(),
+                        }
+                    return
+                except Exception as err:
+                    if report["error"] is None:
+                        report["error"] = {"message": str(err)}
+                    return
+
+                report["rowsPublished"] += len(items)
+                report["transactions"] += 1
+                commit(first_row, last_row, row_count, rejected_rows)
+                ImportController.__update_report(report, started_at)
+                ImportController.__save_checkpoint(checkpoint_path, report)
+                if progress is not None:
+                    progress(report)
+
+            executor = ThreadPoolExecutor(max_workers=ImportController.PIPELINE_DEPTH)
+            pending_batches = deque()
+            batch = None
+
+            def new_batch(first_row):
+                return {
+                    "firstRow": first_row,
+                    "rowCount": 0,
+                    "rejectedRows": [],
+                    "items": [],
+                    "bytes": 0,
+                }
+
+            def submit(last_row):
+                pending_batches.append(
+                    (
+                        batch["firstRow"],
+                        last_row,
+                        batch["rowCount"],
+                        batch["rejectedRows"],
+                        batch["items"],
+                        executor.submit(
+                            RpcController.call,
+                            blockchain_name,
+                            ImportController.PUBLISH_MULTI_ARG,
+                            [stream, batch["items"]],
+                        ),
+                    )
+                )
+                while len(pending_batches) >= ImportController.PIPELINE_DEPTH:
+                    collect(pending_batches.popleft())
+
+            try:
+                last_row = committed_row
+                for row_number, record in ImportController.__read_records(
+                    source, file_format
+                ):
+                    if report["error"] is not None:
+                        break
+
+                    if is_committed(row_number):
+                        continue
+
+                    if batch is None:
+                        batch = new_batch(row_number)
+
+                    try:
+                        if isinstance(record, ValueError):
+                            raise record
+
+                        item = ImportController.__get_item(
+                            blockchain_name,
+                            stream,
+                            record,
+                            key_fields,
+                            data_fields,
+                            codec,
+                        )
+                    except ValueError as err:
+                        batch["rowCount"] += 1
+                        batch["rejectedRows"].append((row_number, err))
+                        last_row = row_number
+                        continue
+
+                    item_bytes = len(json.dumps(item))
+                    if (
+                        batch["items"]
+                        and batch["bytes"] + item_bytes > ImportController.MAX_BATCH_BYTES
+                    ):
+                        submit(last_row)
+                        batch = new_batch(row_number)
+
+                    batch["rowCount"] += 1
+                    batch["items"].append(item)
+                    batch["bytes"] += item_bytes
+                    last_row = row_number
+                    if len(batch["items"]) >= batch_size:
+                        submit(last_row)
+                        batch = None
+
+                if batch is not None and batch["items"] and report["error"] is None:
+                    submit(last_row)
+                    batch = None
+                while pending_batches:
+                    collect(pending_batches.popleft())
+
+                if report["error"] is None:
+                    # Trailing rows that were all rejected have nothing to publish
+                    #
+                    if batch is not None:
+                        commit(
+                            batch["firstRow"],
+                            last_row,
+                            batch["rowCount"],
+                            batch["rejectedRows"],
+                        )
+                    report["committedRanges"] = []
+            finally:
+                while pending_batches:
+                    collect(pending_batches.popleft())
+                executor.shutdown(wait=False)
+                StreamQueryCache.invalidate_stream(blockchain_name, stream)
+
+            ImportController.__update_report(report, started_at)
+            ImportController.__save_checkpoint(checkpoint_path, report)
+            return report
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_checkpoint_path(import_id: str):
+        """
+        Returns the path of the checkpoint of an import started through the API
+        """
+        import_id = import_id.strip()
+        if not import_id or not import_id.replace("-", "").replace("_", "").isalnum():
+            raise ValueError(
+                "The import id can only contain letters, digits, - and _"
+            )
+        return StorageController.get_path(
+            ImportController.CHECKPOINT_DIRECTORY,
+            import_id + ImportController.CHECKPOINT_EXTENSION,
+        )
+
+    @staticmethod
+    def get_report(checkpoint_path: str):
+        """
+        Returns the report saved in the checkpoint
+        """
+        if not os.path.isfile(checkpoint_path):
+            raise ValueError("No import has been checkpointed at " + checkpoint_path)
+        return ImportController.__load_checkpoint(checkpoint_path)
+
+    @staticmethod
+    def __get_item(
+        blockchain_name: str,
+        stream: str,
+        record,
+        key_fields: list,
+        data_fields: list,
+        codec: str,
+    ):
+        """
+        Maps a row to the keys and data of an item, validated like publish_item.
+        Returns the item as expected by publishmulti
+        """
+        if not isinstance(record, dict):
+            raise ValueError("The row is not an object")
+
+        missing_fields = [
+            field
+            for field in key_fields + (data_fields or [])
+            if record.get(field) is None
+        ]
+        if missing_fields:
+            raise ValueError("The row has no " + ", ".join(missing_fields))
+
+        keys = [str(record[field]) for field in key_fields]
+        if data_fields is None:
+            data = {
+                field: value
+                for field, value in record.items()
+                if field not in key_fields
+            }
+        else:
+            data = {field: record[field] for field in data_fields}
+
+        _, _, keys, item_data = DataController.prepare_item(
+            blockchain_name, stream, keys, json.dumps(data), codec
+        )
+        return {"keys": keys, "data": item_data}
+
+    @staticmethod
+    def __read_records(source, file_format: str):
+        """
+        Yields the row number and content of every row of the file, reading it a line
+        at a time. Rows that can't be parsed are yielded as their ValueError
+        """
+        lines = (line.decode("utf-8-sig") for line in iter(source.readline, b""))
+
+        if file_format == ImportController.CSV_FORMAT:
+            reader = csv.DictReader(lines)
+            for row_number, record in enumerate(reader, 1):
+                if None in record:
+                    yield row_number, ValueError("The row has more values than columns")
+                else:
+                    yield row_number, record
+            return
+
+        row_number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as err:
+                yield row_number, ValueError("The row is not valid JSON: " + str(err))
+
+    @staticmethod
+    def __update_report(report: dict, started_at: float):
+        """
+        Updates the elapsed time and throughput of the import
+        """
+        report["elapsedSeconds"] = round(time.monotonic() - started_at, 3)
+        report["rowsPerSecond"] = round(
+            report["rowsPublished"] / max(report["elapsedSeconds"], 0.001), 1
+        )
+
+    @staticmethod
+    def __load_checkpoint(checkpoint_path: str):
+        """
+        Returns the report saved in the checkpoint, or a new report if there is none.
+        A failed import is resumed without its error
+        """
+        report = {
+            "rowsRead": 0,
+            "rowsPublished": 0,
+            "rowsRejected": 0,
+            "transactions": 0,
+            "committedRow": 0,
+            "committedRanges": [],
+            "elapsedSeconds": 0.0,
+            "rowsPerSecond": 0.0,
+            "rejected": [],
+            "error": None,
+        }
+        if checkpoint_path is not None:
+            report.update(StorageController.read_json(checkpoint_path, {}))
+            report["error"] = None
+        return report
+
+    @staticmethod
+    def __save_checkpoint(checkpoint_path: str, report: dict):
+        """
+        Atomically replaces the checkpoint with the report
+        """
+        if checkpoint_path is None:
+            return
+
+        StorageController.write_json(checkpoint_path, report)
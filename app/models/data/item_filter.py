@@ -0,0 +1,236 @@
+import json
+
+
+class ItemFilter:
+    PATH_SEPARATOR = "."
+    EQUAL_OPERATOR = "eq"
+    IN_OPERATOR = "in"
+    COMPARISONS = {
+        "gt": lambda value, operand: value > operand,
+        "gte": lambda value, operand: value >= operand,
+        "lt": lambda value, operand: value < operand,
+        "lte": lambda value, operand: value <= operand,
+    }
+    OPERATORS = {EQUAL_OPERATOR, IN_OPERATOR, *COMPARISONS}
+    MAX_CONDITION_COUNT = 32
+
+    MISSING = object()
+
+    @staticmethod
+    def compile(expression: str):
+        """
+        Compiles a filter expression into a predicate over items. The expression is a
+        JSON object mapping paths to conditions, all of which an item must meet. A
+        path is a dotted path into the item as returned by the API, such as
+        data.json.status or keys, with numbers indexing lists. A condition is either
+        the value the path must be equal to, or an object of operators: eq, gt, gte,
+        lt, lte, and in with a list of values. Items missing the path, or whose value
+        can't be compared with the operand, don't match.
+        """
+        conditions = ItemFilter.__parse(expression)
+        checks = [
+            (
+                ItemFilter.split_path(path),
+                ItemFilter.__compile_condition(path, condition),
+            )
+            for path, condition in conditions.items()
+        ]
+
+        def matches(item):
+            for path, check in checks:
+                value = ItemFilter.get_value(item, path)
+                if value is ItemFilter.MISSING:
+                    return False
+                try:
+                    if not check(value):
+                        return False
+                except TypeError:
+                    return False
+            return True
+
+        return matches
+
+    @staticmethod
+    def get_lookups(expression: str):
+        """
+        Returns, for every path of a compiled filter expression whose condition only
+        matches listed values (a value, eq or in), the list of those values. Items
+        matching the filter have one of them at each of these paths
+        """
+        lookups = {}
+        for path, condition in ItemFilter.__parse(expression).items():
+            if not isinstance(condition, dict):
+                lookups[path] = [condition]
+            elif ItemFilter.EQUAL_OPERATOR in condition:
+                lookups[path] = [condition[ItemFilter.EQUAL_OPERATOR]]
+            elif ItemFilter.IN_OPERATOR in condition:
+                lookups[path] = condition[ItemFilter.IN_OPERATOR]
+        return lookups
+
+    @staticmethod
+    def get_paths(expression: str):
+        """
+        Returns the paths a filter expression has conditions on
+        """
+        return list(ItemFilter.__parse(expression))
+
+    @staticmethod
+    def uses_fields(paths: list, field_names: tuple):
+        """
+        Returns whether any of paths starts with one of field_names, such as the
+        fields the daemon only returns in verbose listings
+        """
+        return any(ItemFilter.split_path(path)[0] in field_names for path in paths)
+
+    @staticmethod
+    def get_canonical_value(value):
+        """
+        Returns the canonical JSON of a value, equal for equal JSON values
+        """
+        return json.dumps(value, sort_keys=True)
+
+    @staticmethod
+    def project(items: list, paths: list):
+        """
+        Returns the items reduced to the values at paths, keeping their nesting.
+        Paths missing from an item are left out of it
+        """
+        split_paths = [ItemFilter.split_path(path) for path in paths]
+
+        projected_items = []
+        for item in items:
+            projected_item = {}
+            for path in split_paths:
+                value = ItemFilter.get_value(item, path)
+                if value is ItemFilter.MISSING:
+                    continue
+
+                parent = projected_item
+                for segment in path[:-1]:
+                    parent = parent.setdefault(str(segment), {})
+                parent[str(path[-1])] = value
+            projected_items.append(projected_item)
+        return projected_items
+
+    @staticmethod
+    def __parse(expression: str):
+        """
+        Returns the conditions of a filter expression, checking their number
+        """
+        try:
+            conditions = json.loads(expression)
+        except ValueError as err:
+            raise ValueError("The filter is not valid JSON: " + str(err))
+
+        if not isinstance(conditions, dict) or not conditions:
+            raise ValueError("The filter must be a non-empty object of conditions")
+
+        if len(conditions) > ItemFilter.MAX_CONDITION_COUNT:
+            raise ValueError(
+                "The filter can't have more than "
+                + str(ItemFilter.MAX_CONDITION_COUNT)
+                + " conditions"
+            )
+        return conditions
+
+    @staticmethod
+    def __compile_condition(path: str, condition):
+        """
+        Returns the function checking a value against the condition on path
+        """
+        if not isinstance(condition, dict):
+            return ItemFilter.__is_equal(condition)
+
+        if not condition or not set(condition) <= ItemFilter.OPERATORS:
+            raise ValueError(
+                "The condition on "
+                + path
+                + " must use the operators "
+                + ", ".join(sorted(ItemFilter.OPERATORS))
+            )
+
+        checks = []
+        for operator, operand in condition.items():
+            if operator == ItemFilter.EQUAL_OPERATOR:
+                checks.append(ItemFilter.__is_equal(operand))
+            elif operator == ItemFilter.IN_OPERATOR:
+                if not isinstance(operand, list):
+                    raise ValueError("The in operand on " + path + " must be a list")
+                checks.append(ItemFilter.__is_in(operand))
+            else:
+                if isinstance(operand, (dict, list, bool)) or operand is None:
+                    raise ValueError(
+                        "The "
+                        + operator
+                        + " operand on "
+                        + path
+                        + " must be a number or a string"
+                    )
+                checks.append(
+                    ItemFilter.__compare(ItemFilter.COMPARISONS[operator], operand)
+                )
+
+        return lambda value: all(check(value) for check in checks)
+
+    @staticmethod
+    def __is_equal(operand):
+        """
+        Returns the function checking that a value is equal to operand, comparing
+        their canonical JSON like secondary indexes do
+        """
+        canonical_operand = ItemFilter.get_canonical_value(operand)
+        return lambda value: ItemFilter.get_canonical_value(value) == canonical_operand
+
+    @staticmethod
+    def __is_in(operands: list):
+        """
+        Returns the function checking that a value is one of operands. Values are
+        compared by their canonical JSON, so lists and objects can be looked up too
+        """
+        canonical_operands = {
+            ItemFilter.get_canonical_value(operand) for operand in operands
+        }
+        return (
+            lambda value: ItemFilter.get_canonical_value(value) in canonical_operands
+        )
+
+    @staticmethod
+    def __compare(compare, operand):
+        """
+        Returns the function comparing a value with operand. Booleans are not
+        ordered, even though Python orders them as numbers
+        """
+        return lambda value: not isinstance(value, bool) and compare(value, operand)
+
+    @staticmethod
+    def split_path(path: str):
+        """
+        Returns the segments of a dotted path, numbers being list indices
+        """
+        if not isinstance(path, str) or not path.strip():
+            raise ValueError("Paths can't be empty")
+
+        return tuple(
+            int(segment) if segment.isdigit() else segment
+            for segment in path.strip().split(ItemFilter.PATH_SEPARATOR)
+        )
+
+    @staticmethod
+    def get_value(item, path: tuple):
+        """
+        Returns the value at a path split by split_path in the item, or MISSING if
+        there is none
+        """
+        value = item
+        for segment in path:
+            if isinstance(value, dict) and str(segment) in value:
+                value = value[str(segment)]
+            elif (
+                isinstance(value, list)
+                and isinstance(segment, int)
+                and segment < len(value)
+            ):
+                value = value[segment]
+            else:
+                return ItemFilter.MISSING
+        return value
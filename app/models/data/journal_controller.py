@@ -0,0 +1,510 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import unquote
+
+from app.models.cache.stream_query_cache import StreamQueryCache
+from app.models.data.data_controller import DataController
+from app.models.exception.multichain_error import MultiChainError
+from app.models.rpc.rpc_controller import RpcController
+from app.models.storage.storage_controller import StorageController
+from app.models.transaction.transaction_controller import TransactionController
+
+
+class ChainJournal:
+    UNREADABLE_FIELD = "unreadableLine"
+    READ_BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, journal_path: str, state_path: str, rejected_path: str):
+        self._lock = threading.Lock()
+        self._journal_path = journal_path
+        self._state_path = state_path
+        self._rejected_path = rejected_path
+        self._replayer = None
+        self._replayed_count = 0
+        self._rejected_count = 0
+        self._last_error = None
+
+        state = StorageController.read_json(state_path, {})
+        self._offset = state.get("offset", 0)
+        self._next_sequence = state.get("nextSequence", 0)
+
+        # A crash during an append leaves a partly written last line, which is cut so
+        # the next entry doesn't get appended to it
+        #
+        journal_size = ChainJournal.__truncate_partial_line(journal_path)
+
+        # The journal is truncated before the state is written, the offset of a
+        # journal truncated right before a crash is past its end
+        #
+        if self._offset > journal_size:
+            self._offset = 0
+
+        # Entries appended since the state was last written are pending, so they are
+        # counted once when the journal is loaded. Lines that can't be read are
+        # counted too, they are rejected when replayed
+        #
+        self._pending_times = []
+        for entry, _ in ChainJournal.__read_entries(journal_path, self._offset):
+            self._pending_times.append(entry.get("journaledAt", time.time()))
+            if "sequence" in entry:
+                self._next_sequence = max(self._next_sequence, entry["sequence"] + 1)
+
+    def get_lock(self):
+        return self._lock
+
+    def get_replayer(self):
+        return self._replayer
+
+    def set_replayer(self, replayer):
+        self._replayer = replayer
+
+    def get_pending_count(self):
+        return len(self._pending_times)
+
+    def set_last_error(self, last_error):
+        self._last_error = last_error
+
+    def append(self, entry: dict):
+        """
+        Appends the entry to the journal file, flushed to disk before returning.
+        Returns the sequence number of the entry
+        """
+        entry["sequence"] = self._next_sequence
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        os.makedirs(os.path.dirname(self._journal_path), exist_ok=True)
+        with open(self._journal_path, "a") as journal_file:
+            journal_size = journal_file.tell()
+            try:
+                journal_file.write(line)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            except OSError as err:
+                # A failed write, when the disk is full for instance, mustn't leave
+                # part of the line behind
+                #
+                journal_file.truncate(journal_size)
+                raise err
+
+        self._next_sequence += 1
+        self._pending_times.append(entry["journaledAt"])
+        return entry["sequence"]
+
+    def read_entries(self, max_count: int, max_bytes: int):
+        """
+        Returns the pending entries from the start of the journal, at most max_count
+        of them and max_bytes of them unless the first one is larger, each with the
+        offset of the entry following it. A line that can't be read is returned as
+        an entry holding it in its UNREADABLE_FIELD
+        """
+        entries = []
+        size = 0
+        for entry, next_offset in ChainJournal.__read_entries(
+            self._journal_path, self._offset
+        ):
+            size += len(json.dumps(entry.get("data")))
+            if entries and (len(entries) >= max_count or size > max_bytes):
+                break
+            entries.append((entry, next_offset))
+        return entries
+
+    def commit(self, next_offset: int, replayed_count: int, rejected_count: int):
+        """
+        Marks the entries before next_offset as replayed. The journal file is
+        truncated once all its entries are replayed
+        """
+        self._offset = next_offset
+        del self._pending_times[: replayed_count + rejected_count]
+        self._replayed_count += replayed_count
+        self._rejected_count += rejected_count
+        self._last_error = None
+
+        if not self._pending_times:
+            with open(self._journal_path, "w"):
+                pass
+            self._offset = 0
+        StorageController.write_json(
+            self._state_path,
+            {"offset": self._offset, "nextSequence": self._next_sequence},
+        )
+
+    def discard_pending(self, error: str):
+        """
+        Forgets the pending entries when none can be read anymore, which would
+        otherwise be retried forever
+        """
+        self.commit(self._offset, 0, len(self._pending_times))
+        self._last_error = error
+
+    def reject(self, entry: dict, error: str):
+        """
+        Records an entry the daemon refused in the rejected entries file
+        """
+        with open(self._rejected_path, "a") as rejected_file:
+            rejected_file.write(json.dumps(dict(entry, error=error)) + "\n")
+            rejected_file.flush()
+            os.fsync(rejected_file.fileno())
+
+    def to_json(self):
+        return {
+            "pendingEntries": len(self._pending_times),
+            "lagSeconds": (
+                time.time() - self._pending_times[0] if self._pending_times else 0
+            ),
+            "replayedEntries": self._replayed_count,
+            "rejectedEntries": self._rejected_count,
+            "lastError": self._last_error,
+        }
+
+    @staticmethod
+    def __truncate_partial_line(journal_path: str):
+        """
+        Cuts the journal file after its last complete line. Returns its size
+        """
+        if not os.path.isfile(journal_path):
+            return 0
+
+        with open(journal_path, "rb+") as journal_file:
+            journal_size = journal_file.seek(0, os.SEEK_END)
+            complete_size = journal_size
+            while complete_size > 0:
+                block_start = max(complete_size - ChainJournal.READ_BLOCK_SIZE, 0)
+                journal_file.seek(block_start)
+                block = journal_file.read(complete_size - block_start)
+                newline_index = block.rfind(b"\n")
+                if newline_index >= 0:
+                    complete_size = block_start + newline_index + 1
+                    break
+                complete_size = block_start
+
+            if complete_size < journal_size:
+                journal_file.truncate(complete_size)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+        return complete_size
+
+    @staticmethod
+    def __read_entries(journal_path: str, offset: int):
+        """
+        Yields the complete entries of the journal file from offset, each with the
+        offset of the entry following it. A partly written last line is ignored, and
+        a line that isn't a JSON object is yielded as an entry holding it in its
+        UNREADABLE_FIELD
+        """
+        if not os.path.isfile(journal_path):
+            return
+
+        with open(journal_path, "rb") as journal_file:
+            journal_file.seek(offset)
+            for line in journal_file:
+                if not line.endswith(b"\n"):
+                    return
+                offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+                if not isinstance(entry, dict):
+                    entry = {
+                        ChainJournal.UNREADABLE_FIELD: line.decode(errors="replace")
+                    }
+                yield entry, offset
+
+
+class JournalController:
+    JOURNAL_DIRECTORY = "journals"
+    JOURNAL_FILE_NAME = "journal.ndjson"
+    STATE_FILE_NAME = "state.json"
+    REJECTED_FILE_NAME = "rejected.ndjson"
+    PUBLISH_MULTI_ARG = "publishmulti"
+    MAX_BATCH_SIZE = 500
+    MAX_BATCH_BYTES = 512 * 1024
+    RETRY_INTERVAL = 2.0
+    # Codes of the errors refusing an item itself: invalid parameters or data, stream
+    # not found. Any other error, such as a locked wallet, a missing permission or an
+    # unavailable daemon, applies to every item and is retried
+    ITEM_ERROR_CODES = {"-3", "-8", "-708", "-32602"}
+
+    _lock = threading.Lock()
+    _journals = {}
+
+    @staticmethod
+    def append(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        data: str,
+        codec: str = DataController.DEFAULT_CODEC_VALUE,
+        dedup: bool = DataController.DEFAULT_DEDUP_VALUE,
+    ):
+        """
+        Appends an item to the local journal of the chain instead of publishing it
+        right away, so it is acknowledged even while multichaind is unavailable. The
+        journal is flushed to disk before returning, and its items are published in
+        order, in publishmulti batches, by a background replayer retrying until the
+        daemon is available. An item may be published twice if the server stops
+        between its publication and the journal recording it.
+        Returns the sequence number of the item in the journal.
+        """
+        try:
+            if not data:
+                raise ValueError("The data can't be empty")
+
+            # The item is acknowledged once journaled, so it is checked like
+            # publish_item would before, only the daemon can refuse it afterwards
+            #
+            blockchain_name, stream, keys, _ = DataController.validate_item(
+                blockchain_name, stream, keys, data, codec
+            )
+
+            journal = JournalController.__get_journal(blockchain_name)
+            with journal.get_lock():
+                sequence = journal.append(
+                    {
+                        "stream": stream,
+                        "keys": keys,
+                        "data": data,
+                        "codec": codec,
+                        "dedup": dedup,
+                        "journaledAt": time.time(),
+                    }
+                )
+                JournalController.__start_replayer(blockchain_name, journal)
+            return sequence
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def resume_replays():
+        """
+        Starts replaying the journals left with pending items by a previous run
+        """
+        journal_directory = StorageController.get_path(
+            JournalController.JOURNAL_DIRECTORY
+        )
+        if not os.path.isdir(journal_directory):
+            return
+
+        for directory_name in os.listdir(journal_directory):
+            blockchain_name = unquote(directory_name)
+            journal = JournalController.__get_journal(blockchain_name)
+            with journal.get_lock():
+                if journal.get_pending_count():
+                    JournalController.__start_replayer(blockchain_name, journal)
+
+    @staticmethod
+    def get_stats():
+        """
+        Returns, for every chain with a journal, the number of items waiting to be
+        published, the age in seconds of the oldest one, and the number of items
+        published and rejected by the daemon since the server started
+        """
+        with JournalController._lock:
+            journals = dict(JournalController._journals)
+
+        stats = {}
+        for blockchain_name, journal in journals.items():
+            with journal.get_lock():
+                stats[blockchain_name] = journal.to_json()
+        return stats
+
+    @staticmethod
+    def __get_journal(blockchain_name: str):
+        """
+        Returns the journal of the chain, loaded from the local storage
+        """
+        with JournalController._lock:
+            journal = JournalController._journals.get(blockchain_name)
+            if journal is None:
+                journal = ChainJournal(
+                    *[
+                        StorageController.get_path(
+                            JournalController.JOURNAL_DIRECTORY,
+                            blockchain_name,
+                            file_name,
+                        )
+                        for file_name in (
+                            JournalController.JOURNAL_FILE_NAME,
+                            JournalController.STATE_FILE_NAME,
+                            JournalController.REJECTED_FILE_NAME,
+                        )
+                    ]
+                )
+                JournalController._journals[blockchain_name] = journal
+        return journal
+
+    @staticmethod
+    def __start_replayer(blockchain_name: str, journal: ChainJournal):
+        """
+        Starts the replayer of the journal if it isn't running. Must be called with
+        the lock of the journal held
+        """
+        replayer = journal.get_replayer()
+        if replayer is not None and replayer.is_alive():
+            return
+
+        replayer = threading.Thread(
+            target=JournalController.__replay,
+            args=(blockchain_name, journal),
+            daemon=True,
+        )
+        journal.set_replayer(replayer)
+        replayer.start()
+
+    @staticmethod
+    def __replay(blockchain_name: str, journal: ChainJournal):
+        """
+        Publishes the pending items of the journal in order, until there are none
+        left. Batches are retried every RETRY_INTERVAL seconds while the daemon is
+        unavailable. Items refused by the daemon are moved to the rejected entries
+        file, so they don't block the items following them.
+        """
+        while True:
+            with journal.get_lock():
+                if not journal.get_pending_count():
+                    journal.set_replayer(None)
+                    return
+                entries = journal.read_entries(
+                    JournalController.MAX_BATCH_SIZE, JournalController.MAX_BATCH_BYTES
+                )
+                if not entries:
+                    journal.discard_pending(
+                        "The pending entries can't be found in the journal"
+                    )
+                    journal.set_replayer(None)
+                    return
+
+            try:
+                JournalController.__publish_entries(blockchain_name, journal, entries)
+            except Exception as err:
+                with journal.get_lock():
+                    journal.set_last_error(JournalController.__get_error_message(err))
+                time.sleep(JournalController.RETRY_INTERVAL)
+
+    @staticmethod
+    def __publish_entries(blockchain_name: str, journal: ChainJournal, entries: list):
+        """
+        Publishes the entries in a single publishmulti transaction and marks them as
+        replayed. If the daemon refuses it, the entries are published one by one to
+        find the ones it refuses, marking them as replayed as they are published so
+        they aren't published again when the daemon becomes unavailable midway.
+        Only entries refused for themselves are rejected, see ITEM_ERROR_CODES, other
+        errors are raised so the entries are retried.
+        """
+        prepared_entries = []
+        for entry, next_offset in entries:
+            item, error = JournalController.__get_item(blockchain_name, entry)
+            prepared_entries.append((entry, next_offset, item, error))
+
+        try:
+            JournalController.__publish_items(
+                blockchain_name,
+                [item for _, _, item, _ in prepared_entries if item is not None],
+            )
+        except MultiChainError as err:
+            if not JournalController.__is_item_error(err):
+                raise err
+        else:
+            rejected_count = 0
+            for entry, _, item, error in prepared_entries:
+                if item is None:
+                    journal.reject(entry, error)
+                    rejected_count += 1
+            with journal.get_lock():
+                journal.commit(
+                    entries[-1][1], len(entries) - rejected_count, rejected_count
+                )
+            return
+
+        replayed_count, rejected_count = 0, 0
+        replayed_offset = None
+        try:
+            for entry, next_offset, item, error in prepared_entries:
+                if item is not None:
+                    try:
+                        JournalController.__publish_items(blockchain_name, [item])
+                        replayed_count += 1
+                    except MultiChainError as item_err:
+                        if not JournalController.__is_item_error(item_err):
+                            raise item_err
+                        error = item_err.get_error_message()
+                if error is not None:
+                    journal.reject(entry, error)
+                    rejected_count += 1
+                replayed_offset = next_offset
+        finally:
+            if replayed_offset is not None:
+                with journal.get_lock():
+                    journal.commit(replayed_offset, replayed_count, rejected_count)
+
+    @staticmethod
+    def __publish_items(blockchain_name: str, items: list):
+        """
+        Publishes items in a single publishmulti transaction
+        """
+        if not items:
+            return
+
+        transaction_id = RpcController.call(
+            blockchain_name,
+            JournalController.PUBLISH_MULTI_ARG,
+            [items[0]["for"], items],
+        )
+        TransactionController.track(blockchain_name, transaction_id)
+        for stream in {item["for"] for item in items}:
+            StreamQueryCache.invalidate_stream(blockchain_name, stream)
+
+    @staticmethod
+    def __get_item(blockchain_name: str, entry: dict):
+        """
+        Returns the journal entry as expected by publishmulti, encoded like
+        publish_item, and None, or None and the error to reject the entry with if it
+        is invalid or refused by the daemon. Other errors are raised
+        """
+        if ChainJournal.UNREADABLE_FIELD in entry:
+            return None, "The journal entry can't be read"
+
+        try:
+            DataController.validate_item(
+                blockchain_name,
+                entry["stream"],
+                entry["keys"],
+                entry["data"],
+                entry["codec"],
+            )
+        except (KeyError, TypeError, ValueError) as err:
+            return None, "The journal entry is invalid: " + str(err)
+
+        try:
+            _, stream, keys, item_data = DataController.prepare_item(
+                blockchain_name,
+                entry["stream"],
+                entry["keys"],
+                entry["data"],
+                entry["codec"],
+                entry["dedup"],
+            )
+        except MultiChainError as err:
+            if not JournalController.__is_item_error(err):
+                raise err
+            return None, err.get_error_message()
+        return {"for": stream, "keys": keys, "data": item_data}, None
+
+    @staticmethod
+    def __get_error_message(err: Exception):
+        """
+        Returns the message of an error, without the call details of MultiChainError
+        """
+        if isinstance(err, MultiChainError):
+            return err.get_error_message()
+        return str(err)
+
+    @staticmethod
+    def __is_item_error(err: MultiChainError):
+        """
+        Returns whether the daemon refused a call because of the items published
+        """
+        return err.get_error_code() in JournalController.ITEM_ERROR_CODES
@@ -0,0 +1,273 @@
+import base64
+import binascii
+import bisect
+import heapq
+import json
+import threading
+import time
+
+from app.models.data.data_controller import DataController
+from app.models.rpc.rpc_controller import RpcController
+from app.models.storage.storage_controller import StorageController
+
+
+class StreamKeyIndex:
+    def __init__(self, keys, key_count):
+        self._lock = threading.Lock()
+        self._keys = keys
+        self._key_count = key_count
+        self._refreshed_at = None
+        self._saved_key_count = key_count
+        self._saved_at = time.monotonic()
+
+    def get_lock(self):
+        return self._lock
+
+    def get_keys(self):
+        return self._keys
+
+    def get_key_count(self):
+        return self._key_count
+
+    def get_refreshed_at(self):
+        return self._refreshed_at
+
+    def get_saved_key_count(self):
+        return self._saved_key_count
+
+    def get_saved_at(self):
+        return self._saved_at
+
+    def set_keys(self, keys, key_count):
+        self._keys = keys
+        self._key_count = key_count
+
+    def set_refreshed_at(self, refreshed_at):
+        self._refreshed_at = refreshed_at
+
+    def set_saved(self, saved_at):
+        self._saved_key_count = self._key_count
+        self._saved_at = saved_at
+
+
+class KeyIndexController:
+    INDEX_DIRECTORY = "key-indexes"
+    INDEX_EXTENSION = ".json"
+    REFRESH_INTERVAL = 1.0
+    PAGE_SIZE = 5000
+    SAVE_INTERVAL = 60.0
+    SAVE_KEY_COUNT = 100000
+    DEFAULT_SCAN_LIMIT_VALUE = 100
+    MAX_SCAN_LIMIT = 10000
+    DEFAULT_PREFIX_VALUE = None
+    DEFAULT_START_KEY_VALUE = None
+    DEFAULT_END_KEY_VALUE = None
+    DEFAULT_CURSOR_VALUE = None
+    DEFAULT_VERBOSE_VALUE = False
+    GET_STREAMS_ARG = "liststreams"
+    GET_STREAM_KEYS_ARG = "liststreamkeys"
+
+    _lock = threading.Lock()
+    _indexes = {}
+
+    @staticmethod
+    def scan_keys(
+        blockchain_name: str,
+        stream: str,
+        prefix: str = DEFAULT_PREFIX_VALUE,
+        start_key: str = DEFAULT_START_KEY_VALUE,
+        end_key: str = DEFAULT_END_KEY_VALUE,
+        limit: int = DEFAULT_SCAN_LIMIT_VALUE,
+        cursor: str = DEFAULT_CURSOR_VALUE,
+        verbose: bool = DEFAULT_VERBOSE_VALUE,
+    ):
+        """
+        Returns, in lexical order, the keys of stream that start with prefix and are
+        between start_key (included) and end_key (excluded), along with the cursor to
+        pass to get the next page, None once all keys were returned. The keys come from
+        a sorted index of the stream's keys, stored on disk and refreshed incrementally
+        with the keys that appeared since. Set verbose to true to return the
+        liststreamkeys information of every key instead of its name.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if limit <= 0 or limit > KeyIndexController.MAX_SCAN_LIMIT:
+                raise ValueError(
+                    "The limit must be between 1 and "
+                    + str(KeyIndexController.MAX_SCAN_LIMIT)
+                )
+
+            keys = KeyIndexController.__get_index(blockchain_name, stream).get_keys()
+
+            lower_key = max(filter(None, [prefix, start_key]), default="")
+            position = bisect.bisect_left(keys, lower_key)
+            if cursor:
+                position = max(
+                    position,
+                    bisect.bisect_right(
+                        keys, KeyIndexController.__decode_cursor(cursor)
+                    ),
+                )
+
+            def is_in_range(key):
+                return (end_key is None or key < end_key) and (
+                    not prefix or key.startswith(prefix)
+                )
+
+            page = []
+            while (
+                position < len(keys)
+                and len(page) < limit
+                and is_in_range(keys[position])
+            ):
+                page.append(keys[position])
+                position += 1
+
+            next_cursor = None
+            if page and position < len(keys) and is_in_range(keys[position]):
+                next_cursor = KeyIndexController.__encode_cursor(page[-1])
+
+            if verbose and page:
+                page = DataController.get_stream_keys(
+                    blockchain_name, stream, page, False, len(page), 0
+                )
+
+            return {"keys": page, "cursor": next_cursor}
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def __get_index(blockchain_name: str, stream: str):
+        """
+        Returns the key index of the stream, refreshed if it wasn't refreshed during
+        the last REFRESH_INTERVAL seconds
+        """
+        with KeyIndexController._lock:
+            index = KeyIndexController._indexes.get((blockchain_name, stream))
+            if index is None:
+                stored_index = StorageController.read_json(
+                    KeyIndexController.__get_index_path(blockchain_name, stream),
+                    {"keys": [], "keyCount": 0},
+                )
+                index = StreamKeyIndex(stored_index["keys"], stored_index["keyCount"])
+                KeyIndexController._indexes[(blockchain_name, stream)] = index
+
+        with index.get_lock():
+            refreshed_at = index.get_refreshed_at()
+            if (
+                refreshed_at is None
+                or time.monotonic() - refreshed_at
+                >= KeyIndexController.REFRESH_INTERVAL
+            ):
+                KeyIndexController.__refresh_index(blockchain_name, stream, index)
+                index.set_refreshed_at(time.monotonic())
+        return index
+
+    @staticmethod
+    def __refresh_index(blockchain_name: str, stream: str, index: StreamKeyIndex):
+        """
+        Adds the keys that appeared in the stream since the index was last refreshed.
+        liststreamkeys lists keys in the order they first appeared, so only the keys
+        past the number already indexed are retrieved, then merged at once into the
+        sorted keys. The index is rebuilt if the stream has fewer keys than indexed,
+        after a resubscription for instance. The index is saved once refreshed, see
+        __save_index.
+        """
+        streams = RpcController.call(
+            blockchain_name, KeyIndexController.GET_STREAMS_ARG, [stream, True]
+        )
+        key_count = streams[0].get("keys") if streams else None
+        if key_count is None:
+            raise ValueError(
+                "The node must be subscribed to the stream "
+                + stream
+                + " to scan its keys"
+            )
+
+        keys = index.get_keys()
+        indexed_key_count = index.get_key_count()
+        if key_count == indexed_key_count:
+            return
+
+        if key_count < indexed_key_count:
+            keys, indexed_key_count = [], 0
+
+        new_keys = []
+        while indexed_key_count < key_count:
+            entries = RpcController.call(
+                blockchain_name,
+                KeyIndexController.GET_STREAM_KEYS_ARG,
+                [stream, "*", False, KeyIndexController.PAGE_SIZE, indexed_key_count],
+            )
+            if not entries:
+                break
+
+            new_keys.extend(entry["key"] for entry in entries)
+            indexed_key_count += len(entries)
+
+        index.set_keys(list(heapq.merge(keys, sorted(new_keys))), indexed_key_count)
+        KeyIndexController.__save_index(blockchain_name, stream, index)
+
+    @staticmethod
+    def __save_index(blockchain_name: str, stream: str, index: StreamKeyIndex):
+        """
+        Writes the index to its file if SAVE_KEY_COUNT keys were added since it was
+        last saved, or if any key was and it was saved more than SAVE_INTERVAL seconds
+        ago, like AggregateController does. The keys added since the index was saved
+        are retrieved again after a restart.
+        """
+        added_count = index.get_key_count() - index.get_saved_key_count()
+        if added_count == 0 or (
+            0 < added_count < KeyIndexController.SAVE_KEY_COUNT
+            and time.monotonic() - index.get_saved_at()
+            < KeyIndexController.SAVE_INTERVAL
+        ):
+            return
+
+        StorageController.write_json(
+            KeyIndexController.__get_index_path(blockchain_name, stream),
+            {"keys": index.get_keys(), "keyCount": index.get_key_count()},
+        )
+        index.set_saved(time.monotonic())
+
+    @staticmethod
+    def __get_index_path(blockchain_name: str, stream: str):
+        """
+        Returns the path of the file the key index of the stream is stored in
+        """
+        return StorageController.get_path(
+            KeyIndexController.INDEX_DIRECTORY,
+            blockchain_name,
+            stream + KeyIndexController.INDEX_EXTENSION,
+        )
+
+    @staticmethod
+    def __encode_cursor(key: str):
+        """
+        Returns the opaque cursor pointing after the key
+        """
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    @staticmethod
+    def __decode_cursor(cursor: str):
+        """
+        Returns the key a cursor points after
+        """
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, binascii.Error):
+            raise ValueError("The cursor is invalid")
+
+        if not isinstance(key, str):
+            raise ValueError("The cursor is invalid")
+        return key
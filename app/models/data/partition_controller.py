@@ -0,0 +1,337 @@
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import threading
+import zlib
+
+from app.models.data.data_controller import DataController
+from app.models.data.data_stream_controller import DataStreamController
+from app.models.data.payload_codec import PayloadCodec
+from app.models.data.query_controller import QueryController
+from app.models.rpc.rpc_controller import RpcController
+from app.models.transaction.transaction_controller import TransactionController
+
+
+class PartitionController:
+    PARTITION_SEPARATOR = "-p"
+    PARTITIONS_DETAIL = "partitions"
+    DEFAULT_PARTITION_COUNT = 4
+    MAX_PARTITION_COUNT = 64
+    MAX_SCAN_WORKERS = 8
+    DEFAULT_LIMIT_VALUE = QueryController.DEFAULT_UNION_LIMIT_VALUE
+    MAX_LIMIT = QueryController.MAX_UNION_LIMIT
+    DEFAULT_CURSOR_VALUE = QueryController.DEFAULT_CURSOR_VALUE
+    STREAM_FIELD_NAME = QueryController.STREAM_FIELD_NAME
+    CREATE_ARG = "create"
+    STREAM_ARG = "stream"
+    GET_STREAMS_ARG = "liststreams"
+
+    _executor = ThreadPoolExecutor(max_workers=MAX_SCAN_WORKERS)
+    _lock = threading.Lock()
+    _partition_counts = {}
+
+    @staticmethod
+    def create_partitioned_stream(
+        blockchain_name: str,
+        stream_name: str,
+        is_open: bool,
+        partition_count: int = DEFAULT_PARTITION_COUNT,
+        encoding: str = DataStreamController.DEFAULT_ENCODING_VALUE,
+        packed_arrays: dict = DataStreamController.DEFAULT_PACKED_ARRAYS_VALUE,
+    ):
+        """
+        Creates a logical stream spread over partition_count physical streams, named
+        after the logical stream with the -p0, -p1... suffixes. Items are published to
+        the partition of their first key, so writes and key lookups of a hot stream
+        are spread over several stream indexes. The logical stream holds no items, its
+        custom fields record the number of partitions, and it is created last so it is
+        only found once all its partitions exist.
+        Returns the names of the partitions and the txids of the transactions
+        creating the streams.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            stream_name = stream_name.strip()
+            if not stream_name:
+                raise ValueError("Stream name can't be empty")
+
+            if (
+                partition_count < 2
+                or partition_count > PartitionController.MAX_PARTITION_COUNT
+            ):
+                raise ValueError(
+                    "The number of partitions must be between 2 and "
+                    + str(PartitionController.MAX_PARTITION_COUNT)
+                )
+
+            partitions = [
+                PartitionController.get_partition_name(stream_name, index)
+                for index in range(partition_count)
+            ]
+            transaction_ids = [
+                DataStreamController.create_stream(
+                    blockchain_name, partition, is_open, encoding, packed_arrays
+                ).decode("utf-8")
+                for partition in partitions
+            ]
+
+            details = PayloadCodec.get_stream_details(encoding, packed_arrays)
+            details[PartitionController.PARTITIONS_DETAIL] = str(partition_count)
+            transaction_id = RpcController.call(
+                blockchain_name,
+                PartitionController.CREATE_ARG,
+                [PartitionController.STREAM_ARG, stream_name, is_open, details],
+            )
+            TransactionController.track(blockchain_name, transaction_id)
+            with PartitionController._lock:
+                PartitionController._partition_counts[
+                    (blockchain_name, stream_name)
+                ] = partition_count
+
+            return {
+                "partitions": partitions,
+                "transactionIDs": transaction_ids + [transaction_id],
+            }
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_partition_name(stream_name: str, index: int):
+        """
+        Returns the name of the physical stream of a partition of a logical stream
+        """
+        return stream_name + PartitionController.PARTITION_SEPARATOR + str(index)
+
+    @staticmethod
+    def get_partition(blockchain_name: str, stream_name: str, key: str):
+        """
+        Returns the name of the partition of the logical stream that the items of key
+        are published to. Keys are routed by their CRC-32, which is stable across
+        processes unlike Python's hash
+        """
+        partition_count = PartitionController.get_partition_count(
+            blockchain_name, stream_name
+        )
+        return PartitionController.get_partition_name(
+            stream_name, zlib.crc32(key.encode()) % partition_count
+        )
+
+    @staticmethod
+    def get_partition_count(blockchain_name: str, stream_name: str):
+        """
+        Returns the number of partitions of the logical stream, read from its custom
+        fields, where it is stored as a string like the other custom fields. It can't
+        change once the stream is created, so it is only retrieved once.
+        """
+        with PartitionController._lock:
+            partition_count = PartitionController._partition_counts.get(
+                (blockchain_name, stream_name)
+            )
+        if partition_count is not None:
+            return partition_count
+
+        streams = RpcController.call(
+            blockchain_name, PartitionController.GET_STREAMS_ARG, [stream_name, True]
+        )
+        details = (streams[0].get("details") if streams else None) or {}
+        try:
+            partition_count = int(details[PartitionController.PARTITIONS_DETAIL])
+        except (KeyError, TypeError, ValueError):
+            partition_count = 0
+        if partition_count <= 0:
+            raise ValueError("The stream " + stream_name + " is not partitioned")
+
+        with PartitionController._lock:
+            PartitionController._partition_counts[
+                (blockchain_name, stream_name)
+            ] = partition_count
+        return partition_count
+
+    @staticmethod
+    def publish_item(
+        blockchain_name: str,
+        stream_name: str,
+        keys: list,
+        data: str,
+        codec: str = DataController.DEFAULT_CODEC_VALUE,
+        dedup: bool = DataController.DEFAULT_DEDUP_VALUE,
+    ):
+        """
+        Publishes an item in the partition of its first key of a logical stream, see
+        DataController.publish_item. Returns the name of the partition and the txid
+        of the item.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream_name = stream_name.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not stream_name:
+                raise ValueError("Stream name can't be empty")
+
+            if not keys or not keys[0].strip():
+                raise ValueError("Keys can't be empty")
+
+            partition = PartitionController.get_partition(
+                blockchain_name, stream_name, keys[0].strip()
+            )
+            transaction_id = DataController.publish_item(
+                blockchain_name, partition, keys, data, codec, dedup
+            )
+            return partition, transaction_id
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_items_by_key(
+        blockchain_name: str,
+        stream_name: str,
+        key: str,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Retrieves the items of a key from a logical stream, only querying the
+        partition its items were published to. Only the items whose first key is key
+        are in that partition, see publish_item.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream_name = stream_name.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not stream_name:
+                raise ValueError("Stream name can't be empty")
+
+            if not key or not key.strip():
+                raise ValueError("Key can't be empty")
+
+            partition = PartitionController.get_partition(
+                blockchain_name, stream_name, key.strip()
+            )
+            return DataController.get_items_by_key(
+                blockchain_name,
+                partition,
+                key.strip(),
+                verbose,
+                count,
+                start,
+                local_ordering,
+            )
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_stream_items(
+        blockchain_name: str,
+        stream_name: str,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        limit: int = DEFAULT_LIMIT_VALUE,
+        cursor: str = DEFAULT_CURSOR_VALUE,
+    ):
+        """
+        Retrieves the items of a logical stream, oldest first. The partitions are
+        queried concurrently from where the previous page stopped in each of them, and
+        their items are merged in chain order, each annotated with the name of its
+        partition. Returns at most limit items and the cursor to pass to get the next
+        page, None once all items were returned.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream_name = stream_name.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not stream_name:
+                raise ValueError("Stream name can't be empty")
+
+            if limit <= 0 or limit > PartitionController.MAX_LIMIT:
+                raise ValueError(
+                    "The limit must be between 1 and "
+                    + str(PartitionController.MAX_LIMIT)
+                )
+
+            offsets = QueryController.decode_cursor(cursor)
+            partitions = [
+                PartitionController.get_partition_name(stream_name, index)
+                for index in range(
+                    PartitionController.get_partition_count(
+                        blockchain_name, stream_name
+                    )
+                )
+            ]
+            # Items are always fetched verbose, their block index and vout are needed to
+            # merge them in chain order
+            #
+            futures = [
+                PartitionController._executor.submit(
+                    DataController.get_stream_items,
+                    blockchain_name,
+                    partition,
+                    True,
+                    limit,
+                    offsets.get(partition, 0),
+                )
+                for partition in partitions
+            ]
+            partition_items = [
+                [
+                    dict(item, **{PartitionController.STREAM_FIELD_NAME: partition})
+                    for item in future.result()
+                ]
+                for partition, future in zip(partitions, futures)
+            ]
+
+            # Every partition returned up to limit items following its offset, so the
+            # first limit items of the merge are the next ones of the logical stream
+            #
+            items = list(
+                itertools.islice(
+                    heapq.merge(
+                        *partition_items, key=QueryController.get_chain_position
+                    ),
+                    limit,
+                )
+            )
+            consumed = collections.Counter(
+                item[PartitionController.STREAM_FIELD_NAME] for item in items
+            )
+
+            has_more = any(
+                consumed[partition] < len(fetched_items) or len(fetched_items) == limit
+                for partition, fetched_items in zip(partitions, partition_items)
+            )
+            next_cursor = None
+            if has_more:
+                next_cursor = QueryController.encode_cursor(
+                    {
+                        partition: offsets.get(partition, 0) + consumed[partition]
+                        for partition in partitions
+                    }
+                )
+
+            if not verbose:
+                items = QueryController.strip_verbose_fields(items)
+
+            return {"items": items, "cursor": next_cursor}
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
@@ -0,0 +1,689 @@
+import array
+import json
+import struct
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+from app.models.data.content_store import ContentStore
+from app.models.exception.multichain_error import MultiChainError
+from app.models.rpc.rpc_controller import RpcController
+
+
+class PayloadCodec:
+    MAGIC = b"TLC"
+    VERSION = 1
+    HEADER_FORMAT = ">3sBBBI"
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    ENCODING_JSON = 0
+    ENCODING_MSGPACK = 1
+    ENCODING_CBOR = 2
+    ENCODING_REFERENCE = 3
+    JSON_ENCODING = "json"
+    MSGPACK_ENCODING = "msgpack"
+    CBOR_ENCODING = "cbor"
+    ENCODINGS = {
+        JSON_ENCODING: ENCODING_JSON,
+        MSGPACK_ENCODING: ENCODING_MSGPACK,
+        CBOR_ENCODING: ENCODING_CBOR,
+    }
+    ENCODING_DETAIL = "encoding"
+    PACKED_ARRAYS_DETAIL = "packedArrays"
+    PACKED_ARRAY_EXT_TYPE = 1
+    # RFC 8746 little endian typed array tags, by array module type code
+    #
+    PACKED_ARRAY_CBOR_TAGS = {
+        "b": 72,
+        "B": 64,
+        "h": 77,
+        "H": 69,
+        "i": 78,
+        "I": 70,
+        "q": 79,
+        "Q": 71,
+        "f": 85,
+        "d": 86,
+    }
+    PACKED_ARRAY_TYPE_CODES = {
+        tag: type_code for type_code, tag in PACKED_ARRAY_CBOR_TAGS.items()
+    }
+    FLOAT_TYPE_CODES = {"f", "d"}
+    COMPRESSION_NONE = 0
+    COMPRESSION_ZLIB = 1
+    COMPRESSION_ZSTD = 2
+    NO_DICTIONARY_ID = 0
+    ZLIB_CODEC = "zlib"
+    ZSTD_CODEC = "zstd"
+    ZSTD_DICTIONARY_CODEC = "zstd-dictionary"
+    CODECS = {ZLIB_CODEC, ZSTD_CODEC, ZSTD_DICTIONARY_CODEC}
+    ZLIB_LEVEL = 9
+    ZSTD_LEVEL = 19
+    DICTIONARY_STREAM_NAME = "codec-dictionaries"
+    DICTIONARY_KEY_PREFIX = "dictionary:"
+    STREAM_KEY_PREFIX = "stream:"
+    STREAM_DICTIONARY_TTL = 60.0
+    GET_STREAM_KEY_ITEMS_ARG = "liststreamkeyitems"
+    GET_TX_OUT_DATA_ARG = "gettxoutdata"
+    GET_STREAMS_ARG = "liststreams"
+    STREAM_NOT_FOUND_ERROR_CODE = "-708"
+
+    _lock = threading.Lock()
+    _dictionaries = {}
+    _stream_dictionaries = {}
+    _stream_encodings = {}
+
+    @staticmethod
+    def encode(blockchain_name: str, stream: str, value, codec: str = None):
+        """
+        Returns the hex encoding of the value serialized with the stream's encoding,
+        compressed with the codec and prefixed with a header identifying how it was
+        encoded. None is returned when the stream uses JSON and no codec is requested,
+        or when compression doesn't make the payload smaller than its JSON form, in
+        which case the value should be published as plain JSON.
+        """
+        PayloadCodec.check_codec(codec)
+
+        encoding, packed_arrays = PayloadCodec.get_stream_encoding(
+            blockchain_name, stream
+        )
+        if codec is None and encoding == PayloadCodec.JSON_ENCODING:
+            return None
+
+        payload = PayloadCodec.serialize(value, encoding, packed_arrays)
+        dictionary_id = PayloadCodec.NO_DICTIONARY_ID
+
+        if codec is None:
+            compression = PayloadCodec.COMPRESSION_NONE
+            body = payload
+        elif codec == PayloadCodec.ZLIB_CODEC:
+            compression = PayloadCodec.COMPRESSION_ZLIB
+            body = zlib.compress(payload, PayloadCodec.ZLIB_LEVEL)
+        else:
+            PayloadCodec.__check_zstd_is_installed()
+            compression = PayloadCodec.COMPRESSION_ZSTD
+            dictionary = None
+            if codec == PayloadCodec.ZSTD_DICTIONARY_CODEC:
+                dictionary_id = PayloadCodec.__get_stream_dictionary_id(
+                    blockchain_name, stream
+                )
+                dictionary = PayloadCodec.__get_dictionary(
+                    blockchain_name, dictionary_id
+                )
+            compressor = zstandard.ZstdCompressor(
+                level=PayloadCodec.ZSTD_LEVEL, dict_data=dictionary
+            )
+            body = compressor.compress(payload)
+
+        header = struct.pack(
+            PayloadCodec.HEADER_FORMAT,
+            PayloadCodec.MAGIC,
+            PayloadCodec.VERSION,
+            PayloadCodec.ENCODINGS[encoding],
+            compression,
+            dictionary_id,
+        )
+        if codec is not None and len(header) + len(body) >= len(
+            json.dumps({"json": value})
+        ):
+            return None
+
+        return (header + body).hex()
+
+    @staticmethod
+    def decode_items(blockchain_name: str, items):
+        """
+        Returns the items with the data of every encoded item replaced by the JSON object
+        it was published as. Items that weren't encoded are returned unchanged, and the
+        items passed in are not modified
+        """
+        if not isinstance(items, list):
+            return items
+
+        # Resolves all the content references at once, decode_data then finds them
+        # in the content store's cache
+        #
+        digests = [
+            PayloadCodec.get_reference(item.get("data"))
+            for item in items
+            if isinstance(item, dict)
+        ]
+        digests = [digest for digest in digests if digest is not None]
+        if digests:
+            try:
+                ContentStore.resolve_many(blockchain_name, digests)
+            except MultiChainError:
+                pass
+
+        decoded_items = items
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            data = item.get("data")
+            decoded_data = PayloadCodec.decode_data(blockchain_name, data)
+            if decoded_data is data:
+                continue
+            if decoded_items is items:
+                decoded_items = list(items)
+            decoded_items[index] = dict(item, data=decoded_data)
+        return decoded_items
+
+    @staticmethod
+    def check_codec(codec: str):
+        """
+        Raises a ValueError if the codec doesn't exist or the package it needs isn't
+        installed. None, for no codec, is valid
+        """
+        if codec is None:
+            return
+
+        if codec not in PayloadCodec.CODECS:
+            raise ValueError("The codec provided: " + str(codec) + " does not exist.")
+
+        if codec != PayloadCodec.ZLIB_CODEC:
+            PayloadCodec.__check_zstd_is_installed()
+
+    @staticmethod
+    def decode_data(blockchain_name: str, data):
+        """
+        Returns the data of an item as {"json": value} if it was encoded by this codec,
+        otherwise the data is returned as is. A ValueError is raised if the data was
+        encoded with an optional package that isn't installed, if its dictionary or
+        content can't be found, or if the payload is corrupted
+        """
+        if not PayloadCodec.is_encoded(data):
+            return data
+
+        try:
+            payload = bytes.fromhex(data)
+            magic, version, encoding, compression, dictionary_id = struct.unpack(
+                PayloadCodec.HEADER_FORMAT, payload[: PayloadCodec.HEADER_SIZE]
+            )
+        except (ValueError, struct.error):
+            return data
+
+        if version != PayloadCodec.VERSION:
+            return data
+
+        if compression == PayloadCodec.COMPRESSION_ZSTD:
+            PayloadCodec.__check_zstd_is_installed()
+        if encoding == PayloadCodec.ENCODING_MSGPACK:
+            PayloadCodec.__check_encoding_is_installed(PayloadCodec.MSGPACK_ENCODING)
+        if encoding == PayloadCodec.ENCODING_CBOR:
+            PayloadCodec.__check_encoding_is_installed(PayloadCodec.CBOR_ENCODING)
+
+        if encoding == PayloadCodec.ENCODING_REFERENCE:
+            return PayloadCodec.decode_data(
+                blockchain_name,
+                ContentStore.resolve(
+                    blockchain_name, payload[PayloadCodec.HEADER_SIZE :].hex()
+                ),
+            )
+
+        dictionary = None
+        if (
+            compression == PayloadCodec.COMPRESSION_ZSTD
+            and dictionary_id != PayloadCodec.NO_DICTIONARY_ID
+        ):
+            dictionary = PayloadCodec.__get_dictionary(blockchain_name, dictionary_id)
+
+        # Only the payload itself is decoded past this point, so any error means it is
+        # corrupted
+        #
+        try:
+            body = PayloadCodec.__decompress(
+                compression, dictionary, payload[PayloadCodec.HEADER_SIZE :]
+            )
+            value = PayloadCodec.__deserialize(encoding, body)
+        except Exception as err:
+            raise ValueError("The payload of the item can't be decoded: " + str(err))
+        return {"json": value}
+
+    @staticmethod
+    def serialize(value, encoding: str, packed_arrays: dict = None):
+        """
+        Returns the value serialized with the encoding. With MessagePack and CBOR, the
+        numeric arrays found at the paths of packed_arrays are packed as typed arrays
+        of the array module type code they are mapped to (ex. {"samples": "f"}). An
+        array that doesn't fit its type code is serialized as a regular array.
+        """
+        if encoding == PayloadCodec.JSON_ENCODING:
+            return json.dumps(value, separators=(",", ":")).encode()
+
+        PayloadCodec.__check_encoding_is_installed(encoding)
+        for path, type_code in (packed_arrays or {}).items():
+            value = PayloadCodec.__pack_array(
+                value, path.split("."), type_code, encoding
+            )
+
+        if encoding == PayloadCodec.MSGPACK_ENCODING:
+            return msgpack.packb(value, use_bin_type=True)
+        return cbor2.dumps(value)
+
+    @staticmethod
+    def get_stream_encoding(blockchain_name: str, stream: str):
+        """
+        Returns the encoding of the stream and the type codes of its packed arrays,
+        read from the stream's custom fields. Those can't change once the stream is
+        created, so they are only retrieved once.
+        """
+        with PayloadCodec._lock:
+            stream_encoding = PayloadCodec._stream_encodings.get(
+                (blockchain_name, stream)
+            )
+        if stream_encoding is not None:
+            return stream_encoding
+
+        # The publish that follows reports the error if the stream can't be found,
+        # other errors are reported right away
+        #
+        try:
+            streams = RpcController.call(
+                blockchain_name, PayloadCodec.GET_STREAMS_ARG, [stream, True]
+            )
+        except MultiChainError as err:
+            if err.get_error_code() != PayloadCodec.STREAM_NOT_FOUND_ERROR_CODE:
+                raise err
+            return PayloadCodec.JSON_ENCODING, {}
+        except OSError as err:
+            raise MultiChainError(
+                (
+                    "error: couldn't connect to the daemon of "
+                    + blockchain_name
+                    + " ("
+                    + str(err)
+                    + ")"
+                ).encode()
+            )
+
+        details = (streams[0].get("details") if streams else None) or {}
+        encoding = details.get(PayloadCodec.ENCODING_DETAIL, PayloadCodec.JSON_ENCODING)
+        packed_arrays = details.get(PayloadCodec.PACKED_ARRAYS_DETAIL) or {}
+        try:
+            if isinstance(packed_arrays, str):
+                packed_arrays = json.loads(packed_arrays)
+            PayloadCodec.get_stream_details(encoding, packed_arrays)
+        except ValueError:
+            encoding, packed_arrays = PayloadCodec.JSON_ENCODING, {}
+
+        PayloadCodec.set_stream_encoding(
+            blockchain_name, stream, encoding, packed_arrays
+        )
+        return encoding, packed_arrays
+
+    @staticmethod
+    def set_stream_encoding(
+        blockchain_name: str, stream: str, encoding: str, packed_arrays: dict
+    ):
+        """
+        Records the encoding of the stream and the type codes of its packed arrays
+        """
+        with PayloadCodec._lock:
+            PayloadCodec._stream_encodings[(blockchain_name, stream)] = (
+                encoding,
+                packed_arrays or {},
+            )
+
+    @staticmethod
+    def get_stream_details(encoding: str, packed_arrays: dict = None):
+        """
+        Validates the encoding and packed arrays of a stream and returns the custom
+        fields to create the stream with. The packed arrays are stored as a JSON
+        string since custom field values are strings on MultiChain 1.0
+        """
+        if encoding not in PayloadCodec.ENCODINGS:
+            raise ValueError(
+                "The encoding provided: " + str(encoding) + " does not exist."
+            )
+
+        packed_arrays = packed_arrays or {}
+        if not isinstance(packed_arrays, dict):
+            raise ValueError("The packed arrays must map field paths to type codes")
+
+        for path, type_code in packed_arrays.items():
+            if not isinstance(path, str) or not all(path.split(".")):
+                raise ValueError("The packed array path " + str(path) + " is invalid")
+            if type_code not in PayloadCodec.PACKED_ARRAY_CBOR_TAGS:
+                raise ValueError(
+                    "The packed array type code "
+                    + str(type_code)
+                    + " is not one of "
+                    + "".join(sorted(PayloadCodec.PACKED_ARRAY_CBOR_TAGS))
+                )
+
+        if encoding != PayloadCodec.JSON_ENCODING:
+            PayloadCodec.__check_encoding_is_installed(encoding)
+        elif packed_arrays:
+            raise ValueError("Arrays can only be packed with msgpack or cbor")
+
+        details = {PayloadCodec.ENCODING_DETAIL: encoding}
+        if packed_arrays:
+            details[PayloadCodec.PACKED_ARRAYS_DETAIL] = json.dumps(
+                packed_arrays, sort_keys=True
+            )
+        return details
+
+    @staticmethod
+    def encode_reference(digest: str):
+        """
+        Returns the hex encoding of a reference to the content stored under the hash
+        in the content store
+        """
+        header = struct.pack(
+            PayloadCodec.HEADER_FORMAT,
+            PayloadCodec.MAGIC,
+            PayloadCodec.VERSION,
+            PayloadCodec.ENCODING_REFERENCE,
+            PayloadCodec.COMPRESSION_NONE,
+            PayloadCodec.NO_DICTIONARY_ID,
+        )
+        return (header + bytes.fromhex(digest)).hex()
+
+    @staticmethod
+    def get_reference(data):
+        """
+        Returns the content hash referenced by the data of an item, or None if the
+        data isn't a content reference
+        """
+        if not PayloadCodec.is_encoded(data) or len(data) != 2 * (
+            PayloadCodec.HEADER_SIZE + ContentStore.DIGEST_SIZE
+        ):
+            return None
+
+        try:
+            payload = bytes.fromhex(data)
+        except ValueError:
+            return None
+
+        _, version, encoding, _, _ = struct.unpack(
+            PayloadCodec.HEADER_FORMAT, payload[: PayloadCodec.HEADER_SIZE]
+        )
+        if (
+            version != PayloadCodec.VERSION
+            or encoding != PayloadCodec.ENCODING_REFERENCE
+        ):
+            return None
+        return payload[PayloadCodec.HEADER_SIZE :].hex()
+
+    @staticmethod
+    def is_encoded(data):
+        """
+        Returns true if the data of an item starts with the codec header
+        """
+        return isinstance(data, str) and data[: 2 * len(PayloadCodec.MAGIC)] == (
+            PayloadCodec.MAGIC.hex()
+        )
+
+    @staticmethod
+    def train_dictionary(samples: list, dictionary_size: int):
+        """
+        Trains a zstd dictionary on the JSON values provided. Returns the id of the
+        dictionary and its content
+        """
+        PayloadCodec.__check_zstd_is_installed()
+
+        encoded_samples = [
+            json.dumps(sample, separators=(",", ":")).encode() for sample in samples
+        ]
+        dictionary = zstandard.train_dictionary(dictionary_size, encoded_samples)
+        return dictionary.dict_id(), dictionary.as_bytes()
+
+    @staticmethod
+    def set_stream_dictionary(
+        blockchain_name: str, stream: str, dictionary_id: int, dictionary_data: bytes
+    ):
+        """
+        Makes the dictionary the one used to compress the stream's items on this server
+        """
+        PayloadCodec.__check_zstd_is_installed()
+
+        with PayloadCodec._lock:
+            PayloadCodec._dictionaries[(blockchain_name, dictionary_id)] = (
+                zstandard.ZstdCompressionDict(dictionary_data)
+            )
+            PayloadCodec._stream_dictionaries[(blockchain_name, stream)] = (
+                dictionary_id,
+                time.monotonic(),
+            )
+
+    @staticmethod
+    def __decompress(compression, dictionary, body: bytes):
+        """
+        Returns the decompressed body of an encoded payload, dictionary being the zstd
+        dictionary it was compressed with if any
+        """
+        if compression == PayloadCodec.COMPRESSION_NONE:
+            return body
+
+        if compression == PayloadCodec.COMPRESSION_ZLIB:
+            return zlib.decompress(body)
+
+        if compression == PayloadCodec.COMPRESSION_ZSTD:
+            PayloadCodec.__check_zstd_is_installed()
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            return decompressor.decompress(body)
+
+        raise ValueError("Unknown compression: " + str(compression))
+
+    @staticmethod
+    def __deserialize(encoding, body: bytes):
+        """
+        Returns the value serialized in the body
+        """
+        if encoding == PayloadCodec.ENCODING_JSON:
+            return json.loads(body)
+
+        if encoding == PayloadCodec.ENCODING_MSGPACK:
+            PayloadCodec.__check_encoding_is_installed(PayloadCodec.MSGPACK_ENCODING)
+            return msgpack.unpackb(
+                body, raw=False, ext_hook=PayloadCodec.__unpack_msgpack_ext
+            )
+
+        if encoding == PayloadCodec.ENCODING_CBOR:
+            PayloadCodec.__check_encoding_is_installed(PayloadCodec.CBOR_ENCODING)
+            return cbor2.loads(body, tag_hook=PayloadCodec.__unpack_cbor_tag)
+
+        raise ValueError("Unknown encoding: " + str(encoding))
+
+    @staticmethod
+    def __pack_array(value, path: list, type_code: str, encoding: str):
+        """
+        Returns a copy of value with the numeric array at path packed as a typed array.
+        Values that don't hold a numeric array at path are returned unchanged
+        """
+        if path:
+            if not isinstance(value, dict) or path[0] not in value:
+                return value
+            packed_value = dict(value)
+            packed_value[path[0]] = PayloadCodec.__pack_array(
+                value[path[0]], path[1:], type_code, encoding
+            )
+            return packed_value
+
+        # Booleans are left unpacked, their type is bool rather than int
+        #
+        number_types = (
+            {int, float} if type_code in PayloadCodec.FLOAT_TYPE_CODES else {int}
+        )
+        if not isinstance(value, list) or not all(
+            type(number) in number_types for number in value
+        ):
+            return value
+
+        try:
+            packed_array = array.array(type_code, value)
+        except OverflowError:
+            return value
+
+        # Packed arrays are always little endian
+        #
+        if sys.byteorder == "big":
+            packed_array.byteswap()
+
+        if encoding == PayloadCodec.MSGPACK_ENCODING:
+            return msgpack.ExtType(
+                PayloadCodec.PACKED_ARRAY_EXT_TYPE,
+                type_code.encode() + packed_array.tobytes(),
+            )
+        return cbor2.CBORTag(
+            PayloadCodec.PACKED_ARRAY_CBOR_TAGS[type_code], packed_array.tobytes()
+        )
+
+    @staticmethod
+    def __unpack_array(type_code: str, data: bytes):
+        """
+        Returns the list of numbers held in a little endian typed array
+        """
+        unpacked_array = array.array(type_code)
+        unpacked_array.frombytes(data)
+        if sys.byteorder == "big":
+            unpacked_array.byteswap()
+        return unpacked_array.tolist()
+
+    @staticmethod
+    def __unpack_msgpack_ext(code: int, data: bytes):
+        """
+        Unpacks the MessagePack extension values used for packed arrays
+        """
+        if code != PayloadCodec.PACKED_ARRAY_EXT_TYPE:
+            return msgpack.ExtType(code, data)
+        return PayloadCodec.__unpack_array(chr(data[0]), data[1:])
+
+    @staticmethod
+    def __unpack_cbor_tag(*args):
+        """
+        Unpacks the CBOR typed array tags used for packed arrays. cbor2 5 calls the
+        hook with (decoder, tag) while cbor2 6 calls it with (tag, immutable)
+        """
+        tag = next(arg for arg in args if isinstance(arg, cbor2.CBORTag))
+        type_code = PayloadCodec.PACKED_ARRAY_TYPE_CODES.get(tag.tag)
+        if type_code is None or not isinstance(tag.value, bytes):
+            return tag
+        return PayloadCodec.__unpack_array(type_code, tag.value)
+
+    @staticmethod
+    def __get_stream_dictionary_id(blockchain_name: str, stream: str):
+        """
+        Returns the id of the most recent dictionary trained for the stream. The
+        dictionary stream is checked again every STREAM_DICTIONARY_TTL seconds
+        """
+        with PayloadCodec._lock:
+            stream_dictionary = PayloadCodec._stream_dictionaries.get(
+                (blockchain_name, stream)
+            )
+        if stream_dictionary is not None and (
+            time.monotonic() - stream_dictionary[1] < PayloadCodec.STREAM_DICTIONARY_TTL
+        ):
+            return stream_dictionary[0]
+
+        items = RpcController.call(
+            blockchain_name,
+            PayloadCodec.GET_STREAM_KEY_ITEMS_ARG,
+            [
+                PayloadCodec.DICTIONARY_STREAM_NAME,
+                PayloadCodec.STREAM_KEY_PREFIX + stream,
+                False,
+                1,
+                -1,
+            ],
+        )
+        if not items:
+            raise ValueError("No dictionary has been trained for the stream " + stream)
+
+        dictionary_id = PayloadCodec.__get_dictionary_id(items[0])
+        with PayloadCodec._lock:
+            PayloadCodec._stream_dictionaries[(blockchain_name, stream)] = (
+                dictionary_id,
+                time.monotonic(),
+            )
+        return dictionary_id
+
+    @staticmethod
+    def __get_dictionary(blockchain_name: str, dictionary_id: int):
+        """
+        Returns the zstd dictionary with the provided id, retrieving it from the
+        dictionary stream the first time it is used
+        """
+        with PayloadCodec._lock:
+            dictionary = PayloadCodec._dictionaries.get((blockchain_name, dictionary_id))
+        if dictionary is not None:
+            return dictionary
+
+        items = RpcController.call(
+            blockchain_name,
+            PayloadCodec.GET_STREAM_KEY_ITEMS_ARG,
+            [
+                PayloadCodec.DICTIONARY_STREAM_NAME,
+                PayloadCodec.DICTIONARY_KEY_PREFIX + str(dictionary_id),
+                False,
+                1,
+                0,
+            ],
+        )
+        if not items:
+            raise ValueError("The dictionary " + str(dictionary_id) + " was not found")
+
+        # Dictionaries are usually larger than maxshowndata, in which case the item
+        # only holds the txid and vout to retrieve them with
+        #
+        dictionary_data = items[0].get("data")
+        if isinstance(dictionary_data, dict) and "txid" in dictionary_data:
+            dictionary_data = RpcController.call(
+                blockchain_name,
+                PayloadCodec.GET_TX_OUT_DATA_ARG,
+                [dictionary_data["txid"], dictionary_data["vout"]],
+            )
+
+        dictionary = zstandard.ZstdCompressionDict(bytes.fromhex(dictionary_data))
+        with PayloadCodec._lock:
+            PayloadCodec._dictionaries[(blockchain_name, dictionary_id)] = dictionary
+        return dictionary
+
+    @staticmethod
+    def __get_dictionary_id(item: dict):
+        """
+        Returns the dictionary id of an item of the dictionary stream
+        """
+        for key in item.get("keys", []):
+            if key.startswith(PayloadCodec.DICTIONARY_KEY_PREFIX):
+                return int(key[len(PayloadCodec.DICTIONARY_KEY_PREFIX) :])
+        raise ValueError("The dictionary item has no dictionary key")
+
+    @staticmethod
+    def __check_encoding_is_installed(encoding: str):
+        """
+        Raises a ValueError if the optional package of the encoding isn't installed
+        """
+        if encoding == PayloadCodec.MSGPACK_ENCODING and msgpack is None:
+            raise ValueError(
+                "The msgpack package must be installed to use the msgpack encoding"
+            )
+        if encoding == PayloadCodec.CBOR_ENCODING and cbor2 is None:
+            raise ValueError(
+                "The cbor2 package must be installed to use the cbor encoding"
+            )
+
+    @staticmethod
+    def __check_zstd_is_installed():
+        """
+        Raises a ValueError if the optional zstandard package isn't installed
+        """
+        if zstandard is None:
+            raise ValueError(
+                "The zstandard package must be installed to use the zstd codecs"
+            )
@@ -0,0 +1,634 @@
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import binascii
+import bisect
+import heapq
+import json
+
+from app.models.data.data_controller import DataController
+from app.models.data.item_filter import ItemFilter
+from app.models.data.payload_codec import PayloadCodec
+from app.models.data.secondary_index_controller import SecondaryIndexController
+from app.models.exception.multichain_error import MultiChainError
+from app.models.rpc.rpc_controller import RpcController
+
+
+class QueryController:
+    MAX_QUERY_WORKERS = 8
+    MAX_STREAM_COUNT = 64
+    DEFAULT_LIMIT_VALUE = None
+    STREAM_FIELD_NAME = "stream"
+    MAX_KEY_COUNT = 1000
+    DEFAULT_UNION_LIMIT_VALUE = DataController.MAX_DATA_COUNT
+    MAX_UNION_LIMIT = 1000
+    DEFAULT_CURSOR_VALUE = None
+    GET_STREAM_KEY_ITEMS_ARG = "liststreamkeyitems"
+    GET_STREAM_ITEMS_ARG = "liststreamitems"
+    GET_STREAMS_ARG = "liststreams"
+    GET_STREAM_PUBLISHER_ITEMS_ARG = "liststreampublisheritems"
+    GET_STREAM_KEYS_ARG = "liststreamkeys"
+    GET_STREAM_PUBLISHERS_ARG = "liststreampublishers"
+    MAX_SCANNED_ITEMS = 10000
+    PAGE_SIZE = 500
+    DEFAULT_START_TIME_VALUE = 0
+    DEFAULT_END_TIME_VALUE = None
+    DEFAULT_TIME_RANGE_LIMIT_VALUE = 1000
+    MAX_TIME_RANGE_LIMIT = 10000
+    VERBOSE_ONLY_FIELDS = DataController.VERBOSE_ONLY_ITEM_FIELDS
+
+    _executor = ThreadPoolExecutor(max_workers=MAX_QUERY_WORKERS)
+
+    @staticmethod
+    def get_items_across_streams(
+        blockchain_name: str,
+        streams: list,
+        key: str = None,
+        publisher: str = None,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        limit: int = DEFAULT_LIMIT_VALUE,
+    ):
+        """
+        Retrieves the items of a key, or of a publisher, from several streams at once.
+        The streams are queried concurrently with count and start applied to each of
+        them, and their items are merged in chain order, each annotated with the name
+        of its stream. Set limit to only keep the most recent items of the merge.
+        Returns the items, and the error of every stream that couldn't be queried.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            streams = list(
+                dict.fromkeys(stream.strip() for stream in streams if stream.strip())
+            )
+            if not streams:
+                raise ValueError("Stream names can't be empty")
+
+            if len(streams) > QueryController.MAX_STREAM_COUNT:
+                raise ValueError(
+                    "At most "
+                    + str(QueryController.MAX_STREAM_COUNT)
+                    + " streams can be queried at once"
+                )
+
+            if (key is None) == (publisher is None):
+                raise ValueError("Either a key or a publisher must be provided")
+
+            if limit is not None and limit <= 0:
+                raise ValueError("The limit must be positive")
+
+            if key is not None:
+                get_items, value = DataController.get_items_by_key, key
+            else:
+                get_items, value = DataController.get_items_by_publisher, publisher
+
+            # Items are always fetched verbose, their block index and vout are needed to
+            # merge them in chain order
+            #
+            futures = [
+                QueryController._executor.submit(
+                    get_items, blockchain_name, stream, value, True, count, start
+                )
+                for stream in streams
+            ]
+
+            stream_items = []
+            errors = {}
+            for stream, future in zip(streams, futures):
+                try:
+                    items = future.result()
+                except MultiChainError as err:
+                    errors[stream] = err.get_error_message()
+                    continue
+                except ValueError as err:
+                    errors[stream] = str(err)
+                    continue
+
+                stream_items.append(
+                    [
+                        dict(item, **{QueryController.STREAM_FIELD_NAME: stream})
+                        for item in items
+                    ]
+                )
+
+            items = list(
+                heapq.merge(*stream_items, key=QueryController.get_chain_position)
+            )
+            if limit is not None:
+                items = items[-limit:]
+            if not verbose:
+                items = QueryController.strip_verbose_fields(items)
+
+            return {"items": items, "errors": errors}
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_items_by_any_key(
+        blockchain_name: str,
+        stream: str,
+        keys: list,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        limit: int = DEFAULT_UNION_LIMIT_VALUE,
+        cursor: str = DEFAULT_CURSOR_VALUE,
+    ):
+        """
+        Retrieves the items of stream that have any of the keys, oldest first. The items
+        of every key are fetched from where the previous page stopped in a single batch
+        call, then merged in chain order without duplicates. Returns at most limit items
+        and the cursor to pass to get the next page, None once all items were returned.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            keys = list(dict.fromkeys(key.strip() for key in keys if key.strip()))
+            if not keys:
+                raise ValueError("Keys can't be empty")
+
+            if len(keys) > QueryController.MAX_KEY_COUNT:
+                raise ValueError(
+                    "At most "
+                    + str(QueryController.MAX_KEY_COUNT)
+                    + " keys can be queried at once"
+                )
+
+            if limit <= 0 or limit > QueryController.MAX_UNION_LIMIT:
+                raise ValueError(
+                    "The limit must be between 1 and "
+                    + str(QueryController.MAX_UNION_LIMIT)
+                )
+
+            offsets = QueryController.decode_cursor(cursor)
+
+            # Items are always fetched verbose, their block index and vout are needed to
+            # order and deduplicate them
+            #
+            results = RpcController.call_batch(
+                blockchain_name,
+                [
+                    (
+                        QueryController.GET_STREAM_KEY_ITEMS_ARG,
+                        [stream, key, True, limit, offsets.get(key, 0)],
+                    )
+                    for key in keys
+                ],
+            )
+            for result in results:
+                if isinstance(result, MultiChainError):
+                    raise result
+
+            heap = [
+                (QueryController.get_chain_position(items[0]), index, 0)
+                for index, items in enumerate(results)
+                if items
+            ]
+            heapq.heapify(heap)
+            consumed = [0] * len(keys)
+            returned_outputs = set()
+            items = []
+
+            while heap:
+                position, index, item_index = heap[0]
+                item = results[index][item_index]
+                output = (item.get("txid"), item.get("vout"))
+
+                # Once the page is full, only the other copies of its last item are
+                # consumed so they aren't returned again on the next page
+                #
+                if len(items) == limit and output not in returned_outputs:
+                    break
+
+                heapq.heappop(heap)
+                consumed[index] += 1
+                if item_index + 1 < len(results[index]):
+                    heapq.heappush(
+                        heap,
+                        (
+                            QueryController.get_chain_position(
+                                results[index][item_index + 1]
+                            ),
+                            index,
+                            item_index + 1,
+                        ),
+                    )
+
+                if output in returned_outputs:
+                    continue
+                returned_outputs.add(output)
+                items.append(item)
+
+            has_more = any(
+                consumed[index] < len(results[index]) or len(results[index]) == limit
+                for index in range(len(keys))
+            )
+            next_cursor = None
+            if has_more:
+                next_cursor = QueryController.encode_cursor(
+                    {
+                        key: offsets.get(key, 0) + consumed[index]
+                        for index, key in enumerate(keys)
+                    }
+                )
+
+            if not verbose:
+                items = QueryController.strip_verbose_fields(items)
+
+            return {
+                "items": PayloadCodec.decode_items(blockchain_name, items),
+                "cursor": next_cursor,
+            }
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_items_by_time_range(
+        blockchain_name: str,
+        stream: str,
+        start_time: int = DEFAULT_START_TIME_VALUE,
+        end_time: int = DEFAULT_END_TIME_VALUE,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        limit: int = DEFAULT_TIME_RANGE_LIMIT_VALUE,
+    ):
+        """
+        Returns the items of stream whose blocktime is between start_time and end_time
+        (inclusive, in seconds since the epoch, end_time defaulting to the latest
+        items), at most limit of them, oldest first. The positions of the first and
+        last items are found with a binary search over the stream's item indices, so
+        only O(log n) items are retrieved besides the ones returned. Unconfirmed items
+        count as the most recent ones.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if end_time is None:
+                end_time = float("inf")
+
+            if start_time > end_time:
+                raise ValueError("The start time can't be after the end time")
+
+            if limit <= 0 or limit > QueryController.MAX_TIME_RANGE_LIMIT:
+                raise ValueError(
+                    "The limit must be between 1 and "
+                    + str(QueryController.MAX_TIME_RANGE_LIMIT)
+                )
+
+            streams = RpcController.call(
+                blockchain_name, QueryController.GET_STREAMS_ARG, [stream]
+            )
+            item_count = streams[0]["items"]
+
+            blocktimes = {}
+
+            def get_blocktime(index):
+                if index not in blocktimes:
+                    items = RpcController.call(
+                        blockchain_name,
+                        QueryController.GET_STREAM_ITEMS_ARG,
+                        [stream, False, 1, index],
+                    )
+                    blocktime = items[0].get("blocktime") if items else None
+                    blocktimes[index] = (
+                        float("inf") if blocktime is None else blocktime
+                    )
+                return blocktimes[index]
+
+            # Items are in chain order, so their blocktimes don't decrease
+            #
+            first_index = QueryController.__bisect(
+                0, item_count, lambda index: get_blocktime(index) >= start_time
+            )
+            stop_index = QueryController.__bisect(
+                first_index, item_count, lambda index: get_blocktime(index) > end_time
+            )
+            stop_index = min(stop_index, first_index + limit)
+
+            return [
+                item
+                for item in QueryController.iterate_items(
+                    blockchain_name,
+                    QueryController.GET_STREAM_ITEMS_ARG,
+                    [stream],
+                    verbose,
+                    first_index,
+                    stop_index,
+                )
+                if start_time
+                <= QueryController.get_chain_position(item)[0]
+                <= end_time
+            ]
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_filtered_items(
+        blockchain_name: str,
+        stream: str,
+        item_filter: str,
+        key: str = None,
+        publishers: list = None,
+        verbose: bool = DataController.DEFAULT_VERBOSE_VALUE,
+        count: int = DataController.DEFAULT_ITEM_COUNT_VALUE,
+        start: int = DataController.DEFAULT_ITEM_START_VALUE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Scans the items of stream, or the items of a key or of all of publishers, from
+        start onwards (negative values counting from the most recent items) and returns
+        the first count items matching the filter expression, see ItemFilter.compile.
+        Items are retrieved a page at a time and checked as they arrive, and at most
+        MAX_SCANNED_ITEMS items are scanned per call. Stream scans whose filter looks
+        up values of paths with a secondary index only retrieve the matching indexed
+        items, see SecondaryIndexController. Returns the matching items and
+        nextStart, the start to pass to resume the scan, None once the end of the list
+        was reached.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            stream = stream.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not stream:
+                raise ValueError("Stream name can't be empty")
+
+            if count <= 0:
+                raise ValueError("The count must be positive")
+
+            matches = ItemFilter.compile(item_filter)
+
+            if key is not None:
+                method, params = QueryController.GET_STREAM_KEY_ITEMS_ARG, [stream, key]
+                item_count = QueryController.__get_item_count(
+                    blockchain_name, QueryController.GET_STREAM_KEYS_ARG, stream, key
+                )
+            elif publishers:
+                # Items are scanned through the first publisher's index, the others
+                # are checked like the filter
+                #
+                method = QueryController.GET_STREAM_PUBLISHER_ITEMS_ARG
+                params = [stream, publishers[0]]
+                item_count = QueryController.__get_item_count(
+                    blockchain_name,
+                    QueryController.GET_STREAM_PUBLISHERS_ARG,
+                    stream,
+                    publishers[0],
+                )
+                filter_matches = matches
+
+                def matches(item):
+                    return all(
+                        publisher in item.get("publishers", [])
+                        for publisher in publishers
+                    ) and filter_matches(item)
+
+            else:
+                method, params = QueryController.GET_STREAM_ITEMS_ARG, [stream]
+                streams = RpcController.call(
+                    blockchain_name, QueryController.GET_STREAMS_ARG, [stream]
+                )
+                item_count = streams[0]["items"]
+
+            if start < 0:
+                start = max(item_count + start, 0)
+
+            items = []
+            position = start
+
+            # Stream scans on indexed paths only retrieve the indexed items that have
+            # one of the values looked up, then scan the items indexed since
+            #
+            lookup = None
+            if key is None and not publishers and not local_ordering:
+                lookup = SecondaryIndexController.find_positions(
+                    blockchain_name, stream, ItemFilter.get_lookups(item_filter)
+                )
+
+            if lookup is not None:
+                indexed_positions, indexed_count = lookup
+                candidate_positions = indexed_positions[
+                    bisect.bisect_left(indexed_positions, start) :
+                ]
+                scanned_positions = candidate_positions[
+                    : QueryController.MAX_SCANNED_ITEMS
+                ]
+                for item_position, item in QueryController.__get_items_at(
+                    blockchain_name, stream, scanned_positions, verbose
+                ):
+                    position = item_position + 1
+                    if matches(item):
+                        items.append(item)
+                        if len(items) == count:
+                            break
+
+                is_scan_capped = len(candidate_positions) > len(scanned_positions)
+                if len(items) < count:
+                    if is_scan_capped:
+                        position = candidate_positions[len(scanned_positions)]
+                    else:
+                        position = max(start, indexed_count)
+
+                if len(items) == count or is_scan_capped:
+                    return {
+                        "items": items,
+                        "nextStart": position if position < item_count else None,
+                    }
+
+            stop = min(item_count, position + QueryController.MAX_SCANNED_ITEMS)
+            for item in QueryController.iterate_items(
+                blockchain_name,
+                method,
+                params,
+                verbose,
+                position,
+                stop,
+                local_ordering=local_ordering,
+            ):
+                position += 1
+                if matches(item):
+                    items.append(item)
+                    if len(items) == count:
+                        break
+
+            return {
+                "items": items,
+                "nextStart": position if position < item_count else None,
+            }
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def iterate_items(
+        blockchain_name: str,
+        method: str,
+        params: list,
+        verbose: bool,
+        start: int,
+        stop: int,
+        page_size: int = PAGE_SIZE,
+        local_ordering: bool = DataController.DEFAULT_LOCAL_ORDERING_VALUE,
+    ):
+        """
+        Yields the decoded items at positions start to stop (excluded) of a stream item
+        list, such as liststreamitems or liststreamkeyitems called with params, a page
+        at a time
+        """
+        while start < stop:
+            count = min(page_size, stop - start)
+            items = RpcController.call(
+                blockchain_name,
+                method,
+                params + [verbose, count, start, local_ordering],
+            )
+            for item in PayloadCodec.decode_items(blockchain_name, items):
+                yield item
+
+            if len(items) < count:
+                return
+            start += count
+
+    @staticmethod
+    def strip_verbose_fields(items: list):
+        """
+        Returns the items without the fields only returned in verbose listings, for
+        items fetched verbose to be ordered but requested without verbose
+        """
+        return [
+            {
+                field: value
+                for field, value in item.items()
+                if field not in QueryController.VERBOSE_ONLY_FIELDS
+            }
+            for item in items
+        ]
+
+    @staticmethod
+    def get_chain_position(item: dict):
+        """
+        Returns a sort key ordering items as they appear in the chain. Items that
+        aren't confirmed yet come last
+        """
+        blocktime = item.get("blocktime")
+        return (
+            float("inf") if blocktime is None else blocktime,
+            item.get("blockindex", 0),
+            item.get("vout", 0),
+        )
+
+    @staticmethod
+    def __get_items_at(
+        blockchain_name: str, stream: str, positions: list, verbose: bool
+    ):
+        """
+        Yields the position and decoded item of every position of stream, retrieved
+        with a batch call per PAGE_SIZE positions
+        """
+        for page_start in range(0, len(positions), QueryController.PAGE_SIZE):
+            page_positions = positions[
+                page_start : page_start + QueryController.PAGE_SIZE
+            ]
+            results = RpcController.call_batch(
+                blockchain_name,
+                [
+                    (
+                        QueryController.GET_STREAM_ITEMS_ARG,
+                        [stream, verbose, 1, position],
+                    )
+                    for position in page_positions
+                ],
+            )
+
+            item_positions = []
+            items = []
+            for position, result in zip(page_positions, results):
+                if isinstance(result, MultiChainError):
+                    raise result
+                if result:
+                    item_positions.append(position)
+                    items.append(result[0])
+
+            for position, item in zip(
+                item_positions, PayloadCodec.decode_items(blockchain_name, items)
+            ):
+                yield position, item
+
+    @staticmethod
+    def __get_item_count(
+        blockchain_name: str, method: str, stream: str, key_or_publisher: str
+    ):
+        """
+        Returns the number of items of a key or publisher of stream, from
+        liststreamkeys or liststreampublishers
+        """
+        entries = RpcController.call(
+            blockchain_name, method, [stream, key_or_publisher]
+        )
+        return entries[0]["items"] if entries else 0
+
+    @staticmethod
+    def encode_cursor(offsets: dict):
+        """
+        Returns the opaque cursor holding the offset reached in the items of every key,
+        or of every stream
+        """
+        return base64.urlsafe_b64encode(
+            json.dumps(offsets, separators=(",", ":")).encode()
+        ).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """
+        Returns the offsets held by a cursor, or no offsets for the first page
+        """
+        if not cursor:
+            return {}
+
+        try:
+            offsets = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, binascii.Error):
+            raise ValueError("The cursor is invalid")
+
+        if not isinstance(offsets, dict) or not all(
+            isinstance(offset, int) and offset >= 0 for offset in offsets.values()
+        ):
+            raise ValueError("The cursor is invalid")
+        return offsets
+
+    @staticmethod
+    def __bisect(low: int, high: int, is_after):
+        """
+        Returns the first index between low and high for which is_after is true, or
+        high if there is none. is_after must be false then true over the range
+        """
+        while low < high:
+            middle = (low + high) // 2
+            if is_after(middle):
+                high = middle
+            else:
+                low = middle + 1
+        return low
@@ -0,0 +1,380 @@
+import threading
+import time
+
+from app.models.data.item_filter import ItemFilter
+from app.models.data.payload_codec import PayloadCodec
+from app.models.rpc.rpc_controller import RpcController
+from app.models.storage.storage_controller import StorageController
+
+
+class StreamIndexes:
+    def __init__(self, stored_indexes: dict):
+        self._lock = threading.Lock()
+        self._refreshed_at = None
+        self._item_count = stored_indexes.get("itemCount", 0)
+        self._last_txid = stored_indexes.get("lastTxid")
+        self._indexes = stored_indexes.get("indexes", {})
+        self._saved_item_count = self._item_count
+        self._saved_at = time.monotonic()
+
+    def get_lock(self):
+        return self._lock
+
+    def get_item_count(self):
+        return self._item_count
+
+    def get_last_txid(self):
+        return self._last_txid
+
+    def get_paths(self):
+        return list(self._indexes)
+
+    def get_positions(self, path: str, canonical_value: str):
+        return self._indexes[path].get(canonical_value, [])
+
+    def get_value_count(self, path: str):
+        return len(self._indexes[path])
+
+    def get_refreshed_at(self):
+        return self._refreshed_at
+
+    def set_refreshed_at(self, refreshed_at):
+        self._refreshed_at = refreshed_at
+
+    def get_saved_item_count(self):
+        return self._saved_item_count
+
+    def get_saved_at(self):
+        return self._saved_at
+
+    def set_saved(self, saved_at):
+        self._saved_item_count = self._item_count
+        self._saved_at = saved_at
+
+    def set_paths(self, paths: list):
+        """
+        Declares the indexed paths, emptying all the indexes so they are rebuilt
+        """
+        self._item_count = 0
+        self._last_txid = None
+        self._indexes = {path: {} for path in paths}
+
+    def remove_path(self, path: str):
+        del self._indexes[path]
+
+    def add_item(self, item: dict, values: dict):
+        """
+        Indexes the item, at the next position of the stream, under its value at
+        every indexed path
+        """
+        for path, canonical_value in values.items():
+            self._indexes[path].setdefault(canonical_value, []).append(
+                self._item_count
+            )
+        self._item_count += 1
+        self._last_txid = item.get("txid")
+
+    def to_json(self):
+        return {
+            "itemCount": self._item_count,
+            "lastTxid": self._last_txid,
+            "indexes": self._indexes,
+        }
+
+
+class SecondaryIndexController:
+    INDEX_DIRECTORY = "secondary-indexes"
+    INDEX_EXTENSION = ".json"
+    REFRESH_INTERVAL = 1.0
+    SAVE_INTERVAL = 60.0
+    SAVE_ITEM_COUNT = 100000
+    PAGE_SIZE = 1000
+    MAX_INDEX_COUNT = 16
+    GET_STREAMS_ARG = "liststreams"
+    GET_STREAM_ITEMS_ARG = "liststreamitems"
+
+    _lock = threading.Lock()
+    _stream_indexes = {}
+
+    @staticmethod
+    def create_index(blockchain_name: str, stream: str, path: str):
+        """
+        Declares a secondary index on a path of the items of stream, such as
+        data.json.customerId, see ItemFilter.compile. The items of the stream are
+        indexed by the canonical JSON of their value at the path, and the index is
+        then maintained from the items confirmed since. The indexes of the stream are
+        rebuilt together, in a single scan of the stream. Returns the indexes of the
+        stream.
+        """
+        try:
+            path = SecondaryIndexController.__check_path(path)
+            indexes = SecondaryIndexController.__get_stream_indexes(
+                blockchain_name, stream
+            )
+            with indexes.get_lock():
+                paths = indexes.get_paths()
+                if path not in paths:
+                    if len(paths) >= SecondaryIndexController.MAX_INDEX_COUNT:
+                        raise ValueError(
+                            "A stream can't have more than "
+                            + str(SecondaryIndexController.MAX_INDEX_COUNT)
+                            + " indexes"
+                        )
+
+                    indexes.set_paths(paths + [path])
+                    SecondaryIndexController.__refresh_indexes(
+                        blockchain_name, stream, indexes
+                    )
+                    indexes.set_refreshed_at(time.monotonic())
+            return SecondaryIndexController.get_indexes(blockchain_name, stream)
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def drop_index(blockchain_name: str, stream: str, path: str):
+        """
+        Removes the secondary index on a path of the items of stream. Returns the
+        remaining indexes of the stream
+        """
+        try:
+            path = SecondaryIndexController.__check_path(path)
+            indexes = SecondaryIndexController.__get_stream_indexes(
+                blockchain_name, stream
+            )
+            with indexes.get_lock():
+                if path not in indexes.get_paths():
+                    raise ValueError(
+                        "The stream " + stream + " has no index on " + path
+                    )
+
+                indexes.remove_path(path)
+                SecondaryIndexController.__save_indexes(
+                    blockchain_name.strip(), stream.strip(), indexes, True
+                )
+            return SecondaryIndexController.get_indexes(blockchain_name, stream)
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def get_indexes(blockchain_name: str, stream: str):
+        """
+        Returns the indexed paths of stream, with the number of items indexed and the
+        number of distinct values of every path
+        """
+        try:
+            indexes = SecondaryIndexController.__get_stream_indexes(
+                blockchain_name, stream
+            )
+            with indexes.get_lock():
+                return [
+                    {
+                        "path": path,
+                        "indexedItems": indexes.get_item_count(),
+                        "values": indexes.get_value_count(path),
+                    }
+                    for path in indexes.get_paths()
+                ]
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def find_positions(blockchain_name: str, stream: str, lookups: dict):
+        """
+        Returns the sorted positions, in the stream, of the indexed items whose values
+        are one of the lookups values at every indexed path of lookups (see
+        ItemFilter.get_lookups), along with the number of items indexed, which are the
+        first items of the stream. Items past that number must be scanned. Returns None
+        if no path of lookups is indexed.
+        """
+        if not lookups:
+            return None
+
+        indexes = SecondaryIndexController.__get_stream_indexes(
+            blockchain_name, stream
+        )
+        with indexes.get_lock():
+            indexed_lookups = {
+                path: values
+                for path, values in lookups.items()
+                if path in indexes.get_paths()
+            }
+            if not indexed_lookups:
+                return None
+
+            positions = None
+            for path, values in indexed_lookups.items():
+                path_positions = set()
+                for value in values:
+                    path_positions.update(
+                        indexes.get_positions(
+                            path, ItemFilter.get_canonical_value(value)
+                        )
+                    )
+                if positions is None:
+                    positions = path_positions
+                else:
+                    positions &= path_positions
+            return sorted(positions), indexes.get_item_count()
+
+    @staticmethod
+    def __check_path(path: str):
+        """
+        Returns the path stripped, checked like filter paths
+        """
+        if not path or not path.strip():
+            raise ValueError("The path can't be empty")
+
+        ItemFilter.split_path(path)
+        return path.strip()
+
+    @staticmethod
+    def __get_stream_indexes(blockchain_name: str, stream: str):
+        """
+        Returns the indexes of the stream, refreshed if they weren't refreshed during
+        the last REFRESH_INTERVAL seconds
+        """
+        blockchain_name = blockchain_name.strip()
+        stream = stream.strip()
+
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        if not stream:
+            raise ValueError("Stream name can't be empty")
+
+        with SecondaryIndexController._lock:
+            indexes = SecondaryIndexController._stream_indexes.get(
+                (blockchain_name, stream)
+            )
+            if indexes is None:
+                indexes = StreamIndexes(
+                    StorageController.read_json(
+                        SecondaryIndexController.__get_index_path(
+                            blockchain_name, stream
+                        ),
+                        {},
+                    )
+                )
+                SecondaryIndexController._stream_indexes[
+                    (blockchain_name, stream)
+                ] = indexes
+
+        with indexes.get_lock():
+            refreshed_at = indexes.get_refreshed_at()
+            if indexes.get_paths() and (
+                refreshed_at is None
+                or time.monotonic() - refreshed_at
+                >= SecondaryIndexController.REFRESH_INTERVAL
+            ):
+                SecondaryIndexController.__refresh_indexes(
+                    blockchain_name, stream, indexes
+                )
+                indexes.set_refreshed_at(time.monotonic())
+        return indexes
+
+    @staticmethod
+    def __refresh_indexes(
+        blockchain_name: str, stream: str, indexes: StreamIndexes
+    ):
+        """
+        Indexes the items confirmed since the indexes were last refreshed, like
+        AggregateController: only the confirmed items past the number already indexed
+        are retrieved, and the indexes are rebuilt if the last item indexed isn't at
+        the same position anymore. Items are decoded, so paths inside compressed or
+        binary encoded data are indexed too. The indexes are saved once refreshed,
+        see __save_indexes.
+        """
+        split_paths = {
+            path: ItemFilter.split_path(path) for path in indexes.get_paths()
+        }
+
+        streams = RpcController.call(
+            blockchain_name, SecondaryIndexController.GET_STREAMS_ARG, [stream]
+        )
+        item_count = streams[0]["items"] if streams else 0
+
+        start = indexes.get_item_count()
+        if start:
+            last_items = RpcController.call(
+                blockchain_name,
+                SecondaryIndexController.GET_STREAM_ITEMS_ARG,
+                [stream, False, 1, start - 1],
+            )
+            last_txid = last_items[0].get("txid") if last_items else None
+            if last_txid != indexes.get_last_txid():
+                indexes.set_paths(list(split_paths))
+                start = 0
+
+        is_rebuilt = start == 0
+        while start < item_count:
+            items = RpcController.call(
+                blockchain_name,
+                SecondaryIndexController.GET_STREAM_ITEMS_ARG,
+                [stream, False, SecondaryIndexController.PAGE_SIZE, start],
+            )
+            confirmed_items = []
+            for item in items:
+                if item.get("blocktime") is None:
+                    break
+                confirmed_items.append(item)
+
+            for item in PayloadCodec.decode_items(blockchain_name, confirmed_items):
+                values = {}
+                for path, split_path in split_paths.items():
+                    value = ItemFilter.get_value(item, split_path)
+                    if value is not ItemFilter.MISSING:
+                        values[path] = ItemFilter.get_canonical_value(value)
+                indexes.add_item(item, values)
+
+            if len(confirmed_items) < SecondaryIndexController.PAGE_SIZE:
+                break
+            start += len(confirmed_items)
+
+        SecondaryIndexController.__save_indexes(
+            blockchain_name, stream, indexes, is_rebuilt
+        )
+
+    @staticmethod
+    def __save_indexes(
+        blockchain_name: str, stream: str, indexes: StreamIndexes, is_changed: bool
+    ):
+        """
+        Writes the indexes to their file if their paths changed, if SAVE_ITEM_COUNT
+        items were indexed since they were last saved, or if any item was and they
+        were saved more than SAVE_INTERVAL seconds ago. Rewriting all the indexes on
+        every refresh would cost I/O growing with the stream at every block. The items
+        indexed since the indexes were saved are indexed again after a restart.
+        """
+        added_count = indexes.get_item_count() - indexes.get_saved_item_count()
+        if not is_changed and (
+            added_count == 0
+            or (
+                0 < added_count < SecondaryIndexController.SAVE_ITEM_COUNT
+                and time.monotonic() - indexes.get_saved_at()
+                < SecondaryIndexController.SAVE_INTERVAL
+            )
+        ):
+            return
+
+        StorageController.write_json(
+            SecondaryIndexController.__get_index_path(blockchain_name, stream),
+            indexes.to_json(),
+        )
+        indexes.set_saved(time.monotonic())
+
+    @staticmethod
+    def __get_index_path(blockchain_name: str, stream: str):
+        """
+        Returns the path of the file the indexes of the stream are stored in
+        """
+        return StorageController.get_path(
+            SecondaryIndexController.INDEX_DIRECTORY,
+            blockchain_name,
+            stream + SecondaryIndexController.INDEX_EXTENSION,
+        )
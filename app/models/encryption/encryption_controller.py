@@ -1,3 +1,9 @@
+from collections import OrderedDict
+import struct
+import threading
+import time
+
+import nacl.bindings
 import nacl.secret
 import nacl.utils
 from nacl.public import PrivateKey, SealedBox, PublicKey
@@ -5,11 +11,24 @@ from nacl.public import PrivateKey, SealedBox, PublicKey
 from app.models.encryption.asymmetric_key_pair import AsymmetricKeyPair
 from app.models.encryption.encoded_asymmetric_key_pair import EncodedAsymmetricKeyPair
 from app.models.encryption.key_data import KeyData
+from app.models.encryption.group_key import GroupKey
+from app.models.encryption.keyring import Keyring
 
 KEY_ENCODING = nacl.encoding.Base64Encoder
 
 
 class EncrytpionController:
+    MAX_CACHED_CONTROLLERS = 256
+    MAX_CACHED_GROUP_KEYS = 256
+    DEFAULT_GROUP_KEY_ROTATION_PERIOD = 24 * 60 * 60
+    GROUP_KEY_ID_SIZE = 16
+    DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+    MAX_STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+    STREAM_CHUNK_SIZE_FORMAT = ">I"
+
+    _instances_lock = threading.Lock()
+    _instances = OrderedDict()
+
     def __init__(self, private_key: str = None):
         """
         If private key is None that means it is the first user (Admin)
@@ -22,12 +41,41 @@ class EncrytpionController:
 
         self._user_private_key = asymmetricKeyPair.get_private_key()
         self._user_public_key = asymmetricKeyPair.get_public_key()
+        self._encoded_user_public_key = self.__encode_key(self._user_public_key)
+        self._unseal_box = SealedBox(self._user_private_key)
+        self._group_keys_lock = threading.Lock()
+        self._group_keys = OrderedDict()
+        self._unsealed_group_keys = OrderedDict()
+
+    @staticmethod
+    def get_instance(private_key: str):
+        """
+        Returns a controller for the user owning the encoded private key. Controllers are
+        reused across calls so the private key is only decoded once per user
+        """
+        with EncrytpionController._instances_lock:
+            controller = EncrytpionController._instances.get(private_key)
+            if controller is not None:
+                EncrytpionController._instances.move_to_end(private_key)
+                return controller
+
+        controller = EncrytpionController(private_key)
+
+        with EncrytpionController._instances_lock:
+            EncrytpionController._instances[private_key] = controller
+            while (
+                len(EncrytpionController._instances)
+                > EncrytpionController.MAX_CACHED_CONTROLLERS
+            ):
+                EncrytpionController._instances.popitem(last=False)
+
+        return controller
 
     def get_user_public_key(self):
         """
         returns the encoded public key of the current user
         """
-        return self.__encode_key(self._user_public_key)
+        return self._encoded_user_public_key
 
     def encrypt_data(self, data: str, public_keys: list):
         """
@@ -52,6 +100,195 @@ class EncrytpionController:
         key_data = KeyData(public_key_symmetric_key_map, enc_data)
         return key_data
 
+    def get_group_key(
+        self,
+        public_keys: list,
+        rotation_period: int = DEFAULT_GROUP_KEY_ROTATION_PERIOD,
+    ):
+        """
+        Returns the symmetric key shared by the current user and the recipients for the
+        current rotation period. The key is generated and sealed for every recipient only
+        once per recipient set and period, so it can be published once and referenced by
+        its id from every item encrypted with it
+        """
+        if rotation_period <= 0:
+            raise ValueError("The rotation period must be a positive number of seconds")
+
+        recipients = sorted(
+            set(self.__key_to_str(public_key) for public_key in public_keys)
+            | {self.__key_to_str(self._encoded_user_public_key)}
+        )
+        period = int(time.time() // rotation_period)
+        cache_key = (tuple(recipients), rotation_period, period)
+
+        with self._group_keys_lock:
+            group_key = self._group_keys.get(cache_key)
+            if group_key is not None:
+                self._group_keys.move_to_end(cache_key)
+                return group_key
+
+            symmetric_key = self.__generate_symmetric_key()
+            public_key_symmetric_key_map = {}
+            for encoded_public_key in recipients:
+                public_key_symmetric_key_map[
+                    encoded_public_key
+                ] = self.__encrypt_symmetric_key_with_public_key(
+                    symmetric_key, encoded_public_key
+                )
+
+            key_id = nacl.utils.random(EncrytpionController.GROUP_KEY_ID_SIZE).hex()
+            group_key = GroupKey(key_id, symmetric_key, public_key_symmetric_key_map)
+
+            self._group_keys[cache_key] = group_key
+            while len(self._group_keys) > EncrytpionController.MAX_CACHED_GROUP_KEYS:
+                self._group_keys.popitem(last=False)
+
+            return group_key
+
+    def encrypt_data_with_group_key(self, data: str, group_key: GroupKey):
+        """
+        Encrypts the data using the symmetric key of the group key. Only a single
+        SecretBox encryption is done, the sealed symmetric keys are published once
+        alongside the group key id
+        """
+        return self.__encrypt_data(data, group_key.get_symmetric_key())
+
+    def unseal_group_key(self, key_id: str, enc_symmetric_key):
+        """
+        Using the current users private key, decrypts the sealed symmetric key of a group key.
+        Unsealed keys are cached by key id so items sharing a group key are only unsealed once
+        """
+        with self._group_keys_lock:
+            symmetric_key = self._unsealed_group_keys.get(key_id)
+            if symmetric_key is not None:
+                self._unsealed_group_keys.move_to_end(key_id)
+                return symmetric_key
+
+        symmetric_key = self._unseal_box.decrypt(enc_symmetric_key)
+
+        with self._group_keys_lock:
+            self._unsealed_group_keys[key_id] = symmetric_key
+            while (
+                len(self._unsealed_group_keys)
+                > EncrytpionController.MAX_CACHED_GROUP_KEYS
+            ):
+                self._unsealed_group_keys.popitem(last=False)
+
+        return symmetric_key
+
+    def decrypt_data_with_symmetric_key(self, enc_data, symmetric_key):
+        """
+        Decrypts the data using an already unsealed symmetric key
+        """
+        symmetric_box = nacl.secret.SecretBox(symmetric_key)
+        return symmetric_box.decrypt(enc_data)
+
+    def encrypt_stream(
+        self,
+        source,
+        destination,
+        public_keys: list,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    ):
+        """
+        Reads the plain text from the source file object in fixed-size chunks and writes the
+        encrypted chunks to the destination file object using libsodium secretstream, so the
+        payload never has to fit in memory. The randomly generated secret key is encrypted
+        using the public key of each user that should view the data and a map of public key
+        to encrypted secret key is returned
+        """
+        if chunk_size <= 0 or chunk_size > EncrytpionController.MAX_STREAM_CHUNK_SIZE:
+            raise ValueError(
+                "The chunk size must be between 1 and "
+                + str(EncrytpionController.MAX_STREAM_CHUNK_SIZE)
+                + " bytes"
+            )
+
+        symmetric_key = nacl.bindings.crypto_secretstream_xchacha20poly1305_keygen()
+        state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
+        header = nacl.bindings.crypto_secretstream_xchacha20poly1305_init_push(
+            state, symmetric_key
+        )
+        destination.write(header)
+        destination.write(
+            struct.pack(EncrytpionController.STREAM_CHUNK_SIZE_FORMAT, chunk_size)
+        )
+
+        # The next chunk is read ahead so that the last chunk can be tagged as final,
+        # which lets the reader detect a truncated stream
+        #
+        chunk = self.__read_chunk(source, chunk_size)
+        while True:
+            next_chunk = self.__read_chunk(source, chunk_size)
+            tag = (
+                nacl.bindings.crypto_secretstream_xchacha20poly1305_TAG_MESSAGE
+                if next_chunk
+                else nacl.bindings.crypto_secretstream_xchacha20poly1305_TAG_FINAL
+            )
+            destination.write(
+                nacl.bindings.crypto_secretstream_xchacha20poly1305_push(
+                    state, chunk, None, tag
+                )
+            )
+            if not next_chunk:
+                break
+            chunk = next_chunk
+
+        return self.__encrypt_symmetric_key_with_public_keys(symmetric_key, public_keys)
+
+    def decrypt_stream(self, source, destination, enc_symmetric_key):
+        """
+        Using the current users private key, the encrypted symmetric key is decrypted.
+        Then the encrypted chunks written by encrypt_stream are read from the source file
+        object, decrypted one at a time and written to the destination file object
+        """
+        symmetric_key = self._unseal_box.decrypt(enc_symmetric_key)
+
+        header = self.__read_chunk(
+            source, nacl.bindings.crypto_secretstream_xchacha20poly1305_HEADERBYTES
+        )
+        chunk_size_field = self.__read_chunk(
+            source, struct.calcsize(EncrytpionController.STREAM_CHUNK_SIZE_FORMAT)
+        )
+        if (
+            len(header)
+            != nacl.bindings.crypto_secretstream_xchacha20poly1305_HEADERBYTES
+            or not chunk_size_field
+        ):
+            raise ValueError("The encrypted stream is missing its header")
+
+        (chunk_size,) = struct.unpack(
+            EncrytpionController.STREAM_CHUNK_SIZE_FORMAT, chunk_size_field
+        )
+        # The chunk size comes from the stream, it is checked before a chunk that large
+        # is read into memory
+        #
+        if chunk_size <= 0 or chunk_size > EncrytpionController.MAX_STREAM_CHUNK_SIZE:
+            raise ValueError("The chunk size of the encrypted stream is invalid")
+
+        state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
+        nacl.bindings.crypto_secretstream_xchacha20poly1305_init_pull(
+            state, header, symmetric_key
+        )
+
+        encrypted_chunk_size = (
+            chunk_size + nacl.bindings.crypto_secretstream_xchacha20poly1305_ABYTES
+        )
+        while True:
+            enc_chunk = self.__read_chunk(source, encrypted_chunk_size)
+            if not enc_chunk:
+                raise ValueError("The encrypted stream was truncated")
+
+            chunk, tag = nacl.bindings.crypto_secretstream_xchacha20poly1305_pull(
+                state, enc_chunk, None
+            )
+            destination.write(chunk)
+            if tag == nacl.bindings.crypto_secretstream_xchacha20poly1305_TAG_FINAL:
+                break
+
+        if source.read(1):
+            raise ValueError("The encrypted stream has data after its final chunk")
+
     def decrypt_data(self, enc_data: str, enc_symmetric_key):
         """
         Using the current users private key, the encrypted symmetric key is decrypted.
@@ -59,8 +296,7 @@ class EncrytpionController:
         """
         # Decrypts the encrypted symmetric key
         #
-        unseal_box = SealedBox(self._user_private_key)
-        symmetric_key = unseal_box.decrypt(enc_symmetric_key)
+        symmetric_key = self._unseal_box.decrypt(enc_symmetric_key)
 
         # Decrypts the data using the symmetric key
         #
@@ -87,7 +323,9 @@ class EncrytpionController:
         a map of public keys to their corresponding encrytped symmetric key
         """
         public_key_symmetric_key_map = {}
-        encoded_public_keys.append(self.__encode_key(self._user_public_key))
+        encoded_public_keys = list(encoded_public_keys) + [
+            self._encoded_user_public_key
+        ]
         for encoded_public_key in encoded_public_keys:
             public_key_symmetric_key_map[
                 encoded_public_key
@@ -96,6 +334,19 @@ class EncrytpionController:
             )
         return public_key_symmetric_key_map
 
+    def __read_chunk(self, source, size):
+        """
+        Reads exactly size bytes from the source file object, unless the end of the
+        file is reached first. Request streams may return fewer bytes per read call
+        """
+        chunk = bytearray()
+        while len(chunk) < size:
+            data = source.read(size - len(chunk))
+            if not data:
+                break
+            chunk.extend(data)
+        return bytes(chunk)
+
     def __encode_key(self, key):
         """
         returns an encoded verison of the key passed in. The key is encoded using
@@ -103,6 +354,14 @@ class EncrytpionController:
         """
         return key.encode(encoder=KEY_ENCODING)
 
+    def __key_to_str(self, key):
+        """
+        Returns the encoded key as a string so it can be used as a JSON field name
+        """
+        if isinstance(key, bytes):
+            return key.decode().strip()
+        return key.strip()
+
     def __decode_key(self, key_type, key):
         """
         Returns an key object that represents the key provided. The key is decoded
@@ -133,8 +392,7 @@ class EncrytpionController:
         Returns an encrypted symmetric key that has been encrypted using the provided
         public key
         """
-        public_key = self.__decode_key(PublicKey, encoded_public_key)
-        user_box = SealedBox(public_key)
+        user_box = Keyring.get_sealed_box(encoded_public_key)
         enc_key = user_box.encrypt(symmetric_key)
         return enc_key
 
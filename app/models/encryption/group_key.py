@@ -0,0 +1,14 @@
+class GroupKey:
+    def __init__(self, key_id, symmetric_key, public_key_symmetric_key_map):
+        self._key_id = key_id
+        self._symmetric_key = symmetric_key
+        self._public_key_symmetric_key_map = public_key_symmetric_key_map
+
+    def get_key_id(self):
+        return self._key_id
+
+    def get_symmetric_key(self):
+        return self._symmetric_key
+
+    def get_public_key_symmetric_key_map(self):
+        return self._public_key_symmetric_key_map
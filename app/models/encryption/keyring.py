@@ -0,0 +1,63 @@
+from collections import OrderedDict
+import threading
+
+import nacl.encoding
+from nacl.public import SealedBox, PublicKey
+
+KEY_ENCODING = nacl.encoding.Base64Encoder
+
+
+class Keyring:
+    MAX_CACHED_PUBLIC_KEYS = 4096
+
+    _lock = threading.Lock()
+    _sealed_boxes = OrderedDict()
+
+    @staticmethod
+    def get_public_key(encoded_public_key):
+        """
+        Returns the decoded public key object of the encoded public key provided
+        """
+        return Keyring.__get_entry(encoded_public_key)[0]
+
+    @staticmethod
+    def get_sealed_box(encoded_public_key):
+        """
+        Returns a SealedBox that encrypts for the encoded public key provided. Decoded keys
+        and their boxes are kept in a least recently used cache so that encrypting many items
+        for the same recipients doesn't decode the same keys over and over again
+        """
+        return Keyring.__get_entry(encoded_public_key)[1]
+
+    @staticmethod
+    def __get_entry(encoded_public_key):
+        """
+        Returns the cached (PublicKey, SealedBox) pair of the encoded public key,
+        decoding the key the first time it is seen
+        """
+        cache_key = Keyring.__normalize_key(encoded_public_key)
+
+        with Keyring._lock:
+            entry = Keyring._sealed_boxes.get(cache_key)
+            if entry is not None:
+                Keyring._sealed_boxes.move_to_end(cache_key)
+                return entry
+
+        public_key = PublicKey(cache_key, encoder=KEY_ENCODING)
+        entry = (public_key, SealedBox(public_key))
+
+        with Keyring._lock:
+            Keyring._sealed_boxes[cache_key] = entry
+            while len(Keyring._sealed_boxes) > Keyring.MAX_CACHED_PUBLIC_KEYS:
+                Keyring._sealed_boxes.popitem(last=False)
+
+        return entry
+
+    @staticmethod
+    def __normalize_key(encoded_key):
+        """
+        Returns the encoded key as bytes so that str and bytes keys share the same entry
+        """
+        if isinstance(encoded_key, str):
+            return encoded_key.strip().encode()
+        return encoded_key.strip()
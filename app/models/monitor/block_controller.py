@@ -0,0 +1,30 @@
+from subprocess import run, CalledProcessError
+from app.models.exception.multichain_error import MultiChainError
+
+
+class BlockController:
+    MULTICHAIN_ARG = "multichain-cli"
+    GET_BEST_BLOCK_HASH_ARG = "getbestblockhash"
+
+    @staticmethod
+    def get_best_block_hash(blockchain_name: str):
+        """
+        Returns the hash of the block at the tip of the longest chain known to the node
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            args = [
+                BlockController.MULTICHAIN_ARG,
+                blockchain_name,
+                BlockController.GET_BEST_BLOCK_HASH_ARG,
+            ]
+            output = run(args, check=True, capture_output=True)
+
+            return output.stdout.strip().decode("utf-8")
+        except CalledProcessError as err:
+            raise MultiChainError(err.stderr)
+        except Exception as err:
+            raise err
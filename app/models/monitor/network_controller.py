@@ -1,5 +1,6 @@
 from subprocess import run, CalledProcessError
 from app.models.exception.multichain_error import MultiChainError
+from app.models.cache.request_coalescer import RequestCoalescer
 import json
 import time
 
@@ -11,6 +12,7 @@ class NetworkController:
     TARGET_DATE_TIME_FORMAT = "%m-%d-%Y %H:%M:%S"
 
     @staticmethod
+    @RequestCoalescer.coalesce
     def get_peer_info(blockchain_name: str):
         """
         Returns information about the other nodes to which this node is connected. The main information that is returned is:
@@ -1,5 +1,7 @@
 from subprocess import run, CalledProcessError
 from app.models.exception.multichain_error import MultiChainError
+from app.models.cache.stream_query_cache import StreamQueryCache
+from app.models.transaction.transaction_controller import TransactionController
 import json
 
 
@@ -66,6 +68,8 @@ class PermissionController:
                 ",".join(permissions),
             ]
             output = run(args, check=True, capture_output=True)
+            StreamQueryCache.invalidate_chain(blockchain_name)
+            TransactionController.track(blockchain_name, output.stdout)
 
             return output.stdout
         except CalledProcessError as err:
@@ -111,6 +115,8 @@ class PermissionController:
                 stream_name + "." + permission.lower(),
             ]
             output = run(args, check=True, capture_output=True)
+            StreamQueryCache.invalidate_stream(blockchain_name, stream_name)
+            TransactionController.track(blockchain_name, output.stdout)
 
             return output.stdout
         except CalledProcessError as err:
@@ -219,6 +225,7 @@ class PermissionController:
                 ",".join(permissions),
             ]
             output = run(args, check=True, capture_output=True)
+            StreamQueryCache.invalidate_chain(blockchain_name)
 
             return output.stdout
         except CalledProcessError as err:
@@ -267,6 +274,7 @@ class PermissionController:
                 stream_name + "." + permission.lower(),
             ]
             output = run(args, check=True, capture_output=True)
+            StreamQueryCache.invalidate_stream(blockchain_name, stream_name)
 
             return output.stdout
         except CalledProcessError as err:
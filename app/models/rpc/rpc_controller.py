@@ -0,0 +1,222 @@
+import base64
+import binascii
+import http.client
+import itertools
+import json
+import os
+
+from configobj import ConfigObj
+
+from app.models.configuration.configuration_controller import ConfigurationController
+from app.models.exception.multichain_error import MultiChainError
+
+
+class RpcController:
+    RPC_HOST = "127.0.0.1"
+    RPC_PATH = "/"
+    RPC_TIMEOUT = 300
+    CONFIG_FILE = "multichain.conf"
+    RPC_USER_PARAM = "rpcuser"
+    RPC_PASSWORD_PARAM = "rpcpassword"
+    RPC_PORT_PARAM = "rpcport"
+    DEFAULT_RPC_PORT_PARAM = "default-rpc-port"
+    STREAMED_PARAM_PLACEHOLDER = "__talos_streamed_param__"
+    DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+    _request_ids = itertools.count(1)
+
+    @staticmethod
+    def call(blockchain_name: str, method: str, params: list):
+        """
+        Calls the JSON-RPC API of the multichaind daemon directly. Unlike multichain-cli,
+        the parameters are sent in the request body, so they are not bounded by the
+        maximum command line length. Returns the result of the call.
+        """
+        body = json.dumps(RpcController.__get_request(method, params)).encode()
+        response = RpcController.__send(blockchain_name, [body], len(body))
+        return RpcController.__get_result(response, method, params)
+
+    @staticmethod
+    def call_batch(blockchain_name: str, calls: list):
+        """
+        Sends several (method, params) calls to the daemon in a single JSON-RPC batch
+        request. Returns a list with, for every call in order, either its result or the
+        MultiChainError it failed with.
+        """
+        if not calls:
+            return []
+
+        requests = [RpcController.__get_request(method, params) for method, params in calls]
+        body = json.dumps(requests).encode()
+        responses = RpcController.__send(blockchain_name, [body], len(body))
+
+        if isinstance(responses, dict):
+            error = RpcController.__get_error(responses, "batch", [])
+            return [error for _ in calls]
+
+        responses_by_id = {response.get("id"): response for response in responses}
+        results = []
+        for request in requests:
+            response = responses_by_id.get(request["id"], {})
+            if response.get("error"):
+                results.append(
+                    RpcController.__get_error(
+                        response, request["method"], request["params"]
+                    )
+                )
+            else:
+                results.append(response.get("result"))
+        return results
+
+    @staticmethod
+    def call_with_streamed_hex_param(
+        blockchain_name: str,
+        method: str,
+        params_before: list,
+        source,
+        length: int,
+        params_after: list = None,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    ):
+        """
+        Calls the daemon with a parameter holding the hex encoding of length bytes read
+        from the source file object. The bytes are read, hex encoded and sent in chunks
+        so the payload is never held in memory or passed on a command line.
+        """
+        if params_after is None:
+            params_after = []
+
+        request = RpcController.__get_request(
+            method,
+            params_before + [RpcController.STREAMED_PARAM_PLACEHOLDER] + params_after,
+        )
+        prefix, suffix = json.dumps(request).split(
+            RpcController.STREAMED_PARAM_PLACEHOLDER
+        )
+        prefix = prefix.encode()
+        suffix = suffix.encode()
+
+        def get_body():
+            yield prefix
+            remaining = length
+            while remaining > 0:
+                chunk = source.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise ValueError(
+                        "The payload ended "
+                        + str(remaining)
+                        + " bytes before its announced length"
+                    )
+                remaining -= len(chunk)
+                yield binascii.hexlify(chunk)
+            yield suffix
+
+        content_length = len(prefix) + 2 * length + len(suffix)
+        response = RpcController.__send(blockchain_name, get_body(), content_length)
+        return RpcController.__get_result(
+            response, method, params_before + ["<" + str(length) + " bytes>"] + params_after
+        )
+
+    @staticmethod
+    def get_connection_info(blockchain_name: str, params_path=""):
+        """
+        Returns the port, user and password of the daemon's JSON-RPC API. They are read
+        from the chain's multichain.conf, the port defaulting to the default-rpc-port
+        parameter of params.dat
+        """
+        chain_path = os.path.join(
+            ConfigurationController.validate_params_path(params_path), blockchain_name
+        )
+        config = ConfigObj(os.path.join(chain_path, RpcController.CONFIG_FILE))
+
+        user = config.get(RpcController.RPC_USER_PARAM)
+        password = config.get(RpcController.RPC_PASSWORD_PARAM)
+        if not user or not password:
+            raise ValueError(
+                "The RPC credentials of " + blockchain_name + " could not be found"
+            )
+
+        port = config.get(RpcController.RPC_PORT_PARAM)
+        if not port:
+            port = ConfigurationController.get_config_param(
+                blockchain_name, RpcController.DEFAULT_RPC_PORT_PARAM, params_path
+            )
+
+        return int(str(port).split()[0]), user, password
+
+    @staticmethod
+    def __get_request(method: str, params: list):
+        """
+        Returns a JSON-RPC request object with a unique id
+        """
+        return {
+            "jsonrpc": "1.0",
+            "id": next(RpcController._request_ids),
+            "method": method,
+            "params": params,
+        }
+
+    @staticmethod
+    def __send(blockchain_name: str, body, content_length: int):
+        """
+        Posts the body (an iterable of bytes) to the daemon and returns the decoded
+        JSON response
+        """
+        blockchain_name = blockchain_name.strip()
+        if not blockchain_name:
+            raise ValueError("Blockchain name can't be empty")
+
+        port, user, password = RpcController.get_connection_info(blockchain_name)
+        credentials = base64.b64encode((user + ":" + password).encode()).decode()
+        headers = {
+            "Authorization": "Basic " + credentials,
+            "Content-Type": "application/json",
+            "Content-Length": str(content_length),
+        }
+
+        connection = http.client.HTTPConnection(
+            RpcController.RPC_HOST, port, timeout=RpcController.RPC_TIMEOUT
+        )
+        try:
+            connection.request("POST", RpcController.RPC_PATH, body=body, headers=headers)
+            response = connection.getresponse()
+            response_body = response.read()
+        finally:
+            connection.close()
+
+        try:
+            return json.loads(response_body)
+        except ValueError:
+            raise MultiChainError(
+                (
+                    "error: the daemon answered with HTTP status "
+                    + str(response.status)
+                    + ": "
+                    + response.reason
+                ).encode()
+            )
+
+    @staticmethod
+    def __get_result(response: dict, method: str, params: list):
+        """
+        Returns the result of a JSON-RPC response or raises its error
+        """
+        if response.get("error"):
+            raise RpcController.__get_error(response, method, params)
+        return response.get("result")
+
+    @staticmethod
+    def __get_error(response: dict, method: str, params: list):
+        """
+        Returns a MultiChainError holding the error of a JSON-RPC response. The message
+        is laid out like multichain-cli's so MultiChainError can parse it the same way
+        """
+        error = response.get("error") or {}
+        message = (
+            json.dumps({"method": method, "params": params})
+            + "\n\nerror code: "
+            + str(error.get("code"))
+            + "\nerror message:\n"
+            + str(error.get("message"))
+        )
+        return MultiChainError(message.encode())
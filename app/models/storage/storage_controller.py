@@ -0,0 +1,47 @@
+import json
+import os
+from urllib.parse import quote
+
+
+class StorageController:
+    STORAGE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".talos")
+    TEMPORARY_EXTENSION = ".tmp"
+
+    @staticmethod
+    def get_path(*names):
+        """
+        Returns the path of a file or directory of the server's local storage. Every
+        name is quoted so names such as stream names can't escape the storage directory
+        """
+        if not names:
+            raise ValueError("The storage path can't be empty")
+
+        return os.path.join(
+            StorageController.STORAGE_DIRECTORY,
+            *[quote(str(name), safe="") for name in names]
+        )
+
+    @staticmethod
+    def read_json(path: str, default=None):
+        """
+        Returns the JSON value stored in the file, or default if there is no such file
+        """
+        if not os.path.isfile(path):
+            return default
+
+        with open(path) as stored_file:
+            return json.load(stored_file)
+
+    @staticmethod
+    def write_json(path: str, value):
+        """
+        Atomically replaces the file with the JSON value, creating its directory if
+        needed. The file is flushed to disk before it replaces the previous one
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary_path = path + StorageController.TEMPORARY_EXTENSION
+        with open(temporary_path, "w") as stored_file:
+            json.dump(value, stored_file)
+            stored_file.flush()
+            os.fsync(stored_file.fileno())
+        os.replace(temporary_path, path)
@@ -0,0 +1,293 @@
+import threading
+import time
+
+from app.models.exception.multichain_error import MultiChainError
+from app.models.rpc.rpc_controller import RpcController
+
+
+class Receipt:
+    def __init__(self, txid: str, submitted_at: float):
+        self._txid = txid
+        self._submitted_at = submitted_at
+        self._confirmations = 0
+        self._blockhash = None
+        self._error = None
+
+    def get_txid(self):
+        return self._txid
+
+    def get_submitted_at(self):
+        return self._submitted_at
+
+    def get_confirmations(self):
+        return self._confirmations
+
+    def get_error(self):
+        return self._error
+
+    def set_status(self, confirmations: int, blockhash: str, error: str):
+        self._confirmations = confirmations
+        self._blockhash = blockhash
+        self._error = error
+
+    def to_json(self, confirmations: int):
+        return {
+            "txid": self._txid,
+            "confirmations": self._confirmations,
+            "blockhash": self._blockhash,
+            "confirmed": self._confirmations >= confirmations,
+            "error": self._error,
+        }
+
+
+class TransactionController:
+    GET_BEST_BLOCK_HASH_ARG = "getbestblockhash"
+    GET_RAW_TRANSACTION_ARG = "getrawtransaction"
+    POLL_INTERVAL = 1.0
+    RECEIPT_TTL = 3600.0
+    MAX_RECEIPT_COUNT = 10000
+    MAX_CONFIRMATIONS = 100
+    DEFAULT_CONFIRMATIONS_VALUE = 1
+    DEFAULT_TIMEOUT_VALUE = 30
+    MAX_TIMEOUT = 60
+
+    _lock = threading.Lock()
+    _receipts = {}
+    _conditions = {}
+    _watchers = {}
+
+    @staticmethod
+    def track(blockchain_name: str, txid):
+        """
+        Records a submitted transaction, so that its confirmations are followed by the
+        block watcher of its chain. Accepts the txid as returned by multichain-cli
+        """
+        if isinstance(txid, bytes):
+            txid = txid.decode("utf-8")
+        txid = txid.strip().strip('"')
+        if not txid:
+            return
+
+        with TransactionController._lock:
+            TransactionController.__add_receipt(
+                blockchain_name, Receipt(txid, time.monotonic())
+            )
+            TransactionController.__start_watcher(blockchain_name)
+
+    @staticmethod
+    def wait_for_confirmations(
+        blockchain_name: str,
+        txid: str,
+        confirmations: int = DEFAULT_CONFIRMATIONS_VALUE,
+        timeout: float = DEFAULT_TIMEOUT_VALUE,
+    ):
+        """
+        Waits until the transaction has at least confirmations confirmations, or until
+        timeout seconds elapsed. A single watcher thread per chain follows new blocks
+        and refreshes the confirmations of every tracked transaction at once, waking
+        up all the waiters. Returns the receipt of the transaction, whose confirmed
+        field tells whether the wait succeeded, right away if the daemon doesn't know
+        the transaction. A transaction that wasn't tracked is only followed if it is
+        still waiting for confirmations once its status is retrieved.
+        """
+        try:
+            blockchain_name = blockchain_name.strip()
+            txid = txid.strip()
+
+            if not blockchain_name:
+                raise ValueError("Blockchain name can't be empty")
+
+            if not txid:
+                raise ValueError("The transaction id can't be empty")
+
+            if (
+                confirmations <= 0
+                or confirmations > TransactionController.MAX_CONFIRMATIONS
+            ):
+                raise ValueError(
+                    "The number of confirmations must be between 1 and "
+                    + str(TransactionController.MAX_CONFIRMATIONS)
+                )
+
+            if timeout < 0 or timeout > TransactionController.MAX_TIMEOUT:
+                raise ValueError(
+                    "The timeout must be between 0 and "
+                    + str(TransactionController.MAX_TIMEOUT)
+                    + " seconds"
+                )
+
+            # The status of a transaction that isn't tracked is retrieved right away,
+            # so unknown and confirmed transactions return without waiting for a block
+            # and without taking the place of the tracked receipts
+            #
+            with TransactionController._lock:
+                receipt = TransactionController._receipts.get((blockchain_name, txid))
+            if receipt is None:
+                receipt = Receipt(txid, time.monotonic())
+                try:
+                    TransactionController.__refresh_receipts(
+                        blockchain_name, [receipt]
+                    )
+                except Exception as err:
+                    raise ValueError(
+                        "The status of the transaction can't be retrieved: " + str(err)
+                    )
+
+                if (
+                    receipt.get_error() is not None
+                    or receipt.get_confirmations() >= confirmations
+                    or timeout == 0
+                ):
+                    return receipt.to_json(confirmations)
+
+                with TransactionController._lock:
+                    receipt = TransactionController.__add_receipt(
+                        blockchain_name, receipt
+                    )
+
+            deadline = time.monotonic() + timeout
+            condition = TransactionController.__get_condition(blockchain_name)
+            with condition:
+                while True:
+                    # A receipt forgotten during the wait keeps its last status
+                    #
+                    with TransactionController._lock:
+                        receipt = TransactionController._receipts.get(
+                            (blockchain_name, txid), receipt
+                        )
+                        TransactionController.__start_watcher(blockchain_name)
+
+                    remaining = deadline - time.monotonic()
+                    if (
+                        receipt.get_error() is not None
+                        or receipt.get_confirmations() >= confirmations
+                        or remaining <= 0
+                    ):
+                        return receipt.to_json(confirmations)
+                    condition.wait(remaining)
+        except ValueError as err:
+            raise err
+        except Exception as err:
+            raise err
+
+    @staticmethod
+    def __add_receipt(blockchain_name: str, receipt: Receipt):
+        """
+        Tracks the receipt unless its transaction is already tracked, forgetting the
+        oldest receipt past MAX_RECEIPT_COUNT. Returns the receipt tracked for the
+        transaction. Must be called with the lock held
+        """
+        receipts = TransactionController._receipts
+        key = (blockchain_name, receipt.get_txid())
+        if key not in receipts:
+            receipts[key] = receipt
+            if len(receipts) > TransactionController.MAX_RECEIPT_COUNT:
+                del receipts[next(iter(receipts))]
+        return receipts[key]
+
+    @staticmethod
+    def __get_condition(blockchain_name: str):
+        """
+        Returns the condition notified when the receipts of the chain are refreshed
+        """
+        with TransactionController._lock:
+            return TransactionController._conditions.setdefault(
+                blockchain_name, threading.Condition()
+            )
+
+    @staticmethod
+    def __start_watcher(blockchain_name: str):
+        """
+        Starts the block watcher of the chain if it isn't running. Must be called with
+        the lock held
+        """
+        watcher = TransactionController._watchers.get(blockchain_name)
+        if watcher is not None and watcher.is_alive():
+            return
+
+        watcher = threading.Thread(
+            target=TransactionController.__watch_blocks,
+            args=(blockchain_name,),
+            daemon=True,
+        )
+        TransactionController._watchers[blockchain_name] = watcher
+        watcher.start()
+
+    @staticmethod
+    def __get_active_receipts(blockchain_name: str):
+        """
+        Returns the receipts of the chain whose confirmations are still followed,
+        forgetting the ones that expired or reached MAX_CONFIRMATIONS. Must be called
+        with the lock held
+        """
+        now = time.monotonic()
+        active_receipts = []
+        for key, receipt in list(TransactionController._receipts.items()):
+            if key[0] != blockchain_name:
+                continue
+
+            if (
+                receipt.get_confirmations() >= TransactionController.MAX_CONFIRMATIONS
+                or now - receipt.get_submitted_at() > TransactionController.RECEIPT_TTL
+            ):
+                del TransactionController._receipts[key]
+            else:
+                active_receipts.append(receipt)
+        return active_receipts
+
+    @staticmethod
+    def __watch_blocks(blockchain_name: str):
+        """
+        Polls the chain tip every POLL_INTERVAL seconds, and refreshes the tracked
+        receipts of the chain whenever it changes. Stops once no receipt is followed
+        """
+        tip = None
+        while True:
+            with TransactionController._lock:
+                receipts = TransactionController.__get_active_receipts(blockchain_name)
+                if not receipts:
+                    del TransactionController._watchers[blockchain_name]
+                    return
+
+            try:
+                best_block_hash = RpcController.call(
+                    blockchain_name, TransactionController.GET_BEST_BLOCK_HASH_ARG, []
+                )
+                if best_block_hash != tip:
+                    TransactionController.__refresh_receipts(blockchain_name, receipts)
+                    tip = best_block_hash
+            except Exception:
+                # The daemon may be restarting, the receipts are refreshed once it is
+                # reachable again
+                #
+                pass
+
+            time.sleep(TransactionController.POLL_INTERVAL)
+
+    @staticmethod
+    def __refresh_receipts(blockchain_name: str, receipts: list):
+        """
+        Updates the confirmations of the receipts with a single batch call, then wakes
+        up the waiters of the chain
+        """
+        results = RpcController.call_batch(
+            blockchain_name,
+            [
+                (
+                    TransactionController.GET_RAW_TRANSACTION_ARG,
+                    [receipt.get_txid(), 1],
+                )
+                for receipt in receipts
+            ],
+        )
+        for receipt, result in zip(receipts, results):
+            if isinstance(result, MultiChainError):
+                receipt.set_status(0, None, result.get_error_message())
+            else:
+                receipt.set_status(
+                    result.get("confirmations", 0), result.get("blockhash"), None
+                )
+
+        condition = TransactionController.__get_condition(blockchain_name)
+        with condition:
+            condition.notify_all()
@@ -0,0 +1,103 @@
+"""
+Compares the on-chain size of a telemetry item and the number of items encoded and
+decoded per second when it is published as JSON, MessagePack or CBOR, with and without
+its numeric arrays packed. The encoded sizes include the payload codec header.
+
+Usage: python -m benchmarks.encoding_benchmark [item_count] [sample_count]
+"""
+import json
+import random
+import sys
+import time
+
+from app.models.data.payload_codec import PayloadCodec
+
+DEFAULT_ITEM_COUNT = 2000
+DEFAULT_SAMPLE_COUNT = 128
+BLOCKCHAIN_NAME = "benchmark"
+PACKED_ARRAYS = {"readings.temperature": "f", "readings.pressure": "d", "counts": "i"}
+ENCODINGS = [
+    (PayloadCodec.MSGPACK_ENCODING, {}),
+    (PayloadCodec.MSGPACK_ENCODING, PACKED_ARRAYS),
+    (PayloadCodec.CBOR_ENCODING, {}),
+    (PayloadCodec.CBOR_ENCODING, PACKED_ARRAYS),
+]
+
+
+def get_item(sample_count):
+    """
+    Returns a telemetry item holding sample_count readings of every series
+    """
+    return {
+        "deviceId": "sensor-0042",
+        "timestamp": 1561939200,
+        "readings": {
+            "temperature": [
+                round(random.uniform(-20, 40), 2) for _ in range(sample_count)
+            ],
+            "pressure": [random.uniform(950, 1050) for _ in range(sample_count)],
+        },
+        "counts": [random.randrange(100000) for _ in range(sample_count)],
+    }
+
+
+def measure(function, argument, item_count):
+    """
+    Returns the number of times function is called per second
+    """
+    started_at = time.perf_counter()
+    for _ in range(item_count):
+        function(argument)
+    return item_count / (time.perf_counter() - started_at)
+
+
+def main():
+    item_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITEM_COUNT
+    sample_count = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SAMPLE_COUNT
+    item = get_item(sample_count)
+
+    json_data = json.dumps({"json": item})
+    json_size = len(json_data)
+    print("items: %d, samples per series: %d" % (item_count, sample_count))
+    print(
+        "%-18s %8d bytes  encode %8.0f/sec  decode %8.0f/sec"
+        % (
+            "json",
+            json_size,
+            measure(json.dumps, {"json": item}, item_count),
+            measure(json.loads, json_data, item_count),
+        )
+    )
+
+    for encoding, packed_arrays in ENCODINGS:
+        stream = encoding + ("-packed" if packed_arrays else "")
+        PayloadCodec.set_stream_encoding(
+            BLOCKCHAIN_NAME, stream, encoding, packed_arrays
+        )
+
+        def encode(value):
+            return PayloadCodec.encode(BLOCKCHAIN_NAME, stream, value)
+
+        def decode(data):
+            return PayloadCodec.decode_data(BLOCKCHAIN_NAME, data)
+
+        data = encode(item)
+        if data is None:
+            print("%-18s not smaller than json, published as json" % stream)
+            continue
+
+        size = len(data) // 2
+        print(
+            "%-18s %8d bytes  encode %8.0f/sec  decode %8.0f/sec  (%.0f%% of json)"
+            % (
+                stream,
+                size,
+                measure(encode, item, item_count),
+                measure(decode, data, item_count),
+                100.0 * size / json_size,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
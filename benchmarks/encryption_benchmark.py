@@ -0,0 +1,83 @@
+"""
+Measures how many items per second EncrytpionController encrypts for a fixed set of
+recipients, comparing the previous behaviour (a controller built and every recipient key
+decoded for each item) with the keyring-backed controller reused across items.
+
+Usage: python -m benchmarks.encryption_benchmark [item_count] [recipient_count]
+"""
+import sys
+import time
+
+import nacl.encoding
+import nacl.secret
+import nacl.utils
+from nacl.public import PrivateKey, PublicKey, SealedBox
+
+from app.models.encryption.encryption_controller import EncrytpionController
+
+KEY_ENCODING = nacl.encoding.Base64Encoder
+DEFAULT_ITEM_COUNT = 2000
+DEFAULT_RECIPIENT_COUNT = 10
+DATA = '{"customerId": 1234, "amount": 99.95, "currency": "CAD"}'
+
+
+def encrypt_without_keyring(private_key, public_keys, data):
+    """
+    Encrypts one item the way the controller used to: the private key is decoded when the
+    controller is built and each recipient key is decoded into a new SealedBox
+    """
+    user_private_key = PrivateKey(private_key, encoder=KEY_ENCODING)
+    symmetric_key = nacl.utils.random(nacl.secret.SecretBox.KEY_SIZE)
+    enc_data = nacl.secret.SecretBox(symmetric_key).encrypt(data.encode())
+
+    public_key_symmetric_key_map = {}
+    encoded_public_keys = public_keys + [
+        user_private_key.public_key.encode(encoder=KEY_ENCODING)
+    ]
+    for encoded_public_key in encoded_public_keys:
+        public_key = PublicKey(encoded_public_key, encoder=KEY_ENCODING)
+        public_key_symmetric_key_map[encoded_public_key] = SealedBox(
+            public_key
+        ).encrypt(symmetric_key)
+    return enc_data, public_key_symmetric_key_map
+
+
+def encrypt_with_keyring(private_key, public_keys, data):
+    """
+    Encrypts one item with the reusable controller of the user
+    """
+    return EncrytpionController.get_instance(private_key).encrypt_data(data, public_keys)
+
+
+def measure(encrypt, private_key, public_keys, item_count):
+    """
+    Returns the number of items encrypted per second
+    """
+    started_at = time.perf_counter()
+    for _ in range(item_count):
+        encrypt(private_key, public_keys, DATA)
+    return item_count / (time.perf_counter() - started_at)
+
+
+def main():
+    item_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITEM_COUNT
+    recipient_count = (
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RECIPIENT_COUNT
+    )
+
+    private_key = PrivateKey.generate().encode(encoder=KEY_ENCODING)
+    public_keys = [
+        PrivateKey.generate().public_key.encode(encoder=KEY_ENCODING)
+        for _ in range(recipient_count)
+    ]
+
+    before = measure(encrypt_without_keyring, private_key, public_keys, item_count)
+    after = measure(encrypt_with_keyring, private_key, public_keys, item_count)
+
+    print("items: %d, recipients: %d" % (item_count, recipient_count))
+    print("before: %.0f items/sec" % before)
+    print("after:  %.0f items/sec (%.2fx)" % (after, after / before))
+
+
+if __name__ == "__main__":
+    main()
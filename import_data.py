@@ -0,0 +1,75 @@
+"""
+Publishes every row of a CSV or NDJSON file as an item of a stream.
+
+Usage: python3 import_data.py <blockchain> <stream> <file> --format csv --keys id
+           [--data column ...] [--checkpoint path] [--batch-size n] [--codec zlib]
+
+Progress is printed after every committed transaction and the final report is printed
+as JSON. Running the same command again with the same checkpoint resumes the import
+after the last committed row.
+"""
+import argparse
+import json
+import sys
+
+from app.models.data.import_controller import ImportController
+from app.models.data.payload_codec import PayloadCodec
+
+
+def print_progress(report):
+    sys.stderr.write(
+        "\r%d rows published, %d rejected, %.1f rows/sec"
+        % (report["rowsPublished"], report["rowsRejected"], report["rowsPerSecond"])
+    )
+    sys.stderr.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("blockchain_name")
+    parser.add_argument("stream")
+    parser.add_argument("file")
+    parser.add_argument(
+        "--format", required=True, choices=sorted(ImportController.FORMATS)
+    )
+    parser.add_argument(
+        "--keys", nargs="+", required=True, help="the columns used as item keys"
+    )
+    parser.add_argument(
+        "--data",
+        nargs="+",
+        default=ImportController.DEFAULT_DATA_FIELDS_VALUE,
+        help="the columns stored as item data, all the other columns by default",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=ImportController.DEFAULT_CHECKPOINT_PATH_VALUE,
+        help="the file the progress is saved to, to resume the import from",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=ImportController.DEFAULT_BATCH_SIZE
+    )
+    parser.add_argument("--codec", choices=sorted(PayloadCodec.CODECS))
+    args = parser.parse_args()
+
+    with open(args.file, "rb") as source:
+        report = ImportController.import_items(
+            args.blockchain_name,
+            args.stream,
+            source,
+            args.format,
+            args.keys,
+            args.data,
+            args.checkpoint,
+            args.batch_size,
+            args.codec,
+            print_progress,
+        )
+
+    sys.stderr.write("\n")
+    print(json.dumps(report, indent=4))
+    return 1 if report["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
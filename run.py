@@ -1,3 +1,8 @@
 from app import app
+from app.models.data.journal_controller import JournalController
 
+# The journals left by a previous run are replayed by the server only, not by the
+# scripts importing the app package
+#
+JournalController.resume_replays()
 app.run(host='0.0.0.0', port="5000")